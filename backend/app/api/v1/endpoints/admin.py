@@ -3,21 +3,22 @@
 """
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, func
 from sqlalchemy.orm import selectinload
 from fastapi.responses import FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 import os
 from sqlalchemy.orm import selectinload, joinedload
-from datetime import datetime, timezone, timedelta
-import traceback
+from datetime import date, datetime, timezone, timedelta
 import logging
 
 from sqlalchemy import and_
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.deps import get_current_admin
-from app.schemas.order import Order, AdminOrder, OrderWithUser, OrderDetail
+from app.schemas.order import Order, AdminOrder, OrderWithUser, OrderDetail, AdminOrderListItem
 from app.schemas.track import Track, TrackWithOrder, TrackAdminCreate, TrackSimple
 from app.schemas.example_track import ExampleTrack, ExampleTrackCreate, ExampleTrackUpdate
 from app.models.user import User as UserModel
@@ -26,6 +27,8 @@ from app.models.order import Order as OrderModel, OrderStatus   # ⬅️ И ЭТ
 from app.crud.track import crud_track
 from app.crud.example_track import crud_example_track
 from app.core.file_storage import file_storage
+from app.core.audio_response import audio_file_response
+from app.core.pagination import keyset_paginate, split_page, set_next_cursor
 from app.models.example_track import ExampleTrack as ExampleTrackModel
 from app.schemas.stats import StatsResponse
 from app.crud.stats import crud_stats
@@ -33,6 +36,11 @@ from app.crud.order import crud_order
 from app.schemas.user import User as UserSchema
 from app.crud.user import upsert_user_by_email, crud_user
 from app.services.order_status_service import order_status_service
+from app.services.job_queue import job_queue
+from app.services.notification_dispatcher import notification_dispatcher
+from app.bot.bot import peek_bot_instance
+from app.services.stats_rollup_service import stats_rollup_service
+from app.core.cache import stats_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -40,6 +48,7 @@ logger = logging.getLogger(__name__)
 @router.get("/tracks/{track_id}/audio-public")
 async def get_track_audio_public(
     track_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -58,12 +67,16 @@ async def get_track_audio_public(
         if not file_path or not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="Аудио файл не найден на диске")
         
-        return FileResponse(
+        return audio_file_response(
+            request,
             file_path,
             media_type=track.audio_mimetype or "audio/mpeg",
-            filename=f"{track.title or 'track'}.mp3"
+            filename=f"{track.title or 'track'}.mp3",
+            file_hash=track.audio_hash
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -102,36 +115,39 @@ async def get_tracks_debug_simple(
         return tracks_data
         
     except Exception as e:
-        print(f"Error in tracks-debug-simple: {e}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error in tracks-debug-simple: %s", e)
         return {"error": str(e)}
         
 # ===== Эндпоинт для гарантированного получения всей информации по трекам =====
 @router.get("/tracks-detailed", response_model=List[TrackSimple])
 async def get_tracks_detailed(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db),
     admin: UserModel = Depends(get_current_admin)
 ):
     """
-    Получить треки (упрощенная версия для отладки)
+    Получить треки (упрощенная версия для отладки).
+    Следующая страница — по курсору из заголовка X-Next-Cursor.
     """
     try:
-        print("=== TRACKS DETAILED SIMPLIFIED ===")
+        logger.debug("=== TRACKS DETAILED SIMPLIFIED ===")
         
-        query = select(TrackModel)
+        query = keyset_paginate(select(TrackModel), TrackModel, cursor, limit)
         result = await db.execute(query)
-        tracks = result.scalars().all()
+        tracks, next_cursor = split_page(result.scalars().all(), limit)
+        set_next_cursor(response, next_cursor)
         
-        print(f"Found {len(tracks)} tracks")
+        logger.debug("Found %s tracks", len(tracks))
         
         # Возвращаем только основные поля
         return tracks
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in tracks-detailed: {e}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error in tracks-detailed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 # ===== Эндпоинты для загрукзи файлов =====
 
@@ -165,6 +181,7 @@ async def upload_track_to_order(
         audio_filename=file_info["filename"],
         audio_size=file_info["size"],
         audio_mimetype=file_info["mimetype"],
+        audio_hash=file_info["sha256"],
         is_preview=is_preview  # ← ИСПОЛЬЗОВАТЬ is_preview вместо status
     )
     db.add(db_track)
@@ -175,25 +192,28 @@ async def upload_track_to_order(
 
 # ===== Эндпоинты для заказов =====
 
-@router.get("/orders", response_model=List[OrderWithUser])
+@router.get("/orders", response_model=List[AdminOrderListItem])
 async def get_all_orders(
+    response: Response,
     status: Optional[str] = Query(None),
     tariff: Optional[str] = Query(None),  # ⬅️ НОВЫЙ ПАРАМЕТР
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db),
     admin: UserModel = Depends(get_current_admin)
 ):
     """
-    Получить все заказы (админ) с фильтрацией по статусу и тарифу
+    Получить заказы (админ) с фильтрацией по статусу и тарифу.
+    Следующая страница — по курсору из заголовка X-Next-Cursor.
     """
-    orders = await crud_order.get_all(
+    orders, next_cursor = await crud_order.get_all(
         db, 
         status_filter=status,
         tariff_filter=tariff,  # ⬅️ ПЕРЕДАЕМ ФИЛЬТР
         limit=limit, 
-        offset=offset
+        cursor=cursor
     )
+    set_next_cursor(response, next_cursor)
     return orders
 
 @router.get("/orders/{order_id}", response_model=OrderDetail)
@@ -237,14 +257,18 @@ async def update_order_status(
 
 @router.get("/tracks", response_model=List[TrackWithOrder])
 async def get_all_tracks(
+    response: Response,
     order_id: Optional[UUID] = Query(None),
     # УДАЛИТЬ параметр status: Optional[str] = Query(None),
     is_preview: Optional[bool] = Query(None),  # ← ДОБАВИТЬ фильтр по is_preview
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db),
     admin: UserModel = Depends(get_current_admin)
 ):
     """
-    Получить все треки (админ) с информацией о заказах
+    Получить треки (админ) с информацией о заказах.
+    Следующая страница — по курсору из заголовка X-Next-Cursor.
     """
     query = select(TrackModel).options(
         selectinload(TrackModel.order).selectinload(OrderModel.user),
@@ -256,9 +280,11 @@ async def get_all_tracks(
         query = query.where(TrackModel.order_id == order_id)
     if is_preview is not None:  # ← ЗАМЕНИТЬ status на is_preview
         query = query.where(TrackModel.is_preview == is_preview)
-        
+    
+    query = keyset_paginate(query, TrackModel, cursor, limit)
     result = await db.execute(query)
-    tracks = result.unique().scalars().all()
+    tracks, next_cursor = split_page(result.unique().scalars().all(), limit)
+    set_next_cursor(response, next_cursor)
     return tracks
 
 
@@ -306,21 +332,21 @@ async def delete_track_admin(
         if not track:
             raise HTTPException(status_code=404, detail="Трек не найден")
         
-        print(f"=== DELETING TRACK {track_id} ===")
-        print(f"Track title: {track.title}")
-        print(f"Audio filename: {track.audio_filename}")
+        logger.debug("=== DELETING TRACK %s ===", track_id)
+        logger.debug("Track title: %s", track.title)
+        logger.debug("Audio filename: %s", track.audio_filename)
         
         # Удаляем файл с диска если он существует
         file_deleted = False
         if track.audio_filename:
             try:
                 file_deleted = file_storage.delete_file(track.audio_filename, "audio")
-                print(f"File deletion result: {file_deleted}")
+                logger.debug("File deletion result: %s", file_deleted)
             except Exception as e:
-                print(f"Warning: Error deleting file: {e}")
+                logger.warning("Error deleting file: %s", e)
                 # Продолжаем удаление записи из БД даже если файл не удалился
         else:
-            print("No audio file to delete")
+            logger.debug("No audio file to delete")
         
         # Удаляем запись из БД
         result = await db.execute(
@@ -337,15 +363,13 @@ async def delete_track_admin(
         else:
             message = "Трек удален (файл не найден или не удален)"
             
-        print("Track deleted successfully")
+        logger.info("Track deleted successfully")
         return {"message": message}
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error deleting track: {e}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error deleting track: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка при удалении трека: {str(e)}")
 
 # ===== Эндпоинты для примеров треков =====
@@ -429,6 +453,7 @@ async def upload_example_track(
         audio_filename=file_info["filename"],
         audio_size=file_info["size"],
         audio_mimetype=file_info["mimetype"],
+        audio_hash=file_info["sha256"],
         is_active=True
     )
     
@@ -437,7 +462,9 @@ async def upload_example_track(
     await db.refresh(db_track)
     
     # После сохранения файла извлекаем обложку (ДЕЛАЕМ ПОСЛЕ СОЗДАНИЯ ЗАПИСИ)
-    cover_filename = file_storage.extract_cover_from_mp3(file_info["filename"], "examples")
+    cover_filename = await run_in_threadpool(
+        file_storage.extract_cover_from_mp3, file_info["filename"], "examples"
+    )
     if cover_filename:
         db_track.cover_filename = cover_filename
         await db.commit()  # ← ВАЖНО: коммитим изменения с обложкой
@@ -451,6 +478,7 @@ async def upload_example_track(
 @router.get("/example-tracks/{track_id}/audio")
 async def get_example_track_audio(
     track_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -464,10 +492,12 @@ async def get_example_track_audio(
     if not file_path:
         raise HTTPException(status_code=404, detail="Аудио файл не найден")
     
-    return FileResponse(
+    return audio_file_response(
+        request,
         file_path,
         media_type=track.audio_mimetype or "audio/mpeg",
-        filename=f"{track.title}.mp3"
+        filename=f"{track.title}.mp3",
+        file_hash=track.audio_hash
     )
 
 @router.delete("/example-tracks/{track_id}")
@@ -492,22 +522,6 @@ async def delete_example_track(
     
     return {"message": "Пример трека удален"}
 
-@router.get("/stats")
-async def get_admin_stats(
-    db: AsyncSession = Depends(get_db),
-    admin: UserModel = Depends(get_current_admin)
-):
-    """
-    Получить статистику для админки
-    """
-    # TODO: Реализовать сбор статистики
-    return {
-        "total_orders": 0,
-        "orders_in_progress": 0,
-        "orders_completed": 0,
-        "total_users": 0
-    }
-
 @router.delete("/orders/{order_id}")
 async def delete_order_admin(
     order_id: UUID,
@@ -537,19 +551,26 @@ async def delete_order_admin(
                 try:
                     file_storage.delete_file(track.audio_filename, "audio")
                 except Exception as e:
-                    print(f"Warning: Error deleting track file {track.audio_filename}: {e}")
+                    logger.warning("Error deleting track file %s: %s", track.audio_filename, e)
         
         # Удаляем заказ (треки удалятся каскадно из-за cascade="all, delete-orphan")
+        order_day = order.created_at.date()
         await db.delete(order)
         await db.commit()
         
+        # Удаление не видно по updated_at, поэтому день сводки пересчитываем сразу
+        try:
+            await stats_rollup_service.refresh_days([order_day])
+        except Exception as e:
+            logger.error(f"Error refreshing stats rollup: {e}")
+        
         return {"message": "Заказ и связанные треки удалены"}
         
     except HTTPException:
         raise
     except Exception as e:
         await db.rollback()
-        print(f"Error deleting order: {e}")
+        logger.error("Error deleting order: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка при удалении заказа: {str(e)}")
 
 # Статистика
@@ -559,6 +580,9 @@ async def delete_order_admin(
 @router.get("/stats", response_model=StatsResponse)
 async def get_admin_stats(
     period: str = "month",
+    days: Optional[int] = Query(None, ge=1, le=366),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
     db: AsyncSession = Depends(get_db),
     admin: UserModel = Depends(get_current_admin)
 ):
@@ -568,8 +592,14 @@ async def get_admin_stats(
     try:
         from app.crud.stats import crud_stats
         
-        stats = await crud_stats.get_all_stats(db, period)
-        return stats
+        # Статистика считается в собственных сессиях, поэтому фоновый
+        # пересчет не зависит от сессии запроса
+        cache_key = f"{period}:{days}:{date_from}:{date_to}"
+        stats, age = await stats_cache.get(
+            cache_key,
+            lambda: crud_stats.get_all_stats(None, period, days, date_from, date_to)
+        )
+        return {**stats, "cache_age_seconds": round(age, 1)}
         
     except Exception as e:
         logger.error(f"Error generating stats: {e}")
@@ -578,6 +608,45 @@ async def get_admin_stats(
             detail=f"Ошибка при генерации статистики: {str(e)}"
         )
 
+@router.get("/jobs/stats")
+async def get_job_queue_stats(
+    db: AsyncSession = Depends(get_db),
+    admin: UserModel = Depends(get_current_admin)
+):
+    """
+    Состояние фоновой очереди обработки треков (глубина, пропускная способность)
+    """
+    return await job_queue.get_stats(db)
+
+@router.get("/notifications/stats")
+async def get_notification_stats(
+    db: AsyncSession = Depends(get_db),
+    admin: UserModel = Depends(get_current_admin)
+):
+    """
+    Состояние outbox уведомлений Telegram (очередь, отправлено, ошибки)
+    """
+    return await notification_dispatcher.get_stats(db)
+
+@router.post("/bot/status/refresh")
+async def refresh_bot_status(
+    admin: UserModel = Depends(get_current_admin)
+):
+    """
+    Заново запросить getMe (и getWebhookInfo в режиме webhook) и вернуть статус бота
+    """
+    bot = peek_bot_instance()
+    if not bot:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Бот не инициализирован")
+    
+    try:
+        await bot.status.refresh(bot.bot, settings.TELEGRAM_BOT_MODE)
+    except Exception as e:
+        logger.warning(f"Не удалось обновить статус бота: {e}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Telegram API: {e}")
+    
+    return {"mode": settings.TELEGRAM_BOT_MODE, **bot.status.snapshot()}
+
 @router.get("/producers")
 async def get_producers(
     db: AsyncSession = Depends(get_db),
@@ -587,15 +656,14 @@ async def get_producers(
     Получить список всех продюсеров
     """
     try:
-        print("🔍 Fetching producers...")
+        logger.debug("Fetching producers...")
         producers = await crud_user.get_producers(db)  # ← вызываем как метод экземпляра
-        print(f"🔍 Found {len(producers)} producers")
+        logger.debug("Found %s producers", len(producers))
         
         return [UserSchema.model_validate(producer) for producer in producers]
         
     except Exception as e:
-        print(f"❌ Error fetching producers: {str(e)}")
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.exception("Error fetching producers: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при получении продюсеров: {str(e)}"
@@ -620,7 +688,7 @@ async def assign_producer(
                 detail="producer_id обязателен"
             )
         
-        print(f"🔍 Admin assigning producer {producer_id} to order {order_id}")
+        logger.debug("Admin assigning producer %s to order %s", producer_id, order_id)
         
         # Получаем заказ
         order = await crud_order.get(db, order_id)
@@ -644,23 +712,23 @@ async def assign_producer(
         # Автоматически меняем статус если заказ был готов для проверки
         if order.status == OrderStatus.READY_FOR_REVIEW:
             order.status = OrderStatus.IN_PROGRESS
-            print(f"🔍 Auto-changing status to IN_PROGRESS for order {order_id}")
+            logger.info("Auto-changing status to IN_PROGRESS for order %s", order_id)
 
         # Автоматически меняем статус если заказ был был в черновиках
         if order.status == OrderStatus.DRAFT:
             if order.tariff_plan == "premium":
                 order.status = OrderStatus.WAITING_INTERVIEW
-                print(f"🔍 Auto-changing status to WAITING_INTERVIEW for order {order_id}")
+                logger.info("Auto-changing status to WAITING_INTERVIEW for order %s", order_id)
             else:
                 order.status = OrderStatus.IN_PROGRESS
-                print(f"🔍 Auto-changing status to IN_PROGRESS for order {order_id}")
+                logger.info("Auto-changing status to IN_PROGRESS for order %s", order_id)
 
         await db.commit()
         await db.refresh(order)
         
         # TODO: Отправить уведомление продюсеру
         
-        print(f"✅ Producer {producer_id} assigned to order {order_id}")
+        logger.info("Producer %s assigned to order %s", producer_id, order_id)
         
         return {
             "message": f"Продюсер {producer.name} назначен на заказ",
@@ -673,7 +741,7 @@ async def assign_producer(
         raise
     except Exception as e:
         await db.rollback()
-        print(f"❌ Error assigning producer: {str(e)}")
+        logger.error("Error assigning producer: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при назначении продюсера: {str(e)}"
@@ -3,7 +3,6 @@ Endpoints для аутентификации
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-import httpx
 from datetime import timedelta
 from fastapi.responses import RedirectResponse
 from urllib.parse import urlencode
@@ -11,6 +10,7 @@ import hashlib
 import hmac
 
 from app.core.config import settings
+from app.core.http_client import http_client
 from app.core.database import get_db
 from app.core.deps import get_current_user as get_current_user_dep
 from app.core.security import create_access_token, create_token_from_user  # ← ИМПОРТИРУЕМ НОВУЮ ФУНКЦИЮ
@@ -38,7 +38,7 @@ async def yandex_login_redirect():
         "scope": "login:email login:info",
     }
     
-    auth_url = f"https://oauth.yandex.ru/authorize?{urlencode(params)}"
+    auth_url = f"{settings.YANDEX_OAUTH_URL}/authorize?{urlencode(params)}"
     return RedirectResponse(url=auth_url)
 
 @router.get("/yandex/callback")
@@ -108,7 +108,7 @@ async def _yandex_exchange_code_for_token(code: str, redirect_uri: str) -> dict:
     """
     Обмен кода на access_token в Яндекс OAuth
     """
-    token_url = "https://oauth.yandex.ru/token"
+    token_url = f"{settings.YANDEX_OAUTH_URL}/token"
     data = {
         "grant_type": "authorization_code",
         "code": code,
@@ -117,23 +117,21 @@ async def _yandex_exchange_code_for_token(code: str, redirect_uri: str) -> dict:
         "redirect_uri": redirect_uri,
     }
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.post(token_url, data=data, headers=headers)
-        if r.status_code != 200:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ошибка обмена кода на токен (Yandex)")
-        return r.json()
+    r = await http_client.post("yandex", token_url, data=data, headers=headers)
+    if r.status_code != 200:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ошибка обмена кода на токен (Yandex)")
+    return r.json()
 
 async def _yandex_fetch_user_info(access_token: str) -> dict:
     """
     Получение информации о пользователе Яндекс
     """
-    info_url = "https://login.yandex.ru/info?format=json"
+    info_url = f"{settings.YANDEX_LOGIN_URL}/info?format=json"
     headers = {"Authorization": f"OAuth {access_token}"}
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.get(info_url, headers=headers)
-        if r.status_code != 200:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ошибка получения профиля (Yandex)")
-        return r.json()
+    r = await http_client.get("yandex", info_url, headers=headers)
+    if r.status_code != 200:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ошибка получения профиля (Yandex)")
+    return r.json()
 
 @router.post("/login/{provider}", response_model=AuthResponse)
 async def oauth_login(
@@ -391,15 +389,14 @@ async def _google_exchange_code_for_token(code: str, redirect_uri: str) -> dict:
         "redirect_uri": redirect_uri,
     }
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.post(token_url, data=data, headers=headers)
-        if r.status_code != 200:
-            error_detail = r.json().get("error_description", "Unknown error")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, 
-                detail=f"Ошибка обмена кода на токен (Google): {error_detail}"
-            )
-        return r.json()
+    r = await http_client.post("google", token_url, data=data, headers=headers)
+    if r.status_code != 200:
+        error_detail = r.json().get("error_description", "Unknown error")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, 
+            detail=f"Ошибка обмена кода на токен (Google): {error_detail}"
+        )
+    return r.json()
 
 async def _google_fetch_user_info(access_token: str) -> dict:
     """
@@ -407,11 +404,10 @@ async def _google_fetch_user_info(access_token: str) -> dict:
     """
     info_url = "https://www.googleapis.com/oauth2/v3/userinfo"
     headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.get(info_url, headers=headers)
-        if r.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, 
-                detail="Ошибка получения профиля (Google)"
-            )
-        return r.json()
\ No newline at end of file
+    r = await http_client.get("google", info_url, headers=headers)
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, 
+            detail="Ошибка получения профиля (Google)"
+        )
+    return r.json()
\ No newline at end of file
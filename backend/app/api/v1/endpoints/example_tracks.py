@@ -2,15 +2,15 @@
 Публичные эндпоинты для примеров треков
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 import os
-from fastapi.responses import FileResponse
 
 from app.core.database import get_db
 from app.schemas.example_track import ExampleTrack
 from app.crud.example_track import crud_example_track
 from app.core.file_storage import file_storage
+from app.core.audio_response import audio_file_response, cover_file_response
 
 router = APIRouter()
 
@@ -30,6 +30,7 @@ async def get_example_tracks(
 @router.get("/example-tracks/{track_id}/audio")
 async def get_example_track_audio(
     track_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -48,10 +49,12 @@ async def get_example_track_audio(
     if not file_path:
         raise HTTPException(status_code=404, detail="Аудиофайл не найден на сервере")
     
-    return FileResponse(
+    return audio_file_response(
+        request,
         file_path,
         media_type=track.audio_mimetype or "audio/mpeg",
-        filename=f"{track.title}.mp3"
+        filename=f"{track.title}.mp3",
+        file_hash=track.audio_hash
     )
 
 @router.get("/example-tracks/{track_id}/cover")
@@ -75,9 +78,8 @@ async def get_example_track_cover(
     if cover_filename:
         cover_path = file_storage.get_cover_path(cover_filename)
         if cover_path:
-            return FileResponse(
+            return cover_file_response(
                 cover_path,
-                media_type="image/jpeg",
                 filename=f"{track.title}_cover.jpg"
             )
     
@@ -2,7 +2,7 @@
 Endpoints для работы с жанрами
 """
 from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
@@ -16,4 +16,7 @@ async def get_genres(
     db: AsyncSession = Depends(get_db)
 ):
     """Получить все активные жанры"""
-    return await crud_genre.get_all(db)
\ No newline at end of file
+    return Response(
+        content=await crud_genre.get_all_json(db),
+        media_type="application/json"
+    )
\ No newline at end of file
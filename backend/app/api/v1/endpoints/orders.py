@@ -7,17 +7,18 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 import logging
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-import asyncio
 
 from app.crud.order import crud_order
 from app.core.database import get_db
 from app.core.deps import get_current_user
-from app.schemas.order import Order, OrderCreate, OrderDetail, OrderUpdate
+from app.schemas.order import Order, OrderCreate, OrderDetail, OrderUpdate, OrderListItem
 from app.schemas.user import User as UserSchema
 from app.models.order import OrderStatus
 from app.models.tariff_plan import TariffPlan
 from app.services.order_service import order_service
 from app.services.order_status_service import order_status_service
+from app.services.notification_service import notification_service
+from app.services.background_tasks import background_tasks
 from app.crud.revision import crud_revision_comment
 from app.schemas.revision import RevisionCommentCreate
 
@@ -35,8 +36,8 @@ async def create_order(
     """
     try:
         logger.info(f"Создание заказа для пользователя {current_user.id}")
-        print(f"🔍 DEBUG OrderCreate data: {order_data.dict()}")
-        print(f"🔍 DEBUG Tariff from request: {order_data.tariff_plan}")
+        logger.debug("OrderCreate data: %s", order_data)
+        logger.debug("Tariff from request: %s", order_data.tariff_plan)
         
         # Валидация бизнес-логики - ПЕРЕДАЕМ db
         await order_service.validate_order_data(order_data, db)
@@ -48,14 +49,18 @@ async def create_order(
             db=db  # ← ДОБАВЛЯЕМ db
         )
         
-        print(f"🔍 DEBUG: Prepared order dict: {order_dict}")
+        logger.debug("Prepared order dict: %s", order_dict)
         
-        # Создаем заказ через CRUD
-        order = await crud_order.create(db, order_dict, user_id=current_user.id)
+        # Создаем заказ через CRUD; уведомления пишутся в outbox той же транзакцией
+        order = await crud_order.create(db, order_dict, user_id=current_user.id, commit=False)
+        notification_service.notify_order_created(db, order.id)
+        await db.commit()
         
+        await db.refresh(order)
         await db.refresh(order, ['theme', 'genre'])
         
-        asyncio.create_task(order_service.after_order_created(order.id, db))
+        # Остальное — после ответа, в ограниченной фоновой очереди со своей сессией
+        background_tasks.submit("after_order_created", order_service.after_order_created, order.id)
         
         logger.info(f"Заказ создан: {order.id}")
         return order
@@ -69,7 +74,7 @@ async def create_order(
             detail=f"Ошибка при создании заказа: {str(e)}"
         )
         
-@router.get("", response_model=List[Order])
+@router.get("", response_model=List[OrderListItem])
 async def get_orders(
     db = Depends(get_db),
     current_user: UserSchema = Depends(get_current_user)
@@ -77,8 +82,7 @@ async def get_orders(
     """
     Получить список заказов пользователя
     """
-    orders = await crud_order.get_by_user(db, current_user.id)
-    return orders
+    return await crud_order.get_list_by_user(db, current_user.id)
 
 @router.get("/{order_id}", response_model=OrderDetail)
 async def get_order(
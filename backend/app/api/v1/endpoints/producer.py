@@ -4,94 +4,75 @@ Endpoints для работы продюсера с заказами
 """
 from typing import Optional, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Form, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, Form, File, UploadFile, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-import traceback
 import logging
-import uuid
-import os
 from datetime import datetime, timezone
 
 from app.core.database import get_db
 from app.core.deps import get_current_user, get_current_producer
 from app.models.user import User
 from app.models.order import Order, OrderStatus
-from app.schemas.order import Order as OrderSchema
-from app.schemas.order import OrderDetail
+from app.schemas.order import OrderDetail, OrderListItem
 from app.schemas.user import User as UserSchema
 from app.crud.order import crud_order
 from app.schemas.track import Track as TrackSchema
 from app.models.track import Track
 from app.core.file_storage import file_storage
+from app.core.pagination import set_next_cursor
+from app.models.processing_job import JobType
+from app.services.job_queue import job_queue
 
-from app.services.order_status_service import order_status_service
 from app.services.notification_service import notification_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/orders", response_model=List[OrderSchema])
+@router.get("/orders", response_model=List[OrderListItem])
 async def get_producer_orders(
+    response: Response,
     order_status: Optional[str] = None,  # ← ПЕРЕИМЕНОВАЛИ ПАРАМЕТР
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Получить заказы текущего продюсера
+    Получить заказы текущего продюсера.
+    Следующая страница — по курсору из заголовка X-Next-Cursor.
     """
     try:
-        print(f"🔍 Producer orders request from: {current_user.id} ({current_user.email})")
-        print(f"🔍 is_producer: {current_user.is_producer}, is_admin: {current_user.is_admin}")
-        print(f"🔍 Status filter: {order_status}")  # ← используем переименованный параметр
+        logger.debug("Producer orders request from: %s (%s)", current_user.id, current_user.email)
+        logger.debug("is_producer: %s, is_admin: %s", current_user.is_producer, current_user.is_admin)
+        logger.debug("Status filter: %s", order_status)
         
         # Проверяем что пользователь продюсер или админ
         if not current_user.is_producer and not current_user.is_admin:
-            print("❌ User is not producer or admin")
+            logger.warning("User is not producer or admin")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Только продюсеры могут просматривать свои заказы"
             )
         
         # Получаем заказы продюсера
-        orders = await crud_order.get_by_producer(
+        orders, next_cursor = await crud_order.get_by_producer(
             db, 
             producer_id=current_user.id,
-            status=order_status  # ← используем переименованный параметр
+            status=order_status,  # ← используем переименованный параметр
+            limit=limit,
+            cursor=cursor
         )
+        set_next_cursor(response, next_cursor)
         
-        print(f"🔍 Found {len(orders)} orders for producer")
-        
-        # Преобразуем в схему без связанных объектов чтобы избежать ошибок
-        result = []
-        for order in orders:
-            order_dict = {
-                "id": order.id,
-                "user_id": order.user_id,
-                "theme_id": order.theme_id,
-                "genre_id": order.genre_id,
-                "producer_id": order.producer_id,
-                "recipient_name": order.recipient_name,
-                "occasion": order.occasion,
-                "details": order.details,
-                "tariff_plan": order.tariff_plan,
-                "preferences": order.preferences,
-                "status": order.status,
-                "deadline_at": order.deadline_at,
-                "price": order.price,
-                "rounds_remaining": order.rounds_remaining,
-                "interview_link": order.interview_link,
-                "created_at": order.created_at,
-                "updated_at": order.updated_at,
-            }
-            result.append(order_dict)
+        logger.debug("Found %s orders for producer", len(orders))
         
-        return result
+        # Проекция уже содержит только нужные колонки
+        return orders
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error getting producer orders: {str(e)}")
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.exception("Error getting producer orders: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при получении заказов: {str(e)}"
@@ -178,8 +159,8 @@ async def upload_track(
     Загрузить трек для заказа (для продюсера)
     """
     try:
-        print(f"🔍 Producer uploading track for order {order_id}")
-        print(f"🔍 File: {audio_file.filename}, title: {title}, is_preview: {is_preview}")
+        logger.debug("Producer uploading track for order %s", order_id)
+        logger.debug("File: %s, title: %s, is_preview: %s", audio_file.filename, title, is_preview)
         
         # Проверяем что пользователь продюсер или админ
         if not current_user.is_producer and not current_user.is_admin:
@@ -206,7 +187,7 @@ async def upload_track(
         # Автоматически определяем is_preview для оплаченных заказов
         if order.status == 'paid':
             is_preview = False
-            print("🔍 Order is paid, forcing full version")
+            logger.debug("Order is paid, forcing full version")
         
         # Проверяем файл
         if not audio_file.filename:
@@ -224,139 +205,69 @@ async def upload_track(
         
         if order.status in [OrderStatus.PAID, OrderStatus.IN_PROGRESS_FINAL_REVISION]:
             is_preview = False  # Для оплаченных заказов и финальных правок - всегда полная версия
-            print("🔍 Order is paid or final revision, forcing full version")
-        
-        # Сохраняем файл (обрезаем если это превью)
-        if is_preview:
-            print("🔍 Creating preview version (60 seconds)")
-            file_info = await _create_preview_version(audio_file)
-        else:
-            print("🔍 Creating full version")
-            file_info = await _save_full_audio_file(audio_file)
+            logger.debug("Order is paid or final revision, forcing full version")
         
-        print(f"🔍 File saved: {file_info['filename']}, size: {file_info['size']}")
+        # Сохраняем исходный файл потоково; обрезка превью и подготовка
+        # полной версии выполняются фоновой очередью
+        file_info = await _save_full_audio_file(audio_file)
+        logger.debug("Source file saved: %s, size: %s", file_info['filename'], file_info['size'])
         
         # ⬇️⬇️⬇️ ПОЛУЧАЕМ СЛЕДУЮЩУЮ ВЕРСИЮ ТРЕКА ⬇️⬇️⬇️
         from app.crud.track import crud_track
         version = await crud_track.increment_version(db, order_id, is_preview)
-        print(f"🔍 Track version: {version}")
+        logger.debug("Track version: %s", version)
         
-        # Создаем запись в БД
-        db_track = Track(
-            order_id=order_id,
-            title=title,
-            audio_filename=file_info["filename"],
-            audio_size=file_info["size"],
-            audio_mimetype=file_info["mimetype"],
-            is_preview=is_preview,
-            version=version  # ⬅️ ДОБАВЛЯЕМ ВЕРСИЮ
-        )
+        # Создаем запись в БД в статусе "processing"
+        if is_preview:
+            # Полный исходник не публикуем: файл появится после обрезки
+            db_track = Track(
+                order_id=order_id,
+                title=title,
+                is_preview=True,
+                version=version,
+                processing_status="processing"
+            )
+        else:
+            db_track = Track(
+                order_id=order_id,
+                title=title,
+                audio_filename=file_info["filename"],
+                audio_size=file_info["size"],
+                audio_mimetype=file_info["mimetype"],
+                audio_hash=file_info["sha256"],
+                is_preview=False,
+                version=version,
+                processing_status="processing"
+            )
         
         db.add(db_track)
-        await db.commit()
-        await db.refresh(db_track)
+        await db.flush()
         
-        print(f"✅ Track created: {db_track.id}, is_preview: {db_track.is_preview}, version: {db_track.version}")
+        if is_preview:
+            await job_queue.enqueue(db, db_track.id, JobType.TRIM_PREVIEW, {
+                "source_filename": file_info["filename"],
+                "original_name": file_info["original_name"]
+            })
+        else:
+            await job_queue.enqueue(db, db_track.id, JobType.FINALIZE_MASTER)
         
-        # ⬇️⬇️⬇️ ЗАМЕНЯЕМ СТАРУЮ ЛОГИКУ НА ВЫЗОВ СЕРВИСА ⬇️⬇️⬇️
-        # Автоматически обновляем статус заказа через сервис
-        status_updated = await order_status_service.on_tracks_changed(db, order_id)
+        await db.commit()
+        await db.refresh(db_track)
+        job_queue.notify()
         
-        if status_updated:
-            print(f"✅ Order status automatically updated via service")
-        else:
-            print(f"ℹ️ Order status not changed")
+        logger.info("Track queued: %s, is_preview: %s, version: %s", db_track.id, db_track.is_preview, db_track.version)
         
         return TrackSchema.model_validate(db_track)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error uploading track: {str(e)}")
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.exception("Error uploading track: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при загрузке трека: {str(e)}"
         )
 
-async def _create_preview_version(audio_file: UploadFile) -> dict:
-    """
-    Обрезка через SOX для MP3 и WAV
-    """
-    try:
-        print("🔍 Starting preview creation with SOX...")
-        
-        # Читаем файл
-        file_content = await audio_file.read()
-        
-        # Определяем расширение
-        original_ext = os.path.splitext(audio_file.filename)[1].lower()
-        
-        # Поддерживаем только MP3 и WAV
-        if original_ext not in ['.mp3', '.wav']:
-            print(f"❌ Unsupported format: {original_ext}, converting to MP3")
-            output_ext = '.mp3'
-        else:
-            output_ext = original_ext
-        
-        # Создаем временный файл
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=original_ext) as temp_input:
-            temp_input.write(file_content)
-            temp_input_path = temp_input.name
-        
-        # Выходной файл
-        output_filename = f"{uuid.uuid4()}_preview{output_ext}"
-        output_path = os.path.join(file_storage.audio_dir, output_filename)
-        
-        # Команда SOX для обрезки
-        import subprocess
-        cmd = [
-            'sox',
-            temp_input_path,
-            output_path,
-            'trim', '0', '60'  # первые 60 секунд
-        ]
-        
-        print(f"🔍 Running SOX command: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        # Удаляем временный файл
-        os.unlink(temp_input_path)
-        
-        if result.returncode == 0 and os.path.exists(output_path):
-            file_size = os.path.getsize(output_path)
-            print(f"✅ SOX preview created: {output_filename}, size: {file_size} bytes")
-            
-            # Определяем MIME тип
-            mime_type = "audio/mpeg" if output_ext == '.mp3' else "audio/wav"
-            
-            return {
-                "filename": output_filename,
-                "size": file_size,
-                "mimetype": mime_type,
-                "original_name": audio_file.filename
-            }
-        else:
-            print(f"❌ SOX failed: {result.stderr}")
-            # Fallback: сохраняем оригинал
-            audio_file.file.seek(0)
-            return await file_storage.save_audio_file(audio_file, "audio")
-            
-    except subprocess.TimeoutExpired:
-        print("❌ SOX timeout")
-        if 'temp_input_path' in locals() and os.path.exists(temp_input_path):
-            os.unlink(temp_input_path)
-        audio_file.file.seek(0)
-        return await file_storage.save_audio_file(audio_file, "audio")
-        
-    except Exception as e:
-        print(f"❌ SOX error: {str(e)}")
-        if 'temp_input_path' in locals() and os.path.exists(temp_input_path):
-            os.unlink(temp_input_path)
-        audio_file.file.seek(0)
-        return await file_storage.save_audio_file(audio_file, "audio")
-
 async def _save_full_audio_file(audio_file: UploadFile) -> dict:
     """
     Сохранить полную версию аудио файла используя file_storage
@@ -365,11 +276,12 @@ async def _save_full_audio_file(audio_file: UploadFile) -> dict:
         # Используем file_storage для сохранения файла
         file_info = await file_storage.save_audio_file(audio_file, "audio")
         
-        print(f"🔍 Full audio file saved: {file_info['filename']}")
+        logger.debug("Full audio file saved: %s", file_info['filename'])
         
         return {
             "filename": file_info["filename"],
             "size": file_info["size"],
+            "sha256": file_info["sha256"],
             "mimetype": file_info["mimetype"],
             "original_name": file_info["original_name"]
         }
@@ -378,7 +290,7 @@ async def _save_full_audio_file(audio_file: UploadFile) -> dict:
         # Пробрасываем HTTPException от file_storage
         raise
     except Exception as e:
-        print(f"❌ Error saving full audio file: {str(e)}")
+        logger.error("Error saving full audio file: %s", e)
         raise Exception(f"Ошибка при сохранении аудио файла: {str(e)}")
     
 @router.post("/orders/{order_id}/add-comment")
@@ -482,33 +394,29 @@ async def upload_final_track(
         # ⬇️⬇️⬇️ ПОЛУЧАЕМ СЛЕДУЮЩУЮ ВЕРСИЮ ТРЕКА ⬇️⬇️⬇️
         from app.crud.track import crud_track
         version = await crud_track.increment_version(db, order_id, is_preview=False)
-        print(f"🔍 Final track version: {version}")
+        logger.debug("Final track version: %s", version)
         
-        # Создаем запись трека
+        # Создаем запись трека (публикуется после фоновой обработки)
         db_track = Track(
             order_id=order_id,
             title=title,
             audio_filename=file_info["filename"],
             audio_size=file_info["size"],
             audio_mimetype=file_info["mimetype"],
+            audio_hash=file_info["sha256"],
             is_preview=False,  # ⬅️ Это полная версия!
-            version=version  # ⬅️ ДОБАВЛЯЕМ ВЕРСИЮ
+            version=version,  # ⬅️ ДОБАВЛЯЕМ ВЕРСИЮ
+            processing_status="processing"
         )
         
         db.add(db_track)
+        await db.flush()
+        await job_queue.enqueue(db, db_track.id, JobType.FINALIZE_MASTER)
         await db.commit()
         await db.refresh(db_track)
+        job_queue.notify()
         
-        print(f"✅ Final track created: {db_track.id}, version: {db_track.version}")
-        
-        # ⬇️⬇️⬇️ ЗАМЕНЯЕМ СТАРУЮ ЛОГИКУ НА ВЫЗОВ СЕРВИСА ⬇️⬇️⬇️
-        # Автоматически обновляем статус заказа через сервис
-        status_updated = await order_status_service.on_tracks_changed(db, order_id)
-        
-        if status_updated:
-            print(f"✅ Order status automatically updated via service")
-        else:
-            print(f"ℹ️ Order status not changed")
+        logger.info("Final track queued: %s, version: %s", db_track.id, db_track.version)
         
         return {
             "message": "Финальный трек загружен! Пользователь получит уведомление.",
@@ -551,26 +459,13 @@ async def producer_confirm_payment(
         order.status = OrderStatus.PAID
         order.paid_at = datetime.now(timezone.utc).replace(tzinfo=None)
         
-        await db.commit()
-        
-        # ⬇️⬇️⬇️ ДОБАВЛЯЕМ УВЕДОМЛЕНИЕ ⬇️⬇️⬇️
-        # Отправляем уведомление об изменении статуса
-        await notification_service.notify_order_status_changed(
-            order_id, old_status, order.status
+        # Уведомления уходят через outbox после коммита
+        notification_service.notify_order_status_changed(
+            db, order_id, old_status, order.status
         )
+        notification_service.notify_payment_confirmed(db, order_id)
         
-        # Отправляем специальное уведомление пользователю
-        from app.crud.user import crud_user
-        user = await crud_user.get_by_id(db, order.user_id)
-        if user and user.telegram_id:
-            user_message = (
-                f"💰 <b>Оплата подтверждена!</b>\n\n"
-                f"Заказ #{str(order.id)[:8]} оплачен и принят в работу.\n\n"
-                f"Продюсер уже создает финальную версию вашей песни.\n"
-                f"Обычно это занимает 24 часа.\n\n"
-                f"🌐 <a href='https://musicme.ru/order/{order.id}'>Открыть заказ</a>"
-            )
-            await notification_service.notify_admin(user_message)  # Временно через admin функцию
+        await db.commit()
         
         logger.info(f"Продюсер {current_user.id} подтвердил оплату для заказа {order_id}")
         
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-import traceback
+import logging
 
 from app.core.database import get_db
 from app.core.deps import get_current_admin
@@ -10,6 +10,7 @@ from app.crud.tariff import crud_tariff
 from app.models.user import User
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.get("", response_model=TariffListResponse)
 async def get_tariffs(db: AsyncSession = Depends(get_db)):
@@ -17,19 +18,13 @@ async def get_tariffs(db: AsyncSession = Depends(get_db)):
     Получить список активных тарифных планов
     """
     try:
-        print("🔍 tariffs endpoint called")  # ← ДЛЯ ОТЛАДКИ
-        
-        tariffs = await crud_tariff.get_active(db)
-        print(f"🔍 Found {len(tariffs)} tariffs")  # ← ДЛЯ ОТЛАДКИ
-        
-        # Проверим структуру данных
-        for tariff in tariffs:
-            print(f"🔍 Tariff: {tariff.code}, features: {tariff.features}")
-        
-        return TariffListResponse(tariffs=tariffs)
+        # Список тарифов отдается готовым JSON из кеша
+        return Response(
+            content=await crud_tariff.get_active_json(db),
+            media_type="application/json"
+        )
     except Exception as e:
-        print(f"❌ Error in tariffs endpoint: {e}")  # ← ДЛЯ ОТЛАДКИ
-        print(f"❌ Traceback: {traceback.format_exc()}")  # ← ДЛЯ ОТЛАДКИ
+        logger.exception("Error in tariffs endpoint: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при получении тарифов: {str(e)}"
@@ -71,7 +66,7 @@ async def create_tariff(
     Создать новый тариф (только для администраторов)
     """
     try:
-        print(f"🔍 Creating tariff: {tariff_data.code}")
+        logger.debug("Creating tariff: %s", tariff_data.code)
         
         # Проверяем, нет ли уже тарифа с таким кодом
         existing_tariff = await crud_tariff.get_by_code(db, tariff_data.code)
@@ -82,15 +77,14 @@ async def create_tariff(
             )
         
         tariff = await crud_tariff.create(db, tariff_data)
-        print(f"✅ Tariff created: {tariff.id}")
+        logger.info("Tariff created: %s", tariff.id)
         
         return tariff
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error creating tariff: {e}")
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.exception("Error creating tariff: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при создании тарифа: {str(e)}"
@@ -107,10 +101,10 @@ async def update_tariff(
     Обновить тариф (только для администраторов)
     """
     try:
-        print(f"🔍 Updating tariff: {tariff_id}")
-        print(f"🔍 Current user: {current_user.id} ({current_user.email})")
-        print(f"🔍 User is admin: {current_user.is_admin}")
-        print(f"🔍 Update data: {tariff_data.dict()}")
+        logger.debug("Updating tariff: %s", tariff_id)
+        logger.debug("Current user: %s (%s)", current_user.id, current_user.email)
+        logger.debug("User is admin: %s", current_user.is_admin)
+        logger.debug("Update data: %s", tariff_data)
         
         # Получаем тариф для обновления
         tariff = await crud_tariff.get(db, tariff_id)
@@ -121,15 +115,14 @@ async def update_tariff(
             )
 
         updated_tariff = await crud_tariff.update(db, tariff, tariff_data)
-        print(f"✅ Tariff updated: {updated_tariff.id}")
+        logger.info("Tariff updated: %s", updated_tariff.id)
         
         return updated_tariff
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error updating tariff: {e}")
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.exception("Error updating tariff: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при обновлении тарифа: {str(e)}"
@@ -138,8 +131,7 @@ async def update_tariff(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error updating tariff: {e}")
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.exception("Error updating tariff: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при обновлении тарифа: {str(e)}"
@@ -155,7 +147,7 @@ async def delete_tariff(
     Удалить тариф (только для администраторов)
     """
     try:
-        print(f"🔍 Deleting tariff: {tariff_id}")
+        logger.debug("Deleting tariff: %s", tariff_id)
         
         # Проверяем что тариф существует
         tariff = await crud_tariff.get(db, tariff_id)
@@ -173,15 +165,14 @@ async def delete_tariff(
                 detail="Не удалось удалить тариф"
             )
         
-        print(f"✅ Tariff deleted: {tariff_id}")
+        logger.info("Tariff deleted: %s", tariff_id)
         
         return {"message": "Тариф успешно удален"}
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error deleting tariff: {e}")
-        print(f"❌ Traceback: {traceback.format_exc()}")
+        logger.exception("Error deleting tariff: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при удалении тарифа: {str(e)}"
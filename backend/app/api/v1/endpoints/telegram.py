@@ -0,0 +1,45 @@
+"""
+Прием обновлений Telegram бота (TELEGRAM_BOT_MODE=webhook)
+"""
+import hmac
+import logging
+
+from aiogram.types import Update
+from fastapi import APIRouter, Header, HTTPException, Request, status
+
+from app.bot.bot import get_bot_instance
+from app.bot.webhook import webhook_secret
+from app.core.config import settings
+from app.services.background_tasks import background_tasks
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.post("/webhook", include_in_schema=False)
+async def telegram_webhook(
+    request: Request,
+    secret_token: str = Header("", alias="X-Telegram-Bot-Api-Secret-Token")
+):
+    """
+    Обновление от Telegram передается диспетчеру бота в фоне, чтобы сразу
+    ответить 200; при переполненной очереди — 503, Telegram повторит доставку
+    """
+    if settings.TELEGRAM_BOT_MODE != "webhook":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not hmac.compare_digest(secret_token, webhook_secret()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Неверный секрет webhook")
+
+    bot = await get_bot_instance()
+    if not bot or not bot.bot:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Бот не инициализирован")
+
+    update = Update.model_validate(await request.json(), context={"bot": bot.bot})
+    accepted = background_tasks.submit(
+        "telegram_update", bot.dp.feed_update, bot.bot, update, with_session=False
+    )
+    if not accepted:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Очередь обновлений заполнена")
+
+    return {"ok": True}
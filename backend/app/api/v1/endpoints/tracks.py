@@ -2,9 +2,8 @@
 Endpoints для работы с треками
 """
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import FileResponse
 
 from app.core.database import get_db
 from app.schemas.track import Track
@@ -12,6 +11,7 @@ from app.schemas.track import Track
 # from app.core.deps import get_current_user
 from app.crud.track import crud_track
 from app.core.file_storage import file_storage
+from app.core.audio_response import audio_file_response
 
 router = APIRouter()
 
@@ -34,6 +34,7 @@ async def get_track(
 @router.get("/{track_id}/audio")
 async def get_track_audio(
     track_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db)
     # УБРАТЬ: current_user: UserSchema = Depends(get_current_user)
 ):
@@ -52,8 +53,10 @@ async def get_track_audio(
     if not file_path:
         raise HTTPException(status_code=404, detail="Аудиофайл не найден на сервере")
     
-    return FileResponse(
+    return audio_file_response(
+        request,
         file_path,
         media_type=track.audio_mimetype or "audio/mpeg",
-        filename=f"{track.title or 'track'}.mp3"
+        filename=f"{track.title or 'track'}.mp3",
+        file_hash=track.audio_hash
     )
\ No newline at end of file
@@ -3,7 +3,7 @@
 """
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, orders, tracks, payments, admin, themes, genres, example_tracks, tariffs, producer
+from app.api.v1.endpoints import auth, orders, tracks, payments, admin, themes, genres, example_tracks, tariffs, producer, telegram
 
 api_router = APIRouter()
 
@@ -18,6 +18,7 @@ api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 api_router.include_router(example_tracks.router, tags=["example-tracks"])
 api_router.include_router(tariffs.router, prefix="/tariffs", tags=["tariffs"])
 api_router.include_router(producer.router, prefix="/producer", tags=["producer"])
+api_router.include_router(telegram.router, prefix="/telegram", tags=["telegram"])
 
 from app.api.v1.endpoints import test
 api_router.include_router(test.router, prefix="/test", tags=["test"])
\ No newline at end of file
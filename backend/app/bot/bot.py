@@ -11,6 +11,9 @@ try:
     from aiogram.enums import ParseMode
     from aiogram.fsm.storage.memory import MemoryStorage
     from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from app.bot.status import BotStatus, UpdateTrackingMiddleware, ApiCallTrackingMiddleware
     AIOGRAM_AVAILABLE = True
 except ImportError:
     AIOGRAM_AVAILABLE = False
@@ -32,6 +35,7 @@ class MusicMeBot:
         self.bot: Optional[Bot] = None
         self.dp: Optional[Dispatcher] = None
         self.storage = MemoryStorage() if AIOGRAM_AVAILABLE else None
+        self.status = BotStatus() if AIOGRAM_AVAILABLE else None
         
     async def initialize(self) -> bool:
         """Инициализация бота"""
@@ -49,11 +53,14 @@ class MusicMeBot:
             # Инициализация бота
             self.bot = Bot(
                 token=self.config.token,
+                session=AiohttpSession(api=TelegramAPIServer.from_base(self.config.api_url)),
                 default=DefaultBotProperties(parse_mode=ParseMode.HTML)
             )
+            self.bot.session.middleware(ApiCallTrackingMiddleware(self.status))
             
             # Инициализация диспетчера
             self.dp = Dispatcher(storage=self.storage)
+            self.dp.update.outer_middleware(UpdateTrackingMiddleware(self.status))
             
             # Регистрация middleware и handlers
             if hasattr(register_middleware, '__call__'):
@@ -62,7 +69,15 @@ class MusicMeBot:
             if hasattr(register_handlers, '__call__'):
                 await register_handlers(self.dp)
             
-            logger.info(f"Telegram бот @{self.config.username} инициализирован")
+            # Идентичность запрашивается один раз, /bot/status отдает ее из памяти
+            try:
+                await self.status.refresh_identity(self.bot)
+            except Exception as e:
+                # Telegram может быть недоступен при старте — бот все равно поднимается
+                logger.warning(f"Не удалось получить данные бота (getMe): {e}")
+            
+            username = self.status.identity["username"] if self.status.identity else self.config.username
+            logger.info(f"Telegram бот @{username} инициализирован")
             return True
             
         except Exception as e:
@@ -116,6 +131,11 @@ async def get_bot_instance():
     return _bot_instance
 
 
+def peek_bot_instance():
+    """Экземпляр бота, если он уже инициализирован (без обращения к Telegram)"""
+    return _bot_instance
+
+
 async def shutdown_bot():
     """Завершение работы бота"""
     global _bot_instance
@@ -13,7 +13,8 @@ class BotConfig:
         self.username = settings.TELEGRAM_BOT_USERNAME
         self.name = settings.TELEGRAM_BOT_NAME
         self.mode = getattr(settings, 'TELEGRAM_BOT_MODE', 'background')
-        self.admin_chat_id = getattr(settings, 'TELEGRAM_ADMIN_CHAT_ID', None)
+        self.api_url = settings.TELEGRAM_API_URL
+        self.admin_chat_id = settings.TELEGRAM_ADMIN_CHAT_ID or None
 
 
 def get_bot_config() -> BotConfig:
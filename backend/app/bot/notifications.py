@@ -1,147 +1,141 @@
 """
-Уведомления через Telegram бота
+Тексты уведомлений Telegram бота
+
+Сообщения собираются из записи outbox и данных заказа, которые
+диспетчер загружает одним запросом на всю пачку (render_notification).
+Отправкой занимается app.services.notification_dispatcher.
 """
-import logging
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, Tuple
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from app.bot.bot import get_bot_instance
-from app.core.database import AsyncSessionLocal
-from app.crud.user import crud_user
-from app.models.order import Order
-
-logger = logging.getLogger(__name__)
-
-
-async def send_order_created_notification(order: Order):
-    """Отправить уведомление о создании заказа"""
-    try:
-        bot = await get_bot_instance()
-        if not bot or not bot.bot:
-            logger.warning("Бот не инициализирован, уведомление не отправлено")
-            return False
-        
-        async with AsyncSessionLocal() as db:
-            # Получаем пользователя
-            user = await crud_user.get_by_id(db, order.user_id)
-            if not user or not user.telegram_id:
-                return False
-            
-            # Формируем сообщение
-            text = (
-                f"🎵 <b>Заказ #{order.id[:8]} создан!</b>\n\n"
-                f"<b>Тариф:</b> {order.tariff_id}\n"
-                f"<b>Сумма:</b> {order.price} руб.\n"
-                f"<b>Срок выполнения:</b> 24-48 часов\n\n"
-                f"Мы уже начали работать над вашей песней!\n"
-                f"Уведомим, когда демо-версия будет готова."
-            )
-            
-            keyboard = InlineKeyboardBuilder()
-            keyboard.add(
-                InlineKeyboardButton(
-                    text="📋 Открыть заказ",
-                    url=f"https://musicme.ru/order/{order.id}"
-                )
-            )
-            
-            # Отправляем пользователю
-            await bot.bot.send_message(
-                chat_id=user.telegram_id,
-                text=text,
-                reply_markup=keyboard.as_markup(),
-                disable_web_page_preview=True
-            )
-            
-            logger.info(f"Уведомление о создании заказа отправлено пользователю {user.telegram_id}")
-            return True
-            
-    except Exception as e:
-        logger.error(f"Ошибка отправки уведомления о создании заказа: {e}")
-        return False
-
-
-async def send_order_ready_notification(order: Order):
-    """Отправить уведомление о готовности демо-версии"""
-    try:
-        bot = await get_bot_instance()
-        if not bot or not bot.bot:
-            logger.warning("Бот не инициализирован, уведомление не отправлено")
-            return False
-        
-        async with AsyncSessionLocal() as db:
-            # Получаем пользователя
-            user = await crud_user.get_by_id(db, order.user_id)
-            if not user or not user.telegram_id:
-                return False
-            
-            # Формируем сообщение
-            text = (
-                f"🎵 <b>Демо-версия готова!</b>\n\n"
-                f"Заказ #{order.id[:8]} готов для прослушивания.\n\n"
-                f"🎧 <a href='{order.preview_url}'>Прослушать 60-секундное демо</a>\n\n"
-                f"<b>Что дальше?</b>\n"
-                f"1. Прослушайте демо-версию\n"
-                f"2. Если понравилось - оплатите полную версию\n"
-                f"3. Если нужны правки - запросите их\n\n"
-                f"<i>Срок действия демо: 7 дней</i>"
-            )
-            
-            keyboard = InlineKeyboardBuilder()
-            keyboard.add(
-                InlineKeyboardButton(
-                    text="🎵 Прослушать демо",
-                    url=f"https://musicme.ru/track/{order.id}"
-                ),
-                InlineKeyboardButton(
-                    text="💳 Перейти к оплате",
-                    url=f"https://musicme.ru/payment/{order.id}"
-                )
-            )
-            keyboard.adjust(1)
-            
-            # Отправляем пользователю
-            await bot.bot.send_message(
-                chat_id=user.telegram_id,
-                text=text,
-                reply_markup=keyboard.as_markup(),
-                disable_web_page_preview=True
-            )
-            
-            logger.info(f"Уведомление о готовности заказа отправлено пользователю {user.telegram_id}")
-            return True
-            
-    except Exception as e:
-        logger.error(f"Ошибка отправки уведомления о готовности заказа: {e}")
-        return False
-
-
-async def send_admin_notification(text: str, chat_id: Optional[int] = None):
-    """Отправить уведомление администратору"""
-    try:
-        bot = await get_bot_instance()
-        if not bot or not bot.bot:
-            logger.warning("Бот не инициализирован, уведомление не отправлено")
-            return False
-        
-        # Если chat_id не указан, используем из конфигурации
-        if not chat_id:
-            chat_id = bot.get_config().admin_chat_id
-        
-        if not chat_id:
-            logger.warning("Admin chat_id не настроен")
-            return False
-        
-        await bot.bot.send_message(
-            chat_id=chat_id,
-            text=text,
-            disable_web_page_preview=True
-        )
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"Ошибка отправки уведомления администратору: {e}")
-        return False
\ No newline at end of file
+from app.models.notification_outbox import NotificationOutbox, NotificationKind, NotificationRecipient
+
+SITE_URL = "https://musicme.ru"
+
+STATUS_NAMES = {
+    "draft": "📝 Черновик",
+    "in_progress": "⚙️ В работе",
+    "ready_for_review": "🎵 Готово для прослушивания",
+    "payment_pending": "💳 Ожидает оплаты",
+    "paid": "✅ Оплачено",
+    "ready_for_final_review": "🎶 Готов финальный вариант",
+    "completed": "🎉 Завершено",
+    "cancelled": "❌ Отменено"
+}
+
+# Дополнительная строка в уведомлении пользователя о смене статуса
+USER_STATUS_HINTS = {
+    "paid": "✅ Оплата подтверждена! Готовим полную версию.",
+    "ready_for_final_review": "🎶 Финальная версия готова! Можете скачать.",
+    "completed": "🎉 Заказ успешно завершен!",
+    "cancelled": "❌ Заказ отменен.",
+}
+
+RenderedMessage = Tuple[str, Optional[InlineKeyboardMarkup]]
+
+
+def _order_button(order) -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardBuilder()
+    keyboard.add(InlineKeyboardButton(text="📋 Открыть заказ", url=f"{SITE_URL}/order/{order.id}"))
+    return keyboard.as_markup()
+
+
+def _order_created(notification: NotificationOutbox, order) -> RenderedMessage:
+    if notification.recipient == NotificationRecipient.ADMIN:
+        return (
+            f"🎵 <b>Новый заказ #{str(order.id)[:8]}</b>\n\n"
+            f"<b>Тариф:</b> {order.tariff_plan}\n"
+            f"<b>Сумма:</b> {order.price} руб.\n"
+            f"<b>Пользователь:</b> {order.email}\n"
+            f"<b>Статус:</b> {order.status}\n\n"
+            f"🌐 <a href='{SITE_URL}/admin/orders/{order.id}'>Открыть в админке</a>"
+        ), None
+
+    return (
+        f"🎵 <b>Заказ #{str(order.id)[:8]} создан!</b>\n\n"
+        f"<b>Тариф:</b> {order.tariff_plan}\n"
+        f"<b>Сумма:</b> {order.price} руб.\n"
+        f"<b>Срок выполнения:</b> 24-48 часов\n\n"
+        f"Мы уже начали работать над вашей песней!\n"
+        f"Уведомим, когда демо-версия будет готова."
+    ), _order_button(order)
+
+
+def _order_ready(notification: NotificationOutbox, order) -> RenderedMessage:
+    text = (
+        f"🎵 <b>Демо-версия готова!</b>\n\n"
+        f"Заказ #{str(order.id)[:8]} готов для прослушивания.\n\n"
+        f"🎧 <a href='{SITE_URL}/track/{order.id}'>Прослушать 60-секундное демо</a>\n\n"
+        f"<b>Что дальше?</b>\n"
+        f"1. Прослушайте демо-версию\n"
+        f"2. Если понравилось - оплатите полную версию\n"
+        f"3. Если нужны правки - запросите их\n\n"
+        f"<i>Срок действия демо: 7 дней</i>"
+    )
+
+    keyboard = InlineKeyboardBuilder()
+    keyboard.add(
+        InlineKeyboardButton(text="🎵 Прослушать демо", url=f"{SITE_URL}/track/{order.id}"),
+        InlineKeyboardButton(text="💳 Перейти к оплате", url=f"{SITE_URL}/payment/{order.id}")
+    )
+    keyboard.adjust(1)
+    return text, keyboard.as_markup()
+
+
+def _order_status_changed(notification: NotificationOutbox, order) -> RenderedMessage:
+    payload = notification.payload or {}
+    old_status = payload.get("old_status")
+    new_status = payload.get("new_status")
+    new_status_name = STATUS_NAMES.get(new_status, new_status)
+
+    if notification.recipient == NotificationRecipient.ADMIN:
+        return (
+            f"📊 <b>Статус заказа #{str(order.id)[:8]} изменен</b>\n\n"
+            f"Было: {STATUS_NAMES.get(old_status, old_status)}\n"
+            f"Стало: {new_status_name}\n\n"
+            f"🌐 <a href='{SITE_URL}/order/{order.id}'>Открыть заказ</a>"
+        ), None
+
+    text = (
+        f"📊 <b>Статус вашего заказа #{str(order.id)[:8]}</b>\n\n"
+        f"Обновлен: {new_status_name}\n"
+    )
+    if new_status in USER_STATUS_HINTS:
+        text += f"\n{USER_STATUS_HINTS[new_status]}"
+    text += f"\n\n🌐 <a href='{SITE_URL}/order/{order.id}'>Открыть заказ</a>"
+    return text, None
+
+
+def _payment_confirmed(notification: NotificationOutbox, order) -> RenderedMessage:
+    return (
+        f"💰 <b>Оплата подтверждена!</b>\n\n"
+        f"Заказ #{str(order.id)[:8]} оплачен и принят в работу.\n\n"
+        f"Продюсер уже создает финальную версию вашей песни.\n"
+        f"Обычно это занимает 24 часа.\n\n"
+        f"🌐 <a href='{SITE_URL}/order/{order.id}'>Открыть заказ</a>"
+    ), None
+
+
+_RENDERERS = {
+    NotificationKind.ORDER_CREATED.value: _order_created,
+    NotificationKind.ORDER_READY.value: _order_ready,
+    NotificationKind.ORDER_STATUS_CHANGED.value: _order_status_changed,
+    NotificationKind.PAYMENT_CONFIRMED.value: _payment_confirmed,
+}
+
+
+def render_notification(notification: NotificationOutbox, order=None) -> Optional[RenderedMessage]:
+    """
+    Текст и клавиатура уведомления.
+    order — строка с полями заказа и email/telegram_id владельца;
+    None, если заказ уже удален (тогда уведомление не отправляется)
+    """
+    if notification.kind == NotificationKind.ADMIN_MESSAGE:
+        return (notification.payload or {}).get("text"), None
+
+    renderer = _RENDERERS.get(notification.kind)
+    if renderer is None or order is None:
+        return None
+    return renderer(notification, order)
@@ -5,8 +5,9 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 
-from app.bot.bot import MusicMeBot, shutdown_bot
+from app.bot.bot import MusicMeBot, get_bot_instance, shutdown_bot
 from app.bot.config import get_bot_config
+from app.bot.webhook import register_webhook
 
 logger = logging.getLogger(__name__)
 
@@ -41,13 +42,16 @@ async def start_polling():
 
 
 async def run_background():
-    """Запуск бота в фоновом режиме (вместе с веб-сервером)"""
-    bot = MusicMeBot()
+    """
+    Запуск бота в фоновом режиме (polling вместе с веб-сервером).
+    Каждый процесс uvicorn опрашивает Telegram сам — режим для разработки,
+    в проде используется webhook
+    """
+    # Тот же экземпляр, через который уходят уведомления
+    bot = await get_bot_instance()
     
     try:
-        # Инициализация бота
-        initialized = await bot.initialize()
-        if not initialized:
+        if not bot:
             logger.error("Не удалось инициализировать бота")
             return None
         
@@ -55,6 +59,10 @@ async def run_background():
         logger.info(f"Запуск Telegram бота в фоновом режиме...")
         if not hasattr(config, 'polling_interval'):
             config.polling_interval = 1.0
+        
+        # getUpdates не работает, пока зарегистрирован webhook
+        await bot.bot.delete_webhook(drop_pending_updates=False)
+        
         # Создаем фоновую задачу для polling
         polling_task = asyncio.create_task(
             bot.dp.start_polling(
@@ -63,15 +71,36 @@ async def run_background():
                 skip_updates=True
             )
         )
+        bot.status.watch_polling(polling_task)
         
         return polling_task
         
     except Exception as e:
         logger.error(f"Ошибка запуска бота в фоновом режиме: {e}")
-        await bot.shutdown()
+        await shutdown_bot()
         return None
 
 
+async def run_webhook() -> bool:
+    """
+    Режим webhook: бот только инициализируется (обновления приходят
+    в /api/v1/telegram/webhook), регистрацию выполняет один процесс
+    """
+    bot = await get_bot_instance()
+    if not bot:
+        logger.error("Не удалось инициализировать бота")
+        return False
+    
+    try:
+        await register_webhook(bot)
+    except Exception as e:
+        # Регистрация могла остаться от прошлого запуска — прием обновлений не блокируем
+        logger.error(f"Ошибка регистрации webhook: {e}")
+    
+    logger.info("Telegram бот работает в режиме webhook")
+    return True
+
+
 @asynccontextmanager
 async def bot_lifespan():
     """
@@ -0,0 +1,220 @@
+"""
+Состояние Telegram бота для /bot/status
+
+Идентичность бота (getMe) запрашивается один раз при инициализации,
+остальное копится по ходу работы: middleware диспетчера считает
+обновления и ошибки обработчиков, middleware сессии — вызовы Bot API
+(для polling успешный getUpdates означает, что опрос жив). Статус
+отдается из памяти процесса и не порождает запросов к Telegram;
+свежие данные — только по явному refresh от администратора.
+
+Здоровье оценивается по ошибкам самого Bot API (сеть, 5xx, 401, 429,
+конфликт getUpdates): статус «degraded» — после
+DEGRADED_AFTER_ERRORS таких ошибок подряд. Ошибки конкретного чата
+(бот заблокирован, чат не найден) учитываются отдельно и на статус не
+влияют.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import (
+    TelegramConflictError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+)
+from aiogram.types import TelegramObject
+
+# Ошибки, говорящие о недоступности Bot API, а не о конкретном чате
+HEALTH_ERRORS = (
+    TelegramNetworkError,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+    TelegramRetryAfter,
+    TelegramConflictError,
+)
+
+# Сколько ошибок Bot API подряд переводят статус в degraded
+DEGRADED_AFTER_ERRORS = 3
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class BotStatus:
+    """Состояние бота в пределах процесса"""
+
+    def __init__(self):
+        self.identity: Optional[Dict[str, Any]] = None
+        self.identity_checked_at: Optional[datetime] = None
+        self.identity_error: Optional[str] = None
+
+        # Обработка обновлений
+        self.updates_total = 0
+        self.updates_in_progress = 0
+        self.update_errors = 0
+        self.last_update_at: Optional[datetime] = None
+
+        # Вызовы Bot API
+        self.api_calls = 0
+        self.api_errors = 0
+        self.consecutive_api_errors = 0
+        self.last_api_ok_at: Optional[datetime] = None
+        self.last_api_error: Optional[str] = None
+        self.last_api_error_at: Optional[datetime] = None
+        self.last_poll_at: Optional[datetime] = None
+
+        # Ошибки конкретных чатов (бот заблокирован, неверный запрос)
+        self.chat_errors = 0
+        self.last_chat_error: Optional[str] = None
+
+        # Polling (TELEGRAM_BOT_MODE=background)
+        self.polling_started_at: Optional[datetime] = None
+        self.polling_stopped: Optional[str] = None
+
+        # getWebhookInfo по последнему refresh
+        self.webhook_info: Optional[Dict[str, Any]] = None
+
+    async def refresh_identity(self, bot) -> None:
+        """getMe; ошибка сохраняется, прежняя идентичность не сбрасывается"""
+        try:
+            me = await bot.get_me()
+        except Exception as e:
+            self.identity_error = str(e)
+            raise
+        self.identity = {"id": me.id, "username": me.username, "first_name": me.first_name}
+        self.identity_checked_at = _utcnow()
+        self.identity_error = None
+
+    async def refresh_webhook_info(self, bot) -> None:
+        """getWebhookInfo: очередь недоставленных обновлений на стороне Telegram"""
+        info = await bot.get_webhook_info()
+        self.webhook_info = {
+            "url": info.url,
+            "pending_update_count": info.pending_update_count,
+            "last_error_message": info.last_error_message,
+            "last_error_date": _iso(info.last_error_date),
+            "checked_at": _iso(_utcnow()),
+        }
+
+    async def refresh(self, bot, mode: str) -> None:
+        """Принудительно обновить данные из Telegram"""
+        await self.refresh_identity(bot)
+        if mode == "webhook":
+            await self.refresh_webhook_info(bot)
+
+    def watch_polling(self, task: asyncio.Task) -> None:
+        """Отметить запуск polling и его остановку по завершении задачи"""
+        self.polling_started_at = _utcnow()
+        self.polling_stopped = None
+
+        def _done(done: asyncio.Task) -> None:
+            error = None if done.cancelled() else done.exception()
+            self.polling_stopped = f"polling остановлен: {error}" if error else "polling остановлен"
+
+        task.add_done_callback(_done)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Статус для /bot/status"""
+        if self.polling_stopped:
+            state = "error"
+        elif self.identity is None:
+            state = "error"
+        elif self.consecutive_api_errors >= DEGRADED_AFTER_ERRORS:
+            state = "degraded"
+        else:
+            state = "running"
+
+        return {
+            "status": state,
+            "bot": self.identity,
+            "identity_checked_at": _iso(self.identity_checked_at),
+            "identity_error": self.identity_error,
+            "polling": {
+                "started_at": _iso(self.polling_started_at),
+                "last_poll_at": _iso(self.last_poll_at),
+                "error": self.polling_stopped,
+            } if self.polling_started_at else None,
+            "updates": {
+                "total": self.updates_total,
+                "in_progress": self.updates_in_progress,
+                "errors": self.update_errors,
+                "last_update_at": _iso(self.last_update_at),
+            },
+            "api": {
+                "calls": self.api_calls,
+                "errors": self.api_errors,
+                "consecutive_errors": self.consecutive_api_errors,
+                "last_ok_at": _iso(self.last_api_ok_at),
+                "last_error": self.last_api_error,
+                "last_error_at": _iso(self.last_api_error_at),
+                "chat_errors": self.chat_errors,
+                "last_chat_error": self.last_chat_error,
+            },
+            "webhook": self.webhook_info,
+        }
+
+
+class UpdateTrackingMiddleware(BaseMiddleware):
+    """Внешний middleware обновлений: счетчики, обновления в работе, ошибки"""
+
+    def __init__(self, status: BotStatus):
+        self.status = status
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        status = self.status
+        status.updates_total += 1
+        status.updates_in_progress += 1
+        status.last_update_at = _utcnow()
+        try:
+            return await handler(event, data)
+        except Exception:
+            status.update_errors += 1
+            raise
+        finally:
+            status.updates_in_progress -= 1
+
+
+class ApiCallTrackingMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: успешные и неудачные вызовы Bot API"""
+
+    def __init__(self, status: BotStatus):
+        self.status = status
+
+    async def __call__(self, make_request, bot, method):
+        status = self.status
+        status.api_calls += 1
+        try:
+            response = await make_request(bot, method)
+        except HEALTH_ERRORS as e:
+            status.api_errors += 1
+            status.consecutive_api_errors += 1
+            status.last_api_error = f"{method.__api_method__}: {e}"
+            status.last_api_error_at = _utcnow()
+            raise
+        except Exception as e:
+            # Telegram ответил — API доступен, ошибка относится к запросу или чату
+            status.chat_errors += 1
+            status.last_chat_error = f"{method.__api_method__}: {e}"
+            status.consecutive_api_errors = 0
+            raise
+
+        status.consecutive_api_errors = 0
+        status.last_api_ok_at = _utcnow()
+        if method.__api_method__ == "getUpdates":
+            status.last_poll_at = status.last_api_ok_at
+        return response
@@ -0,0 +1,111 @@
+"""
+Режим webhook для Telegram бота
+
+Telegram присылает обновления POST-запросами на TELEGRAM_WEBHOOK_URL,
+любой воркер uvicorn передает их в общий Dispatcher — в отличие от
+polling, где каждый процесс держит собственный getUpdates.
+
+Регистрирует webhook только процесс-лидер: тот, кто первым взял
+сессионный advisory lock. Блокировка держится на отдельном соединении
+до остановки процесса (это одно соединение пула у лидера), поэтому
+воркеры, стартующие позже, регистрацию не повторяют. Лидер при каждом
+запуске перезаписывает адрес, секрет и allowed_updates, чтобы смена
+секрета или новых типов обновлений сразу доходила до Telegram. Если
+лидер упал, соединение закрывается и блокировку возьмет следующий
+запущенный процесс. Подлинность запроса проверяется по заголовку
+X-Telegram-Bot-Api-Secret-Token.
+"""
+import hashlib
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.bot.bot import MusicMeBot
+from app.core.config import settings
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Ключ advisory lock лидера, регистрирующего webhook
+WEBHOOK_LOCK_KEY = 720_302
+
+# Соединение, на котором лидер держит блокировку до остановки процесса
+_leader_connection: Optional[AsyncConnection] = None
+
+
+def webhook_secret() -> str:
+    """Секрет webhook; без явной настройки выводится из токена бота"""
+    if settings.TELEGRAM_WEBHOOK_SECRET:
+        return settings.TELEGRAM_WEBHOOK_SECRET
+    return hashlib.sha256(f"webhook:{settings.TELEGRAM_BOT_TOKEN}".encode()).hexdigest()
+
+
+async def _acquire_leadership() -> bool:
+    """Взять сессионный advisory lock; при успехе соединение остается открытым"""
+    global _leader_connection
+    if _leader_connection is not None:
+        return True
+
+    connection = await engine.connect()
+    try:
+        result = await connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": WEBHOOK_LOCK_KEY})
+        locked = bool(result.scalar())
+        # Сессионная блокировка переживает транзакцию, соединение не висит в idle in transaction
+        await connection.commit()
+    except Exception:
+        await connection.close()
+        raise
+
+    if not locked:
+        await connection.close()
+        return False
+
+    _leader_connection = connection
+    return True
+
+
+async def release_leadership() -> None:
+    """Снять блокировку лидера при остановке процесса"""
+    global _leader_connection
+    if _leader_connection is None:
+        return
+
+    connection, _leader_connection = _leader_connection, None
+    try:
+        # Соединение вернется в пул — блокировку нужно снять явно
+        await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": WEBHOOK_LOCK_KEY})
+        await connection.commit()
+    except Exception as e:
+        logger.warning(f"Не удалось снять блокировку webhook: {e}")
+    finally:
+        await connection.close()
+
+
+async def register_webhook(bot: MusicMeBot) -> bool:
+    """
+    Зарегистрировать webhook в Telegram (только лидер).
+    Возвращает True, если регистрацию выполнил этот процесс.
+    """
+    if not settings.TELEGRAM_WEBHOOK_URL:
+        logger.error("TELEGRAM_BOT_MODE=webhook, но TELEGRAM_WEBHOOK_URL не задан")
+        return False
+
+    if not await _acquire_leadership():
+        logger.info("Webhook регистрирует процесс-лидер")
+        return False
+
+    # getWebhookInfo не возвращает секрет, а allowed_updates меняются вместе
+    # с обработчиками — поэтому лидер перезаписывает регистрацию при запуске
+    await bot.bot.set_webhook(
+        url=settings.TELEGRAM_WEBHOOK_URL,
+        secret_token=webhook_secret(),
+        allowed_updates=bot.dp.resolve_used_update_types(),
+        drop_pending_updates=False
+    )
+
+    logger.info(f"Webhook зарегистрирован: {settings.TELEGRAM_WEBHOOK_URL}")
+    return True
@@ -0,0 +1,212 @@
+"""
+Отдача аудио файлов с поддержкой Range и условных запросов
+
+Файлы в uploads/ имеют UUID-имена и никогда не перезаписываются,
+поэтому их можно кешировать в браузере "навсегда" и отдавать
+частями (206 Partial Content) при перемотке в плеере.
+
+При FILE_DELIVERY_X_ACCEL эндпоинт только проверяет доступ и
+возвращает заголовок X-Accel-Redirect, а файл (вместе с Range и
+ETag) отдает nginx из internal location.
+"""
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.core.config import settings
+from app.core.file_storage import file_storage
+
+# Блок чтения файла при отдаче
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Файлы неизменяемые: кешируем на год
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class RangeNotSatisfiable(Exception):
+    """Заголовок Range некорректен или выходит за пределы файла"""
+
+
+def make_etag(file_hash: Optional[str], stat_result: os.stat_result) -> str:
+    """
+    Сильный ETag: из сохраненного sha256 файла, а для старых записей
+    без хеша — из размера и времени изменения (файлы не перезаписываются)
+    """
+    if file_hash:
+        return f'"{file_hash}"'
+    return f'"{stat_result.st_size:x}-{int(stat_result.st_mtime):x}"'
+
+
+def parse_range(range_header: str, file_size: int) -> Tuple[int, int]:
+    """
+    Разобрать `Range: bytes=...` и вернуть (start, end) включительно.
+    Поддерживается только один диапазон.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not ranges:
+        raise RangeNotSatisfiable("Поддерживаются только диапазоны в байтах")
+    if "," in ranges:
+        raise RangeNotSatisfiable("Несколько диапазонов не поддерживаются")
+
+    start_str, sep, end_str = ranges.strip().partition("-")
+    if not sep:
+        raise RangeNotSatisfiable("Некорректный диапазон")
+
+    try:
+        if not start_str:
+            # bytes=-N: последние N байт
+            suffix_length = int(end_str)
+            if suffix_length <= 0:
+                raise RangeNotSatisfiable("Пустой диапазон")
+            start = max(file_size - suffix_length, 0)
+            end = file_size - 1
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+    except ValueError:
+        raise RangeNotSatisfiable("Некорректный диапазон")
+
+    end = min(end, file_size - 1)
+    if start < 0 or start > end or start >= file_size:
+        raise RangeNotSatisfiable("Диапазон за пределами файла")
+
+    return start, end
+
+
+def _etag_matches(header_value: str, etag: str) -> bool:
+    """Слабое сравнение для If-None-Match (список тегов или *)"""
+    if header_value.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header_value.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Проверить If-None-Match / If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match имеет приоритет над If-Modified-Since
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+
+    return False
+
+
+def _range_allowed(request: Request, etag: str) -> bool:
+    """If-Range: частичный ответ только если ETag не изменился"""
+    if_range = request.headers.get("if-range")
+    return if_range is None or if_range.strip() == etag
+
+
+def _x_accel_response(file_path: str, media_type: str, filename: str) -> Response:
+    """Пустой ответ с внутренним редиректом nginx на файл из uploads/"""
+    relative_path = os.path.relpath(file_path, file_storage.base_upload_dir)
+    if relative_path.startswith(".."):
+        raise ValueError(f"Файл вне каталога загрузок: {file_path}")
+
+    prefix = settings.FILE_DELIVERY_X_ACCEL_PREFIX.rstrip("/")
+    return Response(
+        media_type=media_type,
+        headers={
+            "X-Accel-Redirect": f"{prefix}/{quote(relative_path.replace(os.sep, '/'))}",
+            "Content-Disposition": _content_disposition(filename),
+        },
+    )
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+async def _iter_file(file_path: str, start: int, length: int) -> AsyncIterator[bytes]:
+    """Прочитать length байт начиная с start блоками"""
+    async with await anyio.open_file(file_path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def audio_file_response(
+    request: Request,
+    file_path: str,
+    media_type: str,
+    filename: str,
+    file_hash: Optional[str] = None,
+) -> Response:
+    """
+    Ответ с аудио файлом: 200, 206 для Range, 304 для условных запросов
+    и 416 для некорректных или множественных диапазонов
+    """
+    if settings.FILE_DELIVERY_X_ACCEL:
+        return _x_accel_response(file_path, media_type, filename)
+
+    stat_result = os.stat(file_path)
+    file_size = stat_result.st_size
+    etag = make_etag(file_hash, stat_result)
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = _content_disposition(filename)
+
+    range_header = request.headers.get("range")
+    if range_header and _range_allowed(request, etag):
+        try:
+            start, end = parse_range(range_header, file_size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{file_size}"},
+            )
+
+        length = end - start + 1
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(length)
+        return StreamingResponse(
+            _iter_file(file_path, start, length),
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
+        )
+
+    headers["Content-Length"] = str(file_size)
+    return StreamingResponse(
+        _iter_file(file_path, 0, file_size),
+        status_code=200,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def cover_file_response(file_path: str, filename: str, media_type: str = "image/jpeg") -> Response:
+    """Ответ с обложкой: через nginx или FileResponse в dev"""
+    if settings.FILE_DELIVERY_X_ACCEL:
+        return _x_accel_response(file_path, media_type, filename)
+    return FileResponse(file_path, media_type=media_type, filename=filename)
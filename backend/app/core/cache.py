@@ -0,0 +1,185 @@
+"""
+Простой кеш в памяти процесса с TTL
+
+Используется для редко меняющихся справочников (тарифы, темы, жанры),
+для результата статистики админки, для пользователей в авторизации
+и для уже проверенных JWT.
+Каждый воркер uvicorn держит свою копию, поэтому явная инвалидация
+действует только в текущем процессе, а остальные догоняют по TTL.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class TTLCache:
+    """Словарь ключ -> значение со временем жизни записей"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Вернуть значение или None, если записи нет или она устарела"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Вернуть значение из кеша или загрузить его.
+        Одновременные промахи по одному ключу ждут одну загрузку.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        # Блокировка живет, пока по ключу есть ожидающие: ключи вроде кода
+        # тарифа приходят из запроса, и несуществующие не должны копиться
+        lock, waiters = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, waiters + 1)
+        try:
+            async with lock:
+                value = self.get(key)
+                if value is not None:
+                    self.hits += 1
+                    return value
+
+                self.misses += 1
+                value = await loader()
+                if value is not None:
+                    self.set(key, value)
+                return value
+        finally:
+            lock, waiters = self._locks[key]
+            if waiters <= 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, waiters - 1)
+
+    def invalidate(self, prefix: str = "") -> None:
+        """Удалить записи, ключ которых начинается с prefix (по умолчанию все)"""
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+
+class LRUCache:
+    """Ограниченный по размеру кеш с TTL: при переполнении вытесняются давно не читанные записи"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Записать значение; ttl_seconds переопределяет TTL для этой записи"""
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class StaleWhileRevalidateCache:
+    """
+    Кеш результатов дорогих вычислений.
+
+    Свежее значение (моложе ttl) отдается сразу. Устаревшее, но не старше
+    stale_ttl, тоже отдается сразу, а пересчет запускается в фоне.
+    Одновременные запросы по одному ключу ждут одно вычисление.
+    """
+
+    def __init__(self, ttl_seconds: float, stale_ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+        """Вернуть (значение, возраст в секундах)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            computed_at, value = entry
+            age = time.monotonic() - computed_at
+            if age < self.ttl_seconds:
+                return value, age
+            if age < self.stale_ttl_seconds:
+                self._refresh(key, loader)
+                return value, age
+
+        value = await asyncio.shield(self._refresh(key, loader))
+        return value, 0.0
+
+    def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Запустить вычисление, если по ключу оно еще не идет"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            # Ошибку фонового пересчета забираем здесь, ожидающие получат ее из await
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self._entries[key] = (time.monotonic(), value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+
+
+# Глобальный кеш справочников
+reference_cache = TTLCache(ttl_seconds=settings.REFERENCE_CACHE_TTL_SECONDS)
+
+# Пользователи для get_current_user (снимки колонок, не ORM-объекты)
+user_cache = LRUCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
+
+# Проверенные payload JWT по sha256 токена
+token_cache = LRUCache(
+    max_size=settings.JWT_VERIFY_CACHE_SIZE,
+    ttl_seconds=settings.JWT_VERIFY_CACHE_TTL_SECONDS
+)
+
+# Кеш статистики дашборда админки
+stats_cache = StaleWhileRevalidateCache(
+    ttl_seconds=settings.STATS_CACHE_TTL_SECONDS,
+    stale_ttl_seconds=settings.STATS_CACHE_STALE_SECONDS
+)
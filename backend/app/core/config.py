@@ -7,6 +7,8 @@ class Settings(BaseSettings):
     YANDEX_CLIENT_ID: str = "not-set"
     YANDEX_CLIENT_SECRET: str = "not-set"
     YANDEX_REDIRECT_URL: str = "https://musicme.ru/api/v1/auth/yandex/callback"
+    YANDEX_OAUTH_URL: str = "https://oauth.yandex.ru"  # переопределяется для нагрузочных тестов
+    YANDEX_LOGIN_URL: str = "https://login.yandex.ru"
 
     # Google OAuth
     GOOGLE_CLIENT_ID: str = "not-set"
@@ -17,7 +19,11 @@ class Settings(BaseSettings):
     TELEGRAM_BOT_TOKEN: str = Field(default="")
     TELEGRAM_BOT_USERNAME: str = Field(default="musicme_ru_bot")
     TELEGRAM_BOT_NAME: str = Field(default="MusicMe Bot")
-    TELEGRAM_BOT_MODE: str = Field(default="background")  # background, standalone
+    TELEGRAM_BOT_MODE: str = Field(default="background")  # background (polling, для разработки), webhook, standalone
+    TELEGRAM_WEBHOOK_URL: str = Field(default="")  # https://musicme.ru/api/v1/telegram/webhook
+    TELEGRAM_WEBHOOK_SECRET: str = Field(default="")  # пусто — выводится из токена бота
+    TELEGRAM_API_URL: str = Field(default="https://api.telegram.org")  # Bot API (или заглушка)
+    TELEGRAM_ADMIN_CHAT_ID: str = Field(default="")  # чат для уведомлений администратора
     c: Optional[int] = Field(default=None)
 
     # JWT
@@ -30,6 +36,92 @@ class Settings(BaseSettings):
     
     # Debug mode
     DEBUG: bool = False
+
+    # Пул соединений с БД (общий для API, бота и фоновых задач)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0  # ожидание свободного соединения
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 256  # кеш подготовленных выражений asyncpg на соединение
+
+    # Обработка аудио (превью через sox)
+    PREVIEW_DURATION_SECONDS: int = 60
+    PREVIEW_TIMEOUT_SECONDS: int = 30
+    PREVIEW_MAX_CONCURRENCY: int = 2
+
+    # Фоновая очередь обработки треков
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: int = 10
+    JOB_STALE_AFTER_SECONDS: int = 600  # running дольше этого считается зависшей
+
+    # Дневная сводка для статистики админки
+    STATS_ROLLUP_INTERVAL_SECONDS: int = 60
+    STATS_ROLLUP_FULL_REBUILD_HOURS: int = 24  # полная перестройка учитывает удаленные заказы
+
+    # Кеш результата /admin/stats
+    STATS_CACHE_TTL_SECONDS: int = 30
+    STATS_CACHE_STALE_SECONDS: int = 300  # до этого возраста отдаем старое и пересчитываем в фоне
+
+    # Кеш пользователей в авторизации
+    USER_CACHE_TTL_SECONDS: int = 60  # роли, измененные напрямую в БД, подхватятся за это время
+    USER_CACHE_MAX_SIZE: int = 1024
+    # Брать роли из подписанного токена без обращения к БД (при промахе кеша)
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
+    # Кеш проверенных JWT (запись живет не дольше exp токена)
+    JWT_VERIFY_CACHE_SIZE: int = 4096
+    JWT_VERIFY_CACHE_TTL_SECONDS: int = 300
+
+    # Логирование
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # уровни по модулям: "app.crud=DEBUG,aiogram=WARNING"
+    LOG_FORMAT: str = "text"  # text или json
+
+    # Отладка SQL: заголовки X-DB-* и предупреждения о повторяющихся запросах (N+1)
+    SQL_QUERY_DEBUG: bool = False
+    SQL_REPEAT_WARN_THRESHOLD: int = 3  # столько одинаковых запросов за HTTP-запрос считается N+1
+
+    # Проверка здоровья (/health)
+    HEALTH_CACHE_TTL_SECONDS: float = 5.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_MIN_FREE_DISK_MB: int = 500
+
+    # Уведомления в Telegram через outbox (лимиты — на один процесс uvicorn)
+    NOTIFY_POLL_INTERVAL_SECONDS: float = 2.0
+    NOTIFY_BATCH_SIZE: int = 50
+    NOTIFY_RATE_PER_SECOND: float = 25.0  # Bot API допускает ~30 сообщений в секунду на бота
+    NOTIFY_CHAT_INTERVAL_SECONDS: float = 1.0  # не чаще одного сообщения в секунду в один чат
+    NOTIFY_MAX_ATTEMPTS: int = 5
+    NOTIFY_RETRY_BASE_SECONDS: int = 5
+    NOTIFY_STALE_AFTER_SECONDS: int = 300  # sending дольше этого возвращается в очередь
+
+    # Фоновые задачи после ответа (ограниченная очередь в памяти процесса)
+    BACKGROUND_WORKERS: int = 4
+    BACKGROUND_QUEUE_SIZE: int = 1000  # сверх этого задачи отклоняются
+    BACKGROUND_TASK_TIMEOUT_SECONDS: float = 30.0
+    BACKGROUND_DRAIN_TIMEOUT_SECONDS: float = 10.0  # доработка очереди при остановке
+
+    # Исходящие HTTP-запросы (OAuth-провайдеры, Telegram): общий пул соединений
+    HTTP_CLIENT_HTTP2: bool = True  # если установлен пакет h2
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    HTTP_CLIENT_MAX_PER_HOST: int = 20  # одновременных запросов к одному хосту
+    HTTP_CLIENT_CONNECT_RETRIES: int = 2  # повторы установки соединения (любой метод)
+    HTTP_CLIENT_RETRIES: int = 2  # повторы GET при таймауте и 502/503/504
+    HTTP_CLIENT_RETRY_BACKOFF_SECONDS: float = 0.2
+
+    # Кеш справочников (тарифы, темы, жанры)
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+
+    # Отдача файлов: в проде байты отдает nginx через X-Accel-Redirect
+    FILE_DELIVERY_X_ACCEL: bool = False
+    FILE_DELIVERY_X_ACCEL_PREFIX: str = "/protected-uploads/"  # internal location в nginx
     
     class Config:
         env_file = ".env"
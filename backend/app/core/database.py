@@ -1,17 +1,84 @@
 """
 Настройка подключения к базе данных
 """
+import time
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который считает время ожидания свободного соединения и таймауты"""
+
+    checkouts = 0
+    wait_seconds_total = 0.0
+    wait_seconds_max = 0.0
+    timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            TimedQueuePool.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            TimedQueuePool.checkouts += 1
+            TimedQueuePool.wait_seconds_total += waited
+            TimedQueuePool.wait_seconds_max = max(TimedQueuePool.wait_seconds_max, waited)
+
+
+def _engine_options() -> dict:
+    """Параметры пула и asyncpg (только для PostgreSQL)"""
+    if not settings.DATABASE_URL.startswith("postgresql"):
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    }
+
 
 # Создание асинхронного движка
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     future=True,
+    **_engine_options(),
 )
+instrument_engine(engine)
+
+
+def get_pool_stats() -> dict:
+    """Состояние пула соединений: занятые, переполнение, ожидание при выдаче"""
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return {"pool": type(pool).__name__}
+
+    checkouts = TimedQueuePool.checkouts
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts_total": checkouts,
+        "checkout_timeouts_total": TimedQueuePool.timeouts,
+        "checkout_wait_avg_ms": round(TimedQueuePool.wait_seconds_total / checkouts * 1000, 3) if checkouts else 0.0,
+        "checkout_wait_max_ms": round(TimedQueuePool.wait_seconds_max * 1000, 3),
+    }
 
 # Создание фабрики сессий
 AsyncSessionLocal = async_sessionmaker(
@@ -28,6 +95,18 @@ async_session = AsyncSessionLocal
 # Базовый класс для моделей
 Base = declarative_base()
 
+# Новые колонки и индексы в уже существующих таблицах: create_all их не добавляет,
+# поэтому докатываем идемпотентными ALTER TABLE при старте
+ADDITIVE_MIGRATIONS = [
+    "ALTER TABLE tracks ADD COLUMN IF NOT EXISTS processing_status VARCHAR NOT NULL DEFAULT 'ready'",
+    "ALTER TABLE tracks ADD COLUMN IF NOT EXISTS audio_hash VARCHAR(64)",
+    "ALTER TABLE example_tracks ADD COLUMN IF NOT EXISTS audio_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_created_at_id ON orders (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_status_created_at_id ON orders (status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_producer_created_at_id ON orders (producer_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_tracks_created_at_id ON tracks (created_at, id)",
+]
+
 
 async def get_db() -> AsyncSession:
     """
@@ -50,12 +129,16 @@ async def init_db():
     В production рекомендуется использовать Alembic миграции вместо create_all
     """
     # Импортируем все модели для регистрации в Base.metadata
-    from app.models import user, order, track, example_track, theme, genre
+    from app.models import user, order, track, example_track, theme, genre, processing_job, daily_order_stats, notification_outbox
     
     async with engine.begin() as conn:
         # Создаем таблицы (только для разработки)
         # В production используйте: alembic upgrade head
         await conn.run_sync(Base.metadata.create_all)
+        
+        if conn.dialect.name == "postgresql":
+            for statement in ADDITIVE_MIGRATIONS:
+                await conn.execute(text(statement))
 
 
 # Экспортируем всё необходимое для использования в других модулях
@@ -65,5 +148,6 @@ __all__ = [
     "async_session",  # Алиас для обратной совместимости
     "Base",
     "get_db", 
+    "get_pool_stats",
     "init_db"
 ]
\ No newline at end of file
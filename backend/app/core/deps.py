@@ -1,6 +1,7 @@
 """
 Зависимости FastAPI (получение текущего пользователя и т.п.)
 """
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 from fastapi import Depends, Header, HTTPException, status
@@ -10,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.cache import user_cache
 from app.core.security import verify_token  # ваша существующая функция
 from app.crud.user import crud_user
 from app.models.user import User
@@ -51,7 +53,19 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await crud_user.get_by_id(db, UUID(user_id))
+    try:
+        user_uuid = UUID(user_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный формат токена",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and "is_admin" in payload:
+        user = _user_from_claims(user_uuid, payload)
+    else:
+        user = await crud_user.get_cached(db, user_uuid)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -62,6 +76,30 @@ async def get_current_user(
     return user
 
 
+def _user_from_claims(user_id: UUID, payload: dict) -> User:
+    """
+    Пользователь из подписанных claims токена (create_token_from_user).
+    Если пользователь уже в кеше, берем актуальный снимок из кеша.
+    Профильные поля, которых нет в токене, остаются пустыми.
+    """
+    snapshot = user_cache.get(str(user_id))
+    if snapshot is None:
+        created_at = payload.get("created_at")
+        snapshot = {
+            "id": user_id,
+            "email": payload.get("email"),
+            "name": payload.get("name"),
+            "avatar_url": None,
+            "created_at": datetime.fromisoformat(created_at) if created_at else None,
+            "telegram_id": None,
+            "telegram_username": None,
+            "is_admin": bool(payload.get("is_admin")),
+            "is_producer": bool(payload.get("is_producer")),
+            "registration_source": "oauth",
+        }
+    return crud_user.from_snapshot(snapshot)
+
+
 async def get_current_admin(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -1,16 +1,25 @@
 import os
 import uuid
-import shutil
+import hashlib
+import logging
 from fastapi import UploadFile, HTTPException
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 from mutagen import File
 from mutagen.id3 import ID3
 import tempfile
 from fastapi.responses import Response
 
+logger = logging.getLogger(__name__)
+
+# Размер блока при потоковой записи загружаемых файлов (1 МБ)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
 class FileStorage:
-    def __init__(self, base_upload_dir: str = "uploads"):
+    def __init__(self, base_upload_dir: str = "uploads", chunk_size: int = UPLOAD_CHUNK_SIZE):
         self.base_upload_dir = base_upload_dir
+        self.chunk_size = chunk_size
         self.audio_dir = os.path.join(base_upload_dir, "audio")
         self.examples_dir = os.path.join(base_upload_dir, "examples")
         self.covers_dir = os.path.join(base_upload_dir, "covers")
@@ -23,7 +32,7 @@ class FileStorage:
     async def save_audio_file(self, file: UploadFile, subdirectory: str = "audio") -> dict:
         """Сохранить аудио файл и вернуть метаданные"""
         # Проверяем тип файла
-        if not file.content_type.startswith('audio/'):
+        if not file.content_type or not file.content_type.startswith('audio/'):
             raise HTTPException(status_code=400, detail="Файл должен быть аудио")
         
         # Определяем директорию для сохранения
@@ -37,17 +46,62 @@ class FileStorage:
         filename = f"{uuid.uuid4()}{file_extension}"
         file_path = os.path.join(save_dir, filename)
         
-        # Сохраняем файл
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Сохраняем файл потоково, не блокируя event loop
+        size, sha256 = await self.stream_to_file(file, file_path)
         
         return {
             "filename": filename,
             "original_name": file.filename,
             "file_path": file_path,
-            "size": os.path.getsize(file_path),
+            "size": size,
+            "sha256": sha256,
             "mimetype": file.content_type
         }
+
+    async def stream_to_file(self, file: UploadFile, file_path: str) -> tuple:
+        """
+        Потоково записать загруженный файл на диск блоками по chunk_size.
+        Запись и хеширование выполняются в пуле потоков, файл целиком
+        в память не читается. Возвращает (размер в байтах, sha256).
+        """
+        await file.seek(0)
+        hasher = hashlib.sha256()
+        size = 0
+        
+        buffer = await run_in_threadpool(open, file_path, "wb")
+        try:
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                await run_in_threadpool(self._write_chunk, buffer, hasher, chunk)
+        except BaseException:
+            # Не оставляем на диске недописанный файл
+            await run_in_threadpool(buffer.close)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        await run_in_threadpool(buffer.close)
+        
+        return size, hasher.hexdigest()
+
+    @staticmethod
+    def _write_chunk(buffer, hasher, chunk: bytes) -> None:
+        """Записать блок и обновить хеш (выполняется в пуле потоков)"""
+        hasher.update(chunk)
+        buffer.write(chunk)
+
+    async def compute_file_hash(self, file_path: str) -> str:
+        """Посчитать sha256 файла на диске (блоками, в пуле потоков)"""
+        def _hash() -> str:
+            hasher = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                    hasher.update(chunk)
+            return hasher.hexdigest()
+        
+        return await run_in_threadpool(_hash)
     
     def get_file_path(self, filename: str, subdirectory: str = "audio") -> Optional[str]:
         """Получить путь к файлу"""
@@ -65,13 +119,13 @@ class FileStorage:
             file_path = self.get_file_path(filename, subdirectory)
             if file_path and os.path.exists(file_path):
                 os.remove(file_path)
-                print(f"File deleted successfully: {file_path}")
+                logger.info("File deleted successfully: %s", file_path)
                 return True
             else:
-                print(f"File not found: {filename} in {subdirectory}")
+                logger.debug("File not found: %s in %s", filename, subdirectory)
                 return False
         except Exception as e:
-            print(f"Error deleting file {filename}: {e}")
+            logger.error("Error deleting file %s: %s", filename, e)
             return False
 
     def extract_cover_from_mp3(self, audio_filename: str, subdirectory: str = "audio") -> Optional[str]:
@@ -120,7 +174,7 @@ class FileStorage:
             return cover_filename
             
         except Exception as e:
-            print(f"Error extracting cover from {audio_filename}: {e}")
+            logger.error("Error extracting cover from %s: %s", audio_filename, e)
             return None
     
     def get_cover_path(self, cover_filename: str) -> Optional[str]:
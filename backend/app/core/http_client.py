@@ -0,0 +1,128 @@
+"""
+Общий HTTP-клиент для исходящих запросов (OAuth-провайдеры, Telegram)
+
+Один httpx.AsyncClient на процесс: соединения и TLS-сессии переиспользуются
+между логинами, а не устанавливаются заново на каждый запрос. HTTP/2
+включается, если установлен пакет h2. Ограничения: общий пул
+соединений, не больше HTTP_CLIENT_MAX_PER_HOST одновременных запросов
+к одному хосту, таймауты на соединение и на весь запрос.
+
+Повторы: ошибки установки соединения повторяет транспорт (запрос еще
+не отправлен, это безопасно для любого метода). GET дополнительно
+повторяется при таймауте и ответах 502/503/504. POST не повторяется:
+код авторизации OAuth одноразовый, повтор обмена гарантированно упадет.
+
+Задержка и статусы ответов пишутся в метрики по имени провайдера.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Методы, которые можно повторить после отправки запроса
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {502, 503, 504}
+
+
+class OutboundHttpClient:
+    """Пул соединений к внешним сервисам с лимитами, повторами и метриками"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _build(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=limits,
+            retries=settings.HTTP_CLIENT_CONNECT_RETRIES,
+        )
+        logger.info(f"HTTP-клиент для внешних сервисов создан (HTTP/2: {http2})")
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(
+                settings.HTTP_CLIENT_TIMEOUT_SECONDS,
+                connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS,
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Создается лениво, чтобы работать и вне lifespan (скрипты, бенчмарки)
+        if self._client is None or self._client.is_closed:
+            self._client = self._build()
+        return self._client
+
+    async def start(self) -> None:
+        """Создать клиент при старте приложения"""
+        self.client
+
+    async def stop(self) -> None:
+        """Закрыть соединения при остановке приложения"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).host
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(settings.HTTP_CLIENT_MAX_PER_HOST)
+        return slot
+
+    async def request(self, provider: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Выполнить запрос; provider — метка для метрик (yandex, google, telegram)
+        """
+        method = method.upper()
+        attempts = 1 + (settings.HTTP_CLIENT_RETRIES if method in IDEMPOTENT_METHODS else 0)
+        slot = self._host_slot(url)
+
+        for attempt in range(1, attempts + 1):
+            started = time.perf_counter()
+            try:
+                async with slot:
+                    response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                metrics.outbound_request(provider, "error", time.perf_counter() - started)
+                if attempt < attempts and isinstance(e, (httpx.TimeoutException, httpx.NetworkError)):
+                    logger.warning(f"{provider}: {method} {httpx.URL(url).path} — {e!r}, повтор {attempt}")
+                    await asyncio.sleep(settings.HTTP_CLIENT_RETRY_BACKOFF_SECONDS * attempt)
+                    continue
+                raise
+
+            metrics.outbound_request(provider, str(response.status_code), time.perf_counter() - started)
+            if response.status_code in RETRY_STATUSES and attempt < attempts:
+                logger.warning(f"{provider}: {method} {httpx.URL(url).path} — {response.status_code}, повтор {attempt}")
+                await asyncio.sleep(settings.HTTP_CLIENT_RETRY_BACKOFF_SECONDS * attempt)
+                continue
+            return response
+
+    async def get(self, provider: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(provider, "GET", url, **kwargs)
+
+    async def post(self, provider: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(provider, "POST", url, **kwargs)
+
+
+# Глобальный экземпляр клиента
+http_client = OutboundHttpClient()
@@ -0,0 +1,288 @@
+"""
+Метрики приложения в текстовом формате Prometheus (/metrics)
+
+Middleware считает запросы, задержку (гистограмма) и запросы в работе
+по шаблону маршрута (например, /api/v1/orders/{order_id}), а также
+число и время SQL-запросов, выполненных в рамках HTTP-запроса.
+SQL-запросы считаются через события движка SQLAlchemy; контекст запроса
+передается через contextvars. Исходящие запросы к внешним сервисам
+учитывает app.core.http_client.
+
+Метрики хранятся в памяти процесса: каждый воркер uvicorn отдает свои.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Границы корзин гистограммы задержки, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Метка для запросов, не попавших ни в один маршрут (чтобы не плодить серии)
+UNMATCHED_ROUTE = "<unmatched>"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class RequestDbStats:
+    """
+    SQL-запросы одного HTTP-запроса (или блока db_stats_scope).
+    statements (если включен) считает повторы каждого текста SQL.
+    """
+    queries: int = 0
+    seconds: float = 0.0
+    statements: Optional[Dict[str, int]] = None
+    parent: Optional["RequestDbStats"] = None
+
+
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+@contextmanager
+def db_stats_scope(track_statements: bool = False) -> Iterator[RequestDbStats]:
+    """
+    Считать SQL-запросы внутри блока. Вложенные блоки учитываются
+    и во внешних, поэтому метрики запроса не теряются.
+    """
+    stats = RequestDbStats(
+        statements={} if track_statements else None,
+        parent=_request_db_stats.get()
+    )
+    token = _request_db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_db_stats.reset(token)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Счетчики HTTP и SQL, сгруппированные по маршруту"""
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+        self.db_queries: Dict[Tuple[str, str], int] = {}
+        self.db_seconds: Dict[Tuple[str, str], float] = {}
+        # Все SQL-запросы процесса, включая фоновые задачи и бота
+        self.db_queries_total = 0
+        self.db_seconds_total = 0.0
+        # Исходящие HTTP-запросы к внешним сервисам (OAuth, Telegram)
+        self.outbound_requests: Dict[Tuple[str, str], int] = {}
+        self.outbound_latency: Dict[str, Histogram] = {}
+
+    def request_started(self, key: Tuple[str, str]) -> None:
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def request_finished(self, key: Tuple[str, str], status: int, duration: float, db: RequestDbStats) -> None:
+        self.in_flight[key] -= 1
+        status_key = (*key, str(status))
+        self.requests[status_key] = self.requests.get(status_key, 0) + 1
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(duration)
+        self.db_queries[key] = self.db_queries.get(key, 0) + db.queries
+        self.db_seconds[key] = self.db_seconds.get(key, 0.0) + db.seconds
+
+    def outbound_request(self, provider: str, outcome: str, duration: float) -> None:
+        """outcome — HTTP-статус ответа или error при сетевой ошибке"""
+        key = (provider, outcome)
+        self.outbound_requests[key] = self.outbound_requests.get(key, 0) + 1
+        histogram = self.outbound_latency.get(provider)
+        if histogram is None:
+            histogram = self.outbound_latency[provider] = Histogram()
+        histogram.observe(duration)
+
+    def query_executed(self, statement: str, duration: float) -> None:
+        self.db_queries_total += 1
+        self.db_seconds_total += duration
+        stats = _request_db_stats.get()
+        while stats is not None:
+            stats.queries += 1
+            stats.seconds += duration
+            if stats.statements is not None:
+                stats.statements[statement] = stats.statements.get(statement, 0) + 1
+            stats = stats.parent
+
+    def render(self, pool_stats: Optional[dict] = None, background_stats: Optional[dict] = None) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        header("http_requests_total", "counter", "HTTP requests by route template and status")
+        for (method, route, status), value in sorted(self.requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {value}")
+
+        header("http_request_duration_seconds", "histogram", "HTTP request latency by route template")
+        for (method, route), histogram in sorted(self.latency.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                labels = _labels(method=method, route=route, le=_format_float(bound))
+                lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+            labels = _labels(method=method, route=route, le="+Inf")
+            lines.append(f"http_request_duration_seconds_bucket{labels} {histogram.count}")
+            labels = _labels(method=method, route=route)
+            lines.append(f"http_request_duration_seconds_sum{labels} {_format_float(histogram.sum)}")
+            lines.append(f"http_request_duration_seconds_count{labels} {histogram.count}")
+
+        header("http_requests_in_flight", "gauge", "HTTP requests currently being processed")
+        for (method, route), value in sorted(self.in_flight.items()):
+            lines.append(f"http_requests_in_flight{_labels(method=method, route=route)} {value}")
+
+        header("http_request_db_queries_total", "counter", "SQL queries executed while serving requests")
+        for (method, route), value in sorted(self.db_queries.items()):
+            lines.append(f"http_request_db_queries_total{_labels(method=method, route=route)} {value}")
+
+        header("http_request_db_seconds_total", "counter", "Time spent in SQL queries while serving requests")
+        for (method, route), value in sorted(self.db_seconds.items()):
+            lines.append(f"http_request_db_seconds_total{_labels(method=method, route=route)} {_format_float(value)}")
+
+        header("db_queries_total", "counter", "All SQL queries executed by the process")
+        lines.append(f"db_queries_total {self.db_queries_total}")
+        header("db_query_seconds_total", "counter", "Time spent in all SQL queries")
+        lines.append(f"db_query_seconds_total {_format_float(self.db_seconds_total)}")
+
+        header("outbound_requests_total", "counter", "Outbound HTTP requests by provider and status")
+        for (provider, outcome), value in sorted(self.outbound_requests.items()):
+            lines.append(f"outbound_requests_total{_labels(provider=provider, status=outcome)} {value}")
+
+        header("outbound_request_duration_seconds", "histogram", "Outbound HTTP request latency by provider")
+        for provider, histogram in sorted(self.outbound_latency.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                labels = _labels(provider=provider, le=_format_float(bound))
+                lines.append(f"outbound_request_duration_seconds_bucket{labels} {cumulative}")
+            lines.append(f"outbound_request_duration_seconds_bucket{_labels(provider=provider, le='+Inf')} {histogram.count}")
+            lines.append(f"outbound_request_duration_seconds_sum{_labels(provider=provider)} {_format_float(histogram.sum)}")
+            lines.append(f"outbound_request_duration_seconds_count{_labels(provider=provider)} {histogram.count}")
+
+        if pool_stats and "size" in pool_stats:
+            for name, key, help_text in (
+                ("db_pool_size", "size", "Configured pool size"),
+                ("db_pool_checked_out", "checked_out", "Connections currently checked out"),
+                ("db_pool_overflow", "overflow", "Overflow connections currently open"),
+            ):
+                header(name, "gauge", help_text)
+                lines.append(f"{name} {pool_stats[key]}")
+            header("db_pool_checkouts_total", "counter", "Connection checkouts")
+            lines.append(f"db_pool_checkouts_total {pool_stats['checkouts_total']}")
+            header("db_pool_checkout_timeouts_total", "counter", "Checkouts that hit pool_timeout")
+            lines.append(f"db_pool_checkout_timeouts_total {pool_stats['checkout_timeouts_total']}")
+
+        if background_stats:
+            header("background_tasks_queued", "gauge", "Background tasks waiting in the bounded queue")
+            lines.append(f"background_tasks_queued {background_stats['queued']}")
+            header("background_tasks_running", "gauge", "Background tasks currently running")
+            lines.append(f"background_tasks_running {background_stats['running']}")
+            header("background_tasks_total", "counter", "Background tasks by outcome")
+            for outcome in ("submitted", "completed", "failed", "timed_out", "rejected"):
+                lines.append(f"background_tasks_total{_labels(outcome=outcome)} {background_stats[outcome]}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+def _route_template(scope: Scope) -> str:
+    """Шаблон пути маршрута, который обработает запрос"""
+    app = scope.get("app")
+    partial = None
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path_format", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(route, "path_format", None)
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI middleware, собирающее метрики HTTP-запросов"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["method"], _route_template(scope))
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.request_started(key)
+        started = time.perf_counter()
+        with db_stats_scope() as db_stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                metrics.request_finished(key, status_code, time.perf_counter() - started, db_stats)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подписаться на события движка для подсчета SQL-запросов"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        metrics.query_executed(statement, time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+# Глобальный реестр метрик
+metrics = MetricsRegistry()
@@ -0,0 +1,62 @@
+"""
+Курсорная (keyset) пагинация по (created_at, id)
+
+Следующая страница выбирается условием (created_at, id) < курсор,
+поэтому глубокие страницы стоят столько же, сколько первая.
+Курсор непрозрачен для клиента и возвращается в заголовке X-Next-Cursor,
+чтобы тело ответа оставалось списком.
+"""
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Разобрать курсор; некорректный курсор — ошибка 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации"
+        )
+
+
+def keyset_paginate(query: Select, model: Any, cursor: Optional[str], limit: int) -> Select:
+    """
+    Добавить к запросу сортировку (created_at, id) по убыванию, условие
+    курсора и LIMIT на одну запись больше — по ней определяется наличие
+    следующей страницы
+    """
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, item_id))
+
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(items: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Отрезать лишнюю запись и вернуть (страница, курсор следующей страницы)"""
+    page = list(items[:limit])
+    if len(items) <= limit or not page:
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(last.created_at, last.id)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,99 @@
+"""
+Отладка SQL по запросам: счетчик запросов и поиск N+1
+
+QueryDebugMiddleware (включается SQL_QUERY_DEBUG) добавляет к ответу
+заголовки с числом SQL-запросов и временем в БД, а одинаковые запросы,
+повторенные SQL_REPEAT_WARN_THRESHOLD и более раз, пишет в лог как
+вероятный N+1. Одинаковым считается текст SQL с плейсхолдерами, то есть
+один и тот же запрос с разными параметрами.
+
+query_budget позволяет ограничить число запросов в тестах и бенчмарках:
+
+    with query_budget(max_queries=3, max_repeats=1):
+        await crud_order.get(db, order_id)
+"""
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import RequestDbStats, db_stats_scope
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+REPEATED_QUERIES_HEADER = "X-DB-Repeated-Queries"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Блок выполнил больше SQL-запросов, чем разрешено"""
+
+
+def repeated_statements(stats: RequestDbStats, threshold: int) -> Dict[str, int]:
+    """Тексты SQL, выполненные не меньше threshold раз"""
+    return {
+        statement: count
+        for statement, count in (stats.statements or {}).items()
+        if count >= threshold
+    }
+
+
+@contextmanager
+def query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None) -> Iterator[RequestDbStats]:
+    """
+    Посчитать SQL-запросы блока и проверить лимиты на выходе:
+    max_queries — всего запросов, max_repeats — повторов одного запроса
+    """
+    with db_stats_scope(track_statements=True) as stats:
+        yield stats
+
+    if max_queries is not None and stats.queries > max_queries:
+        raise QueryBudgetExceeded(
+            f"Выполнено {stats.queries} SQL-запросов при лимите {max_queries}"
+        )
+    if max_repeats is not None:
+        repeated = repeated_statements(stats, max_repeats + 1)
+        if repeated:
+            statement, count = max(repeated.items(), key=lambda item: item[1])
+            raise QueryBudgetExceeded(
+                f"Запрос выполнен {count} раз при лимите {max_repeats}: {statement[:200]}"
+            )
+
+
+class QueryDebugMiddleware:
+    """ASGI middleware: заголовки X-DB-* и предупреждения о N+1"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with db_stats_scope(track_statements=True) as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers[QUERY_COUNT_HEADER] = str(stats.queries)
+                    headers[QUERY_TIME_HEADER] = f"{stats.seconds * 1000:.2f}"
+                    headers[REPEATED_QUERIES_HEADER] = str(
+                        len(repeated_statements(stats, settings.SQL_REPEAT_WARN_THRESHOLD))
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        path = f"{scope['method']} {scope['path']}"
+        logger.debug("%s: %s SQL-запросов, %.2f мс в БД", path, stats.queries, stats.seconds * 1000)
+        for statement, count in repeated_statements(stats, settings.SQL_REPEAT_WARN_THRESHOLD).items():
+            logger.warning(
+                "Возможный N+1 в %s: запрос выполнен %s раз: %s",
+                path, count, " ".join(statement.split())[:300],
+                extra={"sql_repeats": count}
+            )
@@ -1,11 +1,14 @@
 """
 Утилиты для работы с JWT и безопасностью
 """
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Any, Dict
 from jose import JWTError, jwt, ExpiredSignatureError
 
 from app.core.config import settings
+from app.core.cache import token_cache
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -23,7 +26,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[dict]:
+def decode_token(token: str) -> Optional[dict]:
+    """Полная проверка подписи и срока действия токена (без кеша)"""
     try:
         payload = jwt.decode(
             token, 
@@ -34,6 +38,30 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+
+def verify_token(token: str) -> Optional[dict]:
+    """
+    Проверить токен. Успешно проверенные payload кешируются по sha256
+    токена до истечения exp, поэтому повторные запросы с тем же токеном
+    не выполняют HMAC и разбор JSON. Невалидные токены не кешируются.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    payload = decode_token(token)
+    if payload is None:
+        return None
+
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = exp - time.time()
+        if ttl <= 0:
+            return None
+        token_cache.set(key, payload, ttl_seconds=ttl)
+    return dict(payload)
+
 def create_user_access_token(user_id: str, **extra_data) -> str:
     """
     Создать access token для пользователя
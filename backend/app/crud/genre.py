@@ -4,8 +4,13 @@ CRUD операции для жанров
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
+from pydantic import TypeAdapter
 
+from app.core.cache import reference_cache
 from app.models.genre import Genre as GenreModel
+from app.schemas.genre import Genre
+
+GENRE_LIST_ADAPTER = TypeAdapter(List[Genre])
 
 class CRUDGenre:
     async def get_all(self, db: AsyncSession) -> List[GenreModel]:
@@ -17,4 +22,14 @@ class CRUDGenre:
         )
         return result.scalars().all()
 
+    async def get_all_json(self, db: AsyncSession) -> bytes:
+        """Готовый JSON списка активных жанров (из кеша)"""
+        async def load() -> bytes:
+            return GENRE_LIST_ADAPTER.dump_json(await self.get_all(db))
+
+        return await reference_cache.get_or_load("genres:active", load)
+
+    def invalidate_cache(self) -> None:
+        reference_cache.invalidate("genres:")
+
 crud_genre = CRUDGenre()
\ No newline at end of file
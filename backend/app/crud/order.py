@@ -1,21 +1,90 @@
 """
 CRUD операции для заказов
 """
+import logging
+
+from fastapi import HTTPException, status as http_status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload, noload, aliased
+from sqlalchemy import and_, or_, func
 from uuid import UUID
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 
+from app.core.pagination import keyset_paginate, split_page
 from app.models.order import Order as OrderModel, OrderStatus
+from app.models.track import Track as TrackModel
+from app.models.user import User as UserModel
+from app.models.theme import Theme as ThemeModel
+from app.models.genre import Genre as GenreModel
 from app.schemas.order import OrderCreate, OrderUpdate
 from app.crud.tariff import crud_tariff
 from app.models.tariff_plan import TariffPlan
 
+logger = logging.getLogger(__name__)
+
+
+# Колонки заказа для списков (схема OrderListItem)
+ORDER_LIST_COLUMNS = [
+    OrderModel.id, OrderModel.user_id, OrderModel.theme_id, OrderModel.genre_id,
+    OrderModel.producer_id, OrderModel.recipient_name, OrderModel.occasion,
+    OrderModel.details, OrderModel.preferences, OrderModel.tariff_plan,
+    OrderModel.status, OrderModel.price, OrderModel.deadline_at,
+    OrderModel.rounds_remaining, OrderModel.interview_link,
+    OrderModel.created_at, OrderModel.updated_at,
+]
+
 
 class CRUDOrder:
+    def _list_query(self, with_user: bool = False):
+        """
+        Проекция для списков заказов: колонки заказа, названия темы/жанра/продюсера
+        и число треков подзапросом — без загрузки ORM-объектов и треков
+        """
+        producer = aliased(UserModel)
+        tracks_count = (
+            select(func.count(TrackModel.id))
+            .where(TrackModel.order_id == OrderModel.id)
+            .correlate(OrderModel)
+            .scalar_subquery()
+        )
+        columns = [
+            *ORDER_LIST_COLUMNS,
+            ThemeModel.name.label("theme_name"),
+            GenreModel.name.label("genre_name"),
+            producer.name.label("producer_name"),
+            tracks_count.label("tracks_count"),
+        ]
+        if with_user:
+            columns += [UserModel.email.label("user_email"), UserModel.name.label("user_name")]
+
+        query = (
+            select(*columns)
+            .outerjoin(ThemeModel, ThemeModel.id == OrderModel.theme_id)
+            .outerjoin(GenreModel, GenreModel.id == OrderModel.genre_id)
+            .outerjoin(producer, producer.id == OrderModel.producer_id)
+        )
+        if with_user:
+            query = query.outerjoin(UserModel, UserModel.id == OrderModel.user_id)
+        return query
+
+    @staticmethod
+    def _list_item(row: Any) -> Dict[str, Any]:
+        """Строка проекции -> словарь под OrderListItem / AdminOrderListItem"""
+        item = {column.key: row._mapping[column.key] for column in ORDER_LIST_COLUMNS}
+        mapping = row._mapping
+        item["theme"] = {"id": item["theme_id"], "name": mapping["theme_name"]}
+        item["genre"] = {"id": item["genre_id"], "name": mapping["genre_name"]}
+        item["producer"] = (
+            {"id": item["producer_id"], "name": mapping["producer_name"]}
+            if item["producer_id"] else None
+        )
+        item["tracks_count"] = mapping["tracks_count"] or 0
+        if "user_email" in mapping:
+            item["user"] = {"id": item["user_id"], "email": mapping["user_email"], "name": mapping["user_name"]}
+        return item
+
     async def get(self, db: AsyncSession, order_id: UUID) -> Optional[OrderModel]:
         """Получить заказ по ID"""
         result = await db.execute(
@@ -27,13 +96,17 @@ class CRUDOrder:
         self, 
         db: AsyncSession, 
         order_data: dict,
-        user_id: UUID
+        user_id: UUID,
+        commit: bool = True
     ) -> OrderModel:
-        """Создать новый заказ с автоматической настройкой тарифа"""
+        """
+        Создать новый заказ с автоматической настройкой тарифа.
+        commit=False только добавляет заказ в транзакцию (flush), коммит — за вызывающим
+        """
         try:
             order_dict = order_data
             
-            print(f"📦 Order dict received: {order_dict}")
+            logger.debug("Order dict received: %s", order_dict)
             
             # ⬇️ ЗАМЕНЯЕМ старые импорты на работу с БД
             tariff_plan = None
@@ -48,14 +121,13 @@ class CRUDOrder:
             
             # 3. Если все еще нет - используем basic
             tariff_plan = tariff_plan or 'basic'
-            print(f"🎯 Final tariff decision: {tariff_plan}")
+            logger.debug("Final tariff decision: %s", tariff_plan)
             
             # Получаем тариф из БД
-            tariff = await crud_tariff.get_by_code(db, tariff_plan)
+            tariff = await crud_tariff.get_by_code_cached(db, tariff_plan)
             if not tariff:
-                from fastapi import HTTPException, status
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
+                    status_code=http_status.HTTP_400_BAD_REQUEST,
                     detail=f"Тариф '{tariff_plan}' не найден"
                 )
             
@@ -70,20 +142,22 @@ class CRUDOrder:
             # Валидация для продвинутых тарифов
             if tariff.has_questionnaire:
                 if not order_dict.get('preferences') or not order_dict['preferences'].get('questionnaire'):
-                    from fastapi import HTTPException, status
                     raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
+                        status_code=http_status.HTTP_400_BAD_REQUEST,
                         detail=f"Для тарифа '{tariff_plan}' требуется заполнить анкету"
                     )
             
             # Устанавливаем user_id
             order_dict['user_id'] = user_id
                 
-            print(f"🎯 Final order data: {order_dict}")
-            print(f"💰 Tariff: {tariff_plan}, Price: {tariff.price}, Rounds: {tariff.rounds}, Deadline: {deadline_days} days")
+            logger.debug("Final order data: %s", order_dict)
+            logger.debug("Tariff: %s, Price: %s, Rounds: %s, Deadline: %s days", tariff_plan, tariff.price, tariff.rounds, deadline_days)
                 
             order = OrderModel(**order_dict)
             db.add(order)
+            if not commit:
+                await db.flush()
+                return order
             await db.commit()
             await db.refresh(order)
             return order
@@ -91,46 +165,55 @@ class CRUDOrder:
         except HTTPException:
             raise
         except Exception as e:
-            print(f"❌ Error in CRUD order create: {e}")
-            import traceback
-            print(f"❌ Traceback: {traceback.format_exc()}")
+            logger.exception("Error in CRUD order create: %s", e)
             raise
 
     async def get_by_user(self, db: AsyncSession, user_id: UUID) -> List[OrderModel]:
-        """Получить заказы пользователя"""
+        """Получить заказы пользователя (ORM-объекты без треков)"""
         result = await db.execute(
             select(OrderModel)
             .where(OrderModel.user_id == user_id)
             .options(
                 selectinload(OrderModel.theme), 
                 selectinload(OrderModel.genre),
-                selectinload(OrderModel.tracks)
+                noload(OrderModel.tracks)
             )
             .order_by(OrderModel.created_at.desc())
         )
         return result.scalars().all()
 
+    async def get_list_by_user(self, db: AsyncSession, user_id: UUID) -> List[Dict[str, Any]]:
+        """Список заказов пользователя (проекция для GET /orders)"""
+        result = await db.execute(
+            self._list_query()
+            .where(OrderModel.user_id == user_id)
+            .order_by(OrderModel.created_at.desc(), OrderModel.id.desc())
+        )
+        return [self._list_item(row) for row in result.all()]
+
     async def get_by_producer(
         self, 
         db: AsyncSession, 
         producer_id: UUID, 
-        status: Optional[str] = None
-    ) -> List[OrderModel]:
-        """Получить заказы по продюсеру"""
-        print(f"🔍 CRUD: Getting orders for producer {producer_id}, status: {status}")
+        status: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Получить страницу заказов продюсера (проекция) и курсор следующей страницы"""
+        logger.debug("CRUD: Getting orders for producer %s, status: %s", producer_id, status)
         
-        query = select(OrderModel).where(OrderModel.producer_id == producer_id)
+        query = self._list_query().where(OrderModel.producer_id == producer_id)
         
         if status:
             query = query.where(OrderModel.status == status)
         
-        query = query.order_by(OrderModel.created_at.desc())
+        query = keyset_paginate(query, OrderModel, cursor, limit)
          
         result = await db.execute(query)
-        orders = result.scalars().all()
+        rows, next_cursor = split_page(result.all(), limit)
         
-        print(f"🔍 CRUD: Found {len(orders)} orders for producer {producer_id}")
-        return orders
+        logger.debug("CRUD: Found %s orders for producer %s", len(rows), producer_id)
+        return [self._list_item(row) for row in rows], next_cursor
 
     async def get_by_id(self, db: AsyncSession, order_id: UUID) -> Optional[OrderModel]:
         """Получить заказ по ID с треками"""
@@ -152,14 +235,10 @@ class CRUDOrder:
         status_filter: Optional[str] = None,
         tariff_filter: Optional[str] = None,
         limit: int = 50,
-        offset: int = 0
-    ) -> List[OrderModel]:
-        """Получить все заказы (для админки) с фильтрацией"""
-        query = select(OrderModel).options(
-            selectinload(OrderModel.theme), 
-            selectinload(OrderModel.genre),
-            selectinload(OrderModel.user)
-        )
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Получить страницу заказов (для админки, проекция) с фильтрацией и курсор следующей страницы"""
+        query = self._list_query(with_user=True)
         
         # Применяем фильтры
         filters = []
@@ -171,10 +250,11 @@ class CRUDOrder:
         if filters:
             query = query.where(and_(*filters))
             
-        query = query.order_by(OrderModel.created_at.desc()).limit(limit).offset(offset)
+        query = keyset_paginate(query, OrderModel, cursor, limit)
         
         result = await db.execute(query)
-        return result.scalars().all()
+        rows, next_cursor = split_page(result.all(), limit)
+        return [self._list_item(row) for row in rows], next_cursor
 
     async def update(
         self, 
@@ -251,7 +331,8 @@ class CRUDOrder:
             .options(
                 selectinload(OrderModel.user),
                 selectinload(OrderModel.theme),
-                selectinload(OrderModel.genre)
+                selectinload(OrderModel.genre),
+                noload(OrderModel.tracks)
             )
         )
         return result.scalars().all()
@@ -1,221 +1,243 @@
 """
 CRUD операции для статистики
+
+Метрики по заказам читаются из дневной сводки daily_order_stats
+(см. stats_rollup_service), а текущий день досчитывается тем же
+группирующим запросом по таблице orders. Запросы выполняются
+параллельно в отдельных сессиях, поэтому время ответа не зависит
+от числа заказов.
 """
+import asyncio
+from collections import defaultdict
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text, and_
-from sqlalchemy.orm import selectinload
-from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Tuple
-import math
+from sqlalchemy import select, func, cast, Date
+from datetime import date, datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
 
+from app.core.database import AsyncSessionLocal
+from app.models.daily_order_stats import DailyOrderStats
 from app.models.order import Order as OrderModel
 from app.models.user import User as UserModel
-from app.models.track import Track as TrackModel
 from app.models.theme import Theme as ThemeModel
 from app.models.genre import Genre as GenreModel
 
+# Периоды дашборда
+PERIOD_DAYS = {"week": 7, "month": 30, "quarter": 90}
 
-class CRUDStats:
-    async def get_core_metrics(self, db: AsyncSession, days: int = 30) -> Dict:
-        """Основные бизнес-метрики"""
-        # Общее количество заказов
-        total_orders_result = await db.execute(select(func.count(OrderModel.id)))
-        total_orders = total_orders_result.scalar() or 0
-
-        # Выручка (только оплаченные заказы)
-        revenue_result = await db.execute(
-            select(func.sum(TrackModel.audio_size)).where(TrackModel.is_paid == True)
-        )
-        # Временная логика: считаем что каждый трек = 9900 рублей
-        paid_tracks_count = revenue_result.scalar() or 0
-        total_revenue = paid_tracks_count * 9900  # TODO: заменить на реальную логику цен
+# Статусы оплаченных заказов
+PAID_STATUSES = ("paid", "completed")
 
-        # Средний чек
-        average_order_value = total_revenue / total_orders if total_orders > 0 else 0
+# Колонки сводки в порядке live_rollup_query
+ROLLUP_COLUMNS = [
+    "day", "status", "tariff_plan", "theme_id", "genre_id",
+    "orders_count", "revenue", "completion_seconds",
+]
 
-        # Конверсия (оплаченные заказы / все заказы)
-        paid_orders_result = await db.execute(
-            select(func.count(OrderModel.id)).where(OrderModel.status.in_(['paid', 'completed']))
-        )
-        paid_orders = paid_orders_result.scalar() or 0
-        conversion_rate = paid_orders / total_orders if total_orders > 0 else 0
 
-        # Активные пользователи (с заказами)
-        active_users_result = await db.execute(
-            select(func.count(func.distinct(OrderModel.user_id)))
-        )
-        active_users = active_users_result.scalar() or 0
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
-        return {
-            "total_orders": total_orders,
-            "total_revenue": total_revenue,
-            "average_order_value": average_order_value,
-            "conversion_rate": conversion_rate,
-            "active_users": active_users
-        }
 
-    async def get_order_stats(self, db: AsyncSession, days: int = 30) -> Dict:
-        """Статистика по заказам"""
-        # Заказы по статусам
-        status_count_result = await db.execute(
-            select(OrderModel.status, func.count(OrderModel.id))
-            .group_by(OrderModel.status)
-        )
-        orders_by_status = dict(status_count_result.all())
-
-        # Временная шкала заказов (последние 7 дней)
-        end_date = datetime.now(timezone.utc)
-        start_date = end_date - timedelta(days=7)
-        
-        timeline = []
-        current_date = start_date.replace(tzinfo=timezone.utc)
-        end_date = end_date.replace(tzinfo=timezone.utc)
-        
-        while current_date <= end_date:
-            next_date = current_date + timedelta(days=1)
-            day_orders_result = await db.execute(
-                select(func.count(OrderModel.id))
-                .where(and_(
-                    OrderModel.created_at >= current_date,
-                    OrderModel.created_at < next_date
-                ))
-            )
-            day_count = day_orders_result.scalar() or 0
-            day_revenue = day_count * 9900
-            
-            timeline.append({
-                "date": current_date.strftime("%Y-%m-%d"),
-                "count": day_count,
-                "revenue": day_revenue
-            })
-            current_date = next_date
-
-        average_completion_time = 48
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
 
-        return {
-            "orders_by_status": orders_by_status,
-            "orders_timeline": timeline,
-            "average_completion_time": average_completion_time
-        }
 
-    async def get_financial_stats(self, db: AsyncSession, days: int = 30) -> Dict:
-        """Финансовая статистика"""
-        now = datetime.now(timezone.utc)
-        
-        # Выручка по периодам
-        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
-        day_orders_result = await db.execute(
-            select(func.count(OrderModel.id))
-            .where(OrderModel.created_at >= day_start)
+class CRUDStats:
+    def live_rollup_query(self, day_from: date, day_to: date):
+        """Строки сводки, посчитанные напрямую по orders за дни [day_from, day_to]"""
+        day = cast(OrderModel.created_at, Date)
+        return (
+            select(
+                day,
+                OrderModel.status,
+                OrderModel.tariff_plan,
+                OrderModel.theme_id,
+                OrderModel.genre_id,
+                func.count(),
+                func.coalesce(func.sum(OrderModel.price), 0),
+                func.coalesce(
+                    func.sum(func.extract("epoch", OrderModel.updated_at - OrderModel.created_at)), 0
+                ),
+            )
+            .where(
+                OrderModel.created_at >= _day_start(day_from),
+                OrderModel.created_at < _day_start(day_to + timedelta(days=1)),
+            )
+            .group_by(day, OrderModel.status, OrderModel.tariff_plan, OrderModel.theme_id, OrderModel.genre_id)
         )
-        day_orders = day_orders_result.scalar() or 0
-        daily_revenue = day_orders * 9900
 
-        week_start = now - timedelta(days=7)
-        week_orders_result = await db.execute(
-            select(func.count(OrderModel.id))
-            .where(OrderModel.created_at >= week_start)
+    async def _fetch(self, query) -> List[Any]:
+        """Выполнить запрос в отдельной сессии (для параллельных запросов)"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(query)
+            return result.all()
+
+    async def _rollup_rows(self, day_from: date, today: date) -> List[Any]:
+        """Строки сводки за [day_from, today]: прошлые дни из таблицы, сегодня — вживую"""
+        stored_query = (
+            select(*[getattr(DailyOrderStats, column) for column in ROLLUP_COLUMNS])
+            .where(DailyOrderStats.day >= day_from, DailyOrderStats.day < today)
         )
-        week_orders = week_orders_result.scalar() or 0
-        weekly_revenue = week_orders * 9900
-
-        month_start = now - timedelta(days=30)
-        month_orders_result = await db.execute(
-            select(func.count(OrderModel.id))
-            .where(OrderModel.created_at >= month_start)
+        stored, live = await asyncio.gather(
+            self._fetch(stored_query),
+            self._fetch(self.live_rollup_query(today, today)),
         )
-        month_orders = month_orders_result.scalar() or 0
-        monthly_revenue = month_orders * 9900
+        return stored + live
 
-        revenue_growth = 0.15
+    def _user_totals_query(self, day_from: date, day_to: date):
+        """Активные и новые пользователи за период и доля постоянных клиентов"""
+        period_start = _day_start(day_from)
+        period_end = _day_start(day_to + timedelta(days=1))
 
-        # Самые прибыльные темы
-        themes_revenue_result = await db.execute(
-            select(
-                ThemeModel.name,
-                func.count(OrderModel.id).label('count')
-            )
-            .join(OrderModel, OrderModel.theme_id == ThemeModel.id)
-            .group_by(ThemeModel.name)
-            .order_by(func.count(OrderModel.id).desc())
-            .limit(5)
+        orders_per_user = (
+            select(func.count(OrderModel.id).label("orders_count"))
+            .group_by(OrderModel.user_id)
+            .subquery()
         )
-        most_profitable_themes = [
-            {"theme": row[0], "count": row[1], "revenue": row[1] * 9900}
-            for row in themes_revenue_result.all()
-        ]
-
-        # Самые популярные жанры
-        genres_popularity_result = await db.execute(
-            select(
-                GenreModel.name,
-                func.count(OrderModel.id).label('count')
-            )
-            .join(OrderModel, OrderModel.genre_id == GenreModel.id)
-            .group_by(GenreModel.name)
-            .order_by(func.count(OrderModel.id).desc())
-            .limit(5)
+        active_users = (
+            select(func.count(func.distinct(OrderModel.user_id)))
+            .where(OrderModel.created_at >= period_start, OrderModel.created_at < period_end)
+            .scalar_subquery()
         )
-        most_popular_genres = [
-            {"genre": row[0], "count": row[1]}
-            for row in genres_popularity_result.all()
-        ]
-
-        return {
-            "revenue_by_period": {
-                "daily": daily_revenue,
-                "weekly": weekly_revenue,
-                "monthly": monthly_revenue
-            },
-            "revenue_growth": revenue_growth,
-            "most_profitable_themes": most_profitable_themes,
-            "most_popular_genres": most_popular_genres
-        }
-        
-    async def get_user_stats(self, db: AsyncSession, days: int = 30) -> Dict:
-        """Статистика по пользователям"""
-        # Новые пользователи за период
-        period_start = datetime.now(timezone.utc) - timedelta(days=days)
-        new_users_result = await db.execute(
+        new_users = (
             select(func.count(UserModel.id))
-            .where(UserModel.created_at >= period_start)
+            .where(UserModel.created_at >= period_start, UserModel.created_at < period_end)
+            .scalar_subquery()
         )
-        new_users_period = new_users_result.scalar() or 0
-
-        # Постоянные клиенты (пользователи с >1 заказом)
-        returning_users_result = await db.execute(
-            select(func.count(UserModel.id)).select_from(
-                select(UserModel.id)
-                .join(OrderModel)
-                .group_by(UserModel.id)
-                .having(func.count(OrderModel.id) > 1)
-                .subquery()
-            )
-        )
-        returning_users = returning_users_result.scalar() or 0
-
-        # Всего пользователей с заказами
-        total_users_with_orders_result = await db.execute(
-            select(func.count(func.distinct(OrderModel.user_id)))
+        return select(
+            active_users.label("active_users"),
+            new_users.label("new_users"),
+            func.count().filter(orders_per_user.c.orders_count > 1).label("returning_users"),
+            func.count().label("users_with_orders"),
+        ).select_from(orders_per_user)
+
+    @staticmethod
+    def _top(totals: Dict[Any, Dict], names: Dict[Any, str], key: str, limit: int = 5) -> List[Dict]:
+        """Первые limit записей по key с подставленными названиями"""
+        ranked = sorted(totals.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+        return [(names.get(item_id, "—"), values) for item_id, values in ranked]
+
+    async def get_all_stats(
+        self,
+        db: AsyncSession,
+        period: str = "month",
+        days: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Dict:
+        """
+        Получить всю статистику за период: week/month/quarter,
+        явное число дней или произвольный диапазон дат (включительно)
+        """
+        today = _utcnow().date()
+        day_to = min(date_to or today, today)
+        if date_from:
+            day_from = min(date_from, day_to)
+        else:
+            day_from = day_to - timedelta(days=(days or PERIOD_DAYS.get(period, 30)) - 1)
+        period_days = (day_to - day_from).days + 1
+        prev_from = day_from - timedelta(days=period_days)
+
+        # revenue_by_period всегда считается за последние 30 дней
+        fetch_from = min(prev_from, today - timedelta(days=29))
+
+        rows, user_rows, theme_rows, genre_rows = await asyncio.gather(
+            self._rollup_rows(fetch_from, today),
+            self._fetch(self._user_totals_query(day_from, day_to)),
+            self._fetch(select(ThemeModel.id, ThemeModel.name)),
+            self._fetch(select(GenreModel.id, GenreModel.name)),
         )
-        total_users_with_orders = total_users_with_orders_result.scalar() or 0
 
-        returning_customers = returning_users / total_users_with_orders if total_users_with_orders > 0 else 0
+        total_orders = paid_orders = total_revenue = previous_revenue = 0
+        completed_orders = 0
+        completion_seconds = 0.0
+        orders_by_status: Dict[str, int] = defaultdict(int)
+        orders_by_tariff: Dict[str, int] = defaultdict(int)
+        timeline = {
+            day_from + timedelta(days=n): {"count": 0, "revenue": 0}
+            for n in range(period_days)
+        }
+        themes: Dict[Any, Dict] = defaultdict(lambda: {"count": 0, "revenue": 0})
+        genres: Dict[Any, Dict] = defaultdict(lambda: {"count": 0})
+        revenue_by_period = {"daily": 0, "weekly": 0, "monthly": 0}
+
+        for day, status, tariff_plan, theme_id, genre_id, count, revenue, seconds in rows:
+            is_paid = status in PAID_STATUSES
+            paid_revenue = int(revenue) if is_paid else 0
+
+            if day == today:
+                revenue_by_period["daily"] += paid_revenue
+            if day > today - timedelta(days=7):
+                revenue_by_period["weekly"] += paid_revenue
+            if day > today - timedelta(days=30):
+                revenue_by_period["monthly"] += paid_revenue
+
+            if prev_from <= day < day_from:
+                previous_revenue += paid_revenue
+                continue
+            if not day_from <= day <= day_to:
+                continue
+
+            total_orders += count
+            orders_by_status[status] += count
+            orders_by_tariff[tariff_plan] += count
+            timeline[day]["count"] += count
+            timeline[day]["revenue"] += paid_revenue
+            themes[theme_id]["count"] += count
+            themes[theme_id]["revenue"] += paid_revenue
+            genres[genre_id]["count"] += count
+            if is_paid:
+                paid_orders += count
+                total_revenue += paid_revenue
+            if status == "completed":
+                completed_orders += count
+                completion_seconds += float(seconds)
+
+        users = user_rows[0]
+        users_with_orders = users.users_with_orders or 0
+
+        core_metrics = {
+            "total_orders": total_orders,
+            "total_revenue": total_revenue,
+            "average_order_value": total_revenue / paid_orders if paid_orders > 0 else 0,
+            "conversion_rate": paid_orders / total_orders if total_orders > 0 else 0,
+            "active_users": users.active_users or 0
+        }
 
-        return {
-            "new_users_period": new_users_period,
-            "returning_customers": returning_customers
+        order_stats = {
+            "orders_by_status": dict(orders_by_status),
+            "orders_by_tariff": dict(orders_by_tariff),
+            "orders_timeline": [
+                {"date": day.strftime("%Y-%m-%d"), **values}
+                for day, values in timeline.items()
+            ],
+            "average_completion_time": (
+                completion_seconds / completed_orders / 3600 if completed_orders > 0 else 0
+            )
         }
 
-    async def get_all_stats(self, db: AsyncSession, period: str = "month") -> Dict:
-        """Получить всю статистику"""
-        days_map = {"week": 7, "month": 30, "quarter": 90}
-        days = days_map.get(period, 30)
+        financial_stats = {
+            "revenue_by_period": revenue_by_period,
+            # Рост выручки относительно предыдущего такого же периода
+            "revenue_growth": (
+                (total_revenue - previous_revenue) / previous_revenue if previous_revenue > 0 else 0
+            ),
+            "most_profitable_themes": [
+                {"theme": name, **values}
+                for name, values in self._top(themes, dict(theme_rows), "revenue")
+            ],
+            "most_popular_genres": [
+                {"genre": name, **values}
+                for name, values in self._top(genres, dict(genre_rows), "count")
+            ]
+        }
 
-        core_metrics = await self.get_core_metrics(db, days)
-        order_stats = await self.get_order_stats(db, days)
-        financial_stats = await self.get_financial_stats(db, days)
-        user_stats = await self.get_user_stats(db, days)
+        user_stats = {
+            "new_users_period": users.new_users or 0,
+            "returning_customers": (
+                (users.returning_users or 0) / users_with_orders if users_with_orders > 0 else 0
+            )
+        }
 
         return {
             "core_metrics": core_metrics,
@@ -227,4 +249,4 @@ class CRUDStats:
         }
 
 
-crud_stats = CRUDStats()
\ No newline at end of file
+crud_stats = CRUDStats()
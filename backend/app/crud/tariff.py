@@ -3,8 +3,10 @@ from sqlalchemy import select
 from uuid import UUID
 from typing import List, Optional
 
+from app.core.cache import reference_cache
 from app.models.tariff import Tariff
-from app.schemas.tariff import TariffCreate, TariffUpdate
+from app.schemas.tariff import TariffCreate, TariffUpdate, TariffListResponse
+from app.schemas.tariff import Tariff as TariffSchema
 
 class CRUDTariff:
     async def get(self, db: AsyncSession, id: UUID) -> Optional[Tariff]:
@@ -23,6 +25,26 @@ class CRUDTariff:
         )
         return result.scalars().all()
 
+    async def get_active_json(self, db: AsyncSession) -> bytes:
+        """Готовый JSON списка активных тарифов (из кеша)"""
+        async def load() -> bytes:
+            tariffs = await self.get_active(db)
+            return TariffListResponse(tariffs=tariffs).model_dump_json().encode()
+
+        return await reference_cache.get_or_load("tariffs:active", load)
+
+    async def get_by_code_cached(self, db: AsyncSession, code: str) -> Optional[TariffSchema]:
+        """Тариф по коду из кеша (снимок, не привязанный к сессии)"""
+        async def load() -> Optional[TariffSchema]:
+            tariff = await self.get_by_code(db, code)
+            return TariffSchema.model_validate(tariff) if tariff else None
+
+        return await reference_cache.get_or_load(f"tariffs:code:{code}", load)
+
+    def invalidate_cache(self) -> None:
+        """Сбросить кеш тарифов после изменений"""
+        reference_cache.invalidate("tariffs:")
+
     async def get_all(self, db: AsyncSession) -> List[Tariff]:
         result = await db.execute(select(Tariff).order_by(Tariff.sort_order))
         return result.scalars().all()
@@ -32,6 +54,7 @@ class CRUDTariff:
         db.add(tariff)
         await db.commit()
         await db.refresh(tariff)
+        self.invalidate_cache()
         return tariff
 
     async def update(
@@ -44,6 +67,7 @@ class CRUDTariff:
         db.add(db_tariff)
         await db.commit()
         await db.refresh(db_tariff)
+        self.invalidate_cache()
         return db_tariff
 
     async def delete(self, db: AsyncSession, id: UUID) -> bool:
@@ -52,6 +76,7 @@ class CRUDTariff:
         if tariff:
             await db.delete(tariff)
             await db.commit()
+            self.invalidate_cache()
             return True
         return False
 
@@ -4,8 +4,13 @@ CRUD операции для тем
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
+from pydantic import TypeAdapter
 
+from app.core.cache import reference_cache
 from app.models.theme import Theme as ThemeModel
+from app.schemas.theme import Theme
+
+THEME_LIST_ADAPTER = TypeAdapter(List[Theme])
 
 class CRUDTheme:
     async def get_all(self, db: AsyncSession) -> List[ThemeModel]:
@@ -17,4 +22,14 @@ class CRUDTheme:
         )
         return result.scalars().all()
 
+    async def get_all_json(self, db: AsyncSession) -> bytes:
+        """Готовый JSON списка активных тем (из кеша)"""
+        async def load() -> bytes:
+            return THEME_LIST_ADAPTER.dump_json(await self.get_all(db))
+
+        return await reference_cache.get_or_load("themes:active", load)
+
+    def invalidate_cache(self) -> None:
+        reference_cache.invalidate("themes:")
+
 crud_theme = CRUDTheme()
\ No newline at end of file
@@ -1,11 +1,13 @@
 """
 CRUD-утилиты для работы с пользователями
 """
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from uuid import UUID
 
+from app.core.cache import user_cache
 from app.models.user import User
 from app.schemas.telegram import TelegramAuth
 
@@ -16,6 +18,34 @@ class CRUDUser:
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_cached(self, db: AsyncSession, user_id: UUID) -> Optional[User]:
+        """
+        Пользователь из кеша (для авторизации). Каждый вызов получает
+        собственный detached-объект, общий между запросами только снимок колонок.
+        """
+        snapshot = user_cache.get(str(user_id))
+        if snapshot is None:
+            user = await self.get_by_id(db, user_id)
+            if user:
+                user_cache.set(str(user_id), self._snapshot(user))
+            return user
+        return self.from_snapshot(snapshot)
+
+    @staticmethod
+    def _snapshot(user: User) -> Dict[str, Any]:
+        return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+    @staticmethod
+    def from_snapshot(snapshot: Dict[str, Any]) -> User:
+        """Detached User из словаря колонок (без обращения к БД)"""
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def invalidate_cache(self, user_id: UUID) -> None:
+        """Сбросить пользователя в кеше после изменения"""
+        user_cache.invalidate(str(user_id))
+
     async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
         stmt = select(User).where(User.email == email)
         result = await db.execute(stmt)
@@ -42,6 +72,7 @@ class CRUDUser:
             if updated:
                 await db.commit()
                 await db.refresh(user)
+                self.invalidate_cache(user.id)
             return user
         # Создаем нового пользователя
         user = User(
@@ -86,6 +117,7 @@ class CRUDUser:
             user.avatar_url = telegram_data.photo_url
             await db.commit()
             await db.refresh(user)
+            self.invalidate_cache(user.id)
         return user
 
     # ⬇️ ПЕРЕМЕЩАЕМ МЕТОДЫ ВНУТРЬ КЛАССА
@@ -8,6 +8,9 @@ from app.models.genre import Genre
 from app.models.order import Order
 from app.models.track import Track
 from app.models.example_track import ExampleTrack
+from app.models.processing_job import ProcessingJob
+from app.models.daily_order_stats import DailyOrderStats
+from app.models.notification_outbox import NotificationOutbox
 
 # Экспортируем все модели
 __all__ = [
@@ -16,5 +19,8 @@ __all__ = [
     "Genre",
     "Order",
     "Track",
-    "ExampleTrack"
+    "ExampleTrack",
+    "ProcessingJob",
+    "DailyOrderStats",
+    "NotificationOutbox"
 ]
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""
+Модель дневной сводки по заказам (rollup для статистики админки)
+"""
+from sqlalchemy import Column, String, Date, DateTime, Integer, BigInteger, Float, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class DailyOrderStats(Base):
+    """
+    Заказы, созданные за день, в разрезе статуса, тарифа, темы и жанра.
+    Строки пересчитываются целиком за день (см. stats_rollup_service).
+    """
+    __tablename__ = "daily_order_stats"
+
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    tariff_plan = Column(String, primary_key=True)
+    theme_id = Column(UUID(as_uuid=True), primary_key=True)
+    genre_id = Column(UUID(as_uuid=True), primary_key=True)
+
+    orders_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(BigInteger, nullable=False, default=0)  # сумма Order.price
+    completion_seconds = Column(Float, nullable=False, default=0)  # сумма (updated_at - created_at)
+
+    refreshed_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -26,6 +26,7 @@ class ExampleTrack(Base):
     audio_filename = Column(String, nullable=True)
     audio_size = Column(Integer, nullable=True)
     audio_mimetype = Column(String, nullable=True)
+    audio_hash = Column(String(64), nullable=True)  # sha256 файла (для ETag)
     
     # Старые поля для обратной совместимости
     audio_url = Column(String, nullable=True)
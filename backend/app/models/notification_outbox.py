@@ -0,0 +1,60 @@
+"""
+Модель исходящего уведомления в Telegram (transactional outbox)
+"""
+import uuid
+from datetime import datetime, timezone
+from enum import Enum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, JSON, BigInteger, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class NotificationStatus(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    SKIPPED = "skipped"  # некому отправлять (нет telegram_id или admin chat)
+    FAILED = "failed"
+
+
+class NotificationKind(str, Enum):
+    ORDER_CREATED = "order_created"
+    ORDER_READY = "order_ready"                    # готова демо-версия
+    ORDER_STATUS_CHANGED = "order_status_changed"
+    PAYMENT_CONFIRMED = "payment_confirmed"
+    ADMIN_MESSAGE = "admin_message"                # готовый текст в payload["text"]
+
+
+class NotificationRecipient(str, Enum):
+    USER = "user"    # владелец заказа
+    ADMIN = "admin"  # TELEGRAM_ADMIN_CHAT_ID
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)
+    recipient = Column(String, nullable=False)
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), nullable=True, index=True)
+    chat_id = Column(BigInteger, nullable=True)  # явный чат вместо получателя по умолчанию
+    payload = Column(JSON, nullable=True)
+    status = Column(String, nullable=False, default=NotificationStatus.PENDING)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    run_after = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Выборка пачки: WHERE status = 'pending' AND run_after <= now()
+        Index("ix_notification_outbox_status_run_after", "status", "run_after"),
+    )
+
+    def __repr__(self):
+        return f"<NotificationOutbox(id={self.id}, kind={self.kind}, status={self.status})>"
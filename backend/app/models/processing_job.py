@@ -0,0 +1,53 @@
+"""
+Модель фоновой задачи обработки аудио (очередь в БД)
+"""
+import uuid
+from datetime import datetime, timezone
+from enum import Enum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobType(str, Enum):
+    TRIM_PREVIEW = "trim_preview"        # обрезка превью через SOX
+    FINALIZE_MASTER = "finalize_master"  # хеш, обложка для полной версии
+
+
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    track_id = Column(UUID(as_uuid=True), ForeignKey("tracks.id", ondelete="CASCADE"), nullable=False, index=True)
+    job_type = Column(String, nullable=False)
+    status = Column(String, nullable=False, default=JobStatus.PENDING)
+    payload = Column(JSON, nullable=True)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    run_after = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Связи
+    track = relationship("Track")
+
+    __table_args__ = (
+        # Выборка следующей задачи: WHERE status = 'pending' AND run_after <= now()
+        Index("ix_processing_jobs_status_run_after", "status", "run_after"),
+    )
+
+    def __repr__(self):
+        return f"<ProcessingJob(id={self.id}, type={self.job_type}, status={self.status})>"
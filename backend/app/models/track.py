@@ -3,7 +3,7 @@
 """
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, Enum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -11,6 +11,10 @@ from app.core.database import Base
 
 class Track(Base):
     __tablename__ = "tracks"
+    # Индекс под курсорную пагинацию (created_at, id)
+    __table_args__ = (
+        Index("ix_tracks_created_at_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False, index=True)
@@ -24,7 +28,10 @@ class Track(Base):
     audio_filename = Column(String, nullable=True)
     audio_size = Column(Integer, nullable=True)
     audio_mimetype = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
+    audio_hash = Column(String(64), nullable=True)  # sha256 файла (для ETag)
+    # Статус фоновой обработки файла: processing, ready, failed
+    processing_status = Column(String, default="ready", server_default="ready", nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
     
     # Связи
     order = relationship("Order", back_populates="tracks")
@@ -66,6 +66,52 @@ class AdminOrder(Order):
     class Config:
         from_attributes = True
 
+class NamedRef(BaseModel):
+    """Ссылка на связанную сущность: только id и название"""
+    id: UUID
+    name: Optional[str] = None
+
+
+class UserBrief(BaseModel):
+    id: UUID
+    email: str
+    name: Optional[str] = None
+
+
+class OrderListItem(BaseModel):
+    """
+    Заказ в списке: колонки заказа, названия темы/жанра/продюсера
+    и число треков (без загрузки связанных объектов)
+    """
+    id: UUID
+    user_id: UUID
+    theme_id: UUID
+    genre_id: UUID
+    producer_id: Optional[UUID] = None
+    recipient_name: str
+    occasion: Optional[str] = None
+    details: Optional[str] = None
+    preferences: Optional[Dict[str, Any]] = None
+    tariff_plan: str
+    status: str
+    price: int
+    deadline_at: datetime
+    rounds_remaining: int = 0
+    interview_link: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    theme: Optional[NamedRef] = None
+    genre: Optional[NamedRef] = None
+    producer: Optional[NamedRef] = None
+    tracks_count: int = 0
+
+
+class AdminOrderListItem(OrderListItem):
+    """Заказ в списке админки: плюс заказчик"""
+    user: Optional[UserBrief] = None
+
+
 class OrderWithUser(Order):
     """Схема заказа с информацией о пользователе"""
     user: Optional[User] = None
@@ -22,6 +22,7 @@ class TimelineItem(BaseModel):
 
 class OrderStats(BaseModel):
     orders_by_status: Dict[str, int]
+    orders_by_tariff: Dict[str, int] = {}
     orders_timeline: List[TimelineItem]
     average_completion_time: float
 
@@ -62,5 +63,6 @@ class StatsResponse(BaseModel):
     user_stats: UserStats
     period: str
     generated_at: datetime
+    cache_age_seconds: float = 0
 
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -49,6 +49,7 @@ class Track(TrackBase):
     audio_filename: Optional[str] = None
     audio_size: Optional[int] = None
     audio_mimetype: Optional[str] = None
+    processing_status: str = "ready"
 
     class Config:
         from_attributes = True
@@ -0,0 +1,117 @@
+"""
+Сервис обработки аудио (создание превью через SOX)
+"""
+import asyncio
+import logging
+import os
+import uuid
+from typing import Optional
+
+from app.core.config import settings
+from app.core.file_storage import file_storage
+
+logger = logging.getLogger(__name__)
+
+# Форматы превью, которые сохраняются без перекодирования в MP3
+PREVIEW_NATIVE_FORMATS = (".mp3", ".wav")
+
+
+class AudioService:
+    """Сервис обработки аудио файлов"""
+
+    def __init__(self, max_concurrency: int = settings.PREVIEW_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Ограничитель одновременно работающих процессов SOX"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def create_preview_from_file(self, source_path: str, original_name: Optional[str] = None) -> Optional[dict]:
+        """
+        Обрезать уже сохраненный на диске файл до превью.
+        SOX запускается асинхронно, число одновременных обрезок ограничено
+        семафором. При ошибке возвращает None (повтор решает вызывающая сторона).
+        """
+        original_ext = os.path.splitext(source_path)[1].lower()
+        output_ext = self._preview_extension(original_ext)
+        output_filename = f"{uuid.uuid4()}_preview{output_ext}"
+        output_path = os.path.join(file_storage.audio_dir, output_filename)
+
+        cmd = self._trim_command([source_path], output_path)
+        async with self.semaphore:
+            success = await self._run_sox(cmd, output_path)
+
+        if not success:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return None
+
+        return await self._preview_info(output_path, original_name)
+
+    @staticmethod
+    def _preview_extension(original_ext: str) -> str:
+        """MP3 и WAV сохраняются как есть, остальное перекодируется в MP3"""
+        return original_ext if original_ext in PREVIEW_NATIVE_FORMATS else ".mp3"
+
+    @staticmethod
+    def _trim_command(input_args: list, output_path: str) -> list:
+        """Команда SOX для обрезки до первых PREVIEW_DURATION_SECONDS секунд"""
+        return [
+            "sox",
+            *input_args,
+            output_path,
+            "trim", "0", str(settings.PREVIEW_DURATION_SECONDS)
+        ]
+
+    async def _preview_info(self, output_path: str, original_name: Optional[str]) -> dict:
+        """Метаданные созданного превью"""
+        output_filename = os.path.basename(output_path)
+        file_size = os.path.getsize(output_path)
+        logger.info(f"Превью создано: {output_filename}, размер: {file_size} байт")
+
+        return {
+            "filename": output_filename,
+            "size": file_size,
+            "sha256": await file_storage.compute_file_hash(output_path),
+            "mimetype": "audio/wav" if output_path.endswith(".wav") else "audio/mpeg",
+            "original_name": original_name
+        }
+
+    async def _run_sox(self, cmd: list, output_path: str) -> bool:
+        """Запустить SOX асинхронно с таймаутом"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            logger.error("SOX не установлен")
+            return False
+
+        try:
+            _, stderr = await asyncio.wait_for(
+                process.communicate(),
+                timeout=settings.PREVIEW_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            logger.error("Таймаут SOX при создании превью")
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+            return False
+
+        if process.returncode != 0 or not os.path.exists(output_path):
+            logger.error(f"SOX завершился с ошибкой: {(stderr or b'').decode(errors='replace')}")
+            return False
+
+        return True
+
+
+# Глобальный экземпляр сервиса
+audio_service = AudioService()
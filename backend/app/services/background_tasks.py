@@ -0,0 +1,148 @@
+"""
+Фоновые задачи после ответа клиенту
+
+Вместо asyncio.create_task без ссылки на задачу: ограниченная очередь
+и фиксированный пул воркеров. Каждая задача получает собственную сессию
+БД (сессия запроса к этому моменту уже закрыта), ограничена по времени
+и учитывается в счетчиках. Переполненная очередь отклоняет новые задачи,
+а не копит их в памяти. При остановке приложения очередь дорабатывается
+в пределах BACKGROUND_DRAIN_TIMEOUT_SECONDS.
+
+Для работы, которая должна пережить перезапуск, — job_queue или outbox.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging_config import request_id_var
+
+logger = logging.getLogger(__name__)
+
+TaskFunc = Callable[..., Awaitable[Any]]
+
+
+class BackgroundTaskSupervisor:
+    """Ограниченная очередь фоновых задач с пулом воркеров"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.running = 0
+
+        # Счетчики для мониторинга (в пределах процесса)
+        self.metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "rejected": 0,
+        }
+
+    def submit(self, name: str, func: TaskFunc, *args: Any, with_session: bool = True) -> bool:
+        """
+        Поставить задачу в очередь без ожидания.
+        with_session=True — первым аргументом передается новая AsyncSession.
+        Возвращает False, если очередь переполнена или супервизор не запущен.
+        """
+        if self._queue is None:
+            self.metrics["rejected"] += 1
+            logger.warning("Фоновая задача %s отклонена: супервизор не запущен", name)
+            return False
+        try:
+            self._queue.put_nowait((name, func, args, with_session, request_id_var.get()))
+        except asyncio.QueueFull:
+            self.metrics["rejected"] += 1
+            logger.warning("Фоновая задача %s отклонена: очередь заполнена (%s)", name, self._queue.maxsize)
+            return False
+        self.metrics["submitted"] += 1
+        return True
+
+    async def start(self, workers: int = settings.BACKGROUND_WORKERS) -> None:
+        """Запустить пул воркеров"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.BACKGROUND_QUEUE_SIZE)
+        self._workers = [
+            asyncio.create_task(self._worker_loop(), name=f"background-worker-{n}")
+            for n in range(workers)
+        ]
+        logger.info(f"Фоновые задачи: воркеров {workers}, очередь {settings.BACKGROUND_QUEUE_SIZE}")
+
+    async def stop(self, drain_timeout: float = settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS) -> None:
+        """Перестать принимать задачи, доработать очередь и остановить воркеров"""
+        if self._queue is None:
+            return
+        queue, self._queue = self._queue, None
+
+        try:
+            await asyncio.wait_for(queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Фоновые задачи не завершились за %s с, отменено в очереди: %s",
+                drain_timeout, queue.qsize()
+            )
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Фоновые задачи остановлены")
+
+    async def _worker_loop(self) -> None:
+        queue = self._queue
+        while True:
+            item = await queue.get()
+            self.running += 1
+            try:
+                await self._run(*item)
+            finally:
+                self.running -= 1
+                queue.task_done()
+
+    async def _run(self, name: str, func: TaskFunc, args: Tuple, with_session: bool, request_id: Optional[str]) -> None:
+        # Логи задачи помечаются request_id запроса, который ее поставил
+        token = request_id_var.set(request_id)
+        try:
+            await asyncio.wait_for(
+                self._call(func, args, with_session),
+                timeout=settings.BACKGROUND_TASK_TIMEOUT_SECONDS
+            )
+            self.metrics["completed"] += 1
+        except asyncio.TimeoutError:
+            self.metrics["timed_out"] += 1
+            logger.error(f"Фоновая задача {name} прервана по таймауту")
+        except Exception as e:
+            self.metrics["failed"] += 1
+            logger.error(f"Ошибка фоновой задачи {name}: {e}", exc_info=True)
+        finally:
+            request_id_var.reset(token)
+
+    @staticmethod
+    async def _call(func: TaskFunc, args: Tuple, with_session: bool) -> None:
+        if not with_session:
+            await func(*args)
+            return
+
+        async with AsyncSessionLocal() as db:
+            try:
+                await func(db, *args)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+    def get_stats(self) -> dict:
+        """Очередь, занятые воркеры и счетчики"""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": settings.BACKGROUND_QUEUE_SIZE,
+            "running": self.running,
+            "workers": len(self._workers),
+            **self.metrics,
+        }
+
+
+# Глобальный экземпляр супервизора
+background_tasks = BackgroundTaskSupervisor()
@@ -0,0 +1,154 @@
+"""
+Проверка здоровья приложения для /health
+
+Зависимости проверяются параллельно, у каждой проверки свой таймаут
+и замер задержки. Результат кешируется на HEALTH_CACHE_TTL_SECONDS,
+чтобы частые пробы балансировщика не нагружали Postgres.
+"""
+import asyncio
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import engine, get_pool_stats
+from app.core.file_storage import file_storage
+
+# Проверки, без которых узел не может обслуживать запросы (иначе статус 503)
+CRITICAL_CHECKS = ("database", "uploads")
+
+
+class HealthService:
+    """Параллельные проверки зависимостей с кешированием результата"""
+
+    def __init__(self):
+        self.bot_task: Optional[asyncio.Task] = None
+        self._result: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def track_bot(self, bot_task: Optional[asyncio.Task]) -> None:
+        """Запомнить задачу polling бота для проверки ее состояния"""
+        self.bot_task = bot_task
+
+    async def check(self) -> Dict:
+        """Результат проверки (из кеша, если он свежий)"""
+        if self._result is not None and time.monotonic() - self._checked_at < settings.HEALTH_CACHE_TTL_SECONDS:
+            return self._result
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # Одновременные пробы ждут одну проверку
+        async with self._lock:
+            if self._result is not None and time.monotonic() - self._checked_at < settings.HEALTH_CACHE_TTL_SECONDS:
+                return self._result
+            self._result = await self._run_checks()
+            self._checked_at = time.monotonic()
+            return self._result
+
+    async def _run_checks(self) -> Dict:
+        probes = {
+            "database": self._check_database,
+            "uploads": self._check_uploads,
+            "sox": self._check_sox,
+            "telegram_bot": self._check_bot,
+        }
+        results = await asyncio.gather(*[self._probe(probe) for probe in probes.values()])
+        checks = dict(zip(probes.keys(), results))
+
+        if any(checks[name]["status"] == "error" for name in CRITICAL_CHECKS):
+            overall = "error"
+        elif any(check["status"] == "error" for check in checks.values()):
+            overall = "degraded"
+        else:
+            overall = "ok"
+
+        return {
+            "status": overall,
+            "checks": checks,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+
+    @staticmethod
+    async def _probe(probe: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Выполнить проверку с таймаутом и замером задержки"""
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(probe(), timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            result = {"status": "error", "error": "timeout"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    @staticmethod
+    async def _check_database() -> Dict:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        return {"status": "ok", "pool": get_pool_stats()}
+
+    @staticmethod
+    async def _check_uploads() -> Dict:
+        def probe() -> Dict:
+            base_dir = file_storage.base_upload_dir
+            free_mb = shutil.disk_usage(base_dir).free // (1024 * 1024)
+            # Пробная запись: каталог может быть смонтирован только на чтение
+            with tempfile.NamedTemporaryFile(dir=base_dir, prefix=".health-") as probe_file:
+                probe_file.write(b"ok")
+                probe_file.flush()
+
+            if free_mb < settings.HEALTH_MIN_FREE_DISK_MB:
+                return {"status": "error", "free_mb": free_mb, "error": "мало места на диске"}
+            return {"status": "ok", "free_mb": free_mb}
+
+        return await run_in_threadpool(probe)
+
+    @staticmethod
+    async def _check_sox() -> Dict:
+        if shutil.which("sox") is None:
+            return {"status": "error", "error": "SOX не установлен"}
+
+        process = await asyncio.create_subprocess_exec(
+            "sox", "--version",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            stdout, _ = await process.communicate()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                process.kill()
+            raise
+
+        if process.returncode != 0:
+            return {"status": "error", "error": f"код возврата {process.returncode}"}
+        return {"status": "ok", "version": stdout.decode(errors="replace").strip()}
+
+    async def _check_bot(self) -> Dict:
+        if not settings.TELEGRAM_BOT_TOKEN:
+            return {"status": "not_configured"}
+        if settings.TELEGRAM_BOT_MODE != "background":
+            # Обновления приходят через webhook или в отдельный процесс бота
+            from app.bot.bot import peek_bot_instance
+            # Только состояние в памяти: проверка здоровья не должна ходить в Telegram
+            bot = peek_bot_instance()
+            if not bot:
+                return {"status": "error", "error": "бот не инициализирован", "mode": settings.TELEGRAM_BOT_MODE}
+            return {"status": "ok", "mode": settings.TELEGRAM_BOT_MODE}
+        if self.bot_task is None:
+            return {"status": "error", "error": "бот не запущен"}
+        if self.bot_task.done():
+            error = None if self.bot_task.cancelled() else self.bot_task.exception()
+            return {"status": "error", "error": f"polling остановлен: {error}" if error else "polling остановлен"}
+        return {"status": "ok"}
+
+
+# Глобальный экземпляр сервиса
+health_service = HealthService()
@@ -0,0 +1,277 @@
+"""
+Фоновая очередь задач на основе таблицы processing_jobs
+
+Задачи хранятся в Postgres, поэтому переживают перезапуск приложения,
+а каждый процесс uvicorn поднимает собственный пул воркеров. Выборка
+идет через SELECT ... FOR UPDATE SKIP LOCKED, так что несколько
+процессов не возьмут одну и ту же задачу.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.processing_job import ProcessingJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, ProcessingJob], Awaitable[None]]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobQueue:
+    """Очередь фоновых задач с локальным пулом воркеров"""
+
+    def __init__(self):
+        self.handlers: Dict[str, JobHandler] = {}
+        self.failure_handlers: Dict[str, JobHandler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        # Счетчики для мониторинга (в пределах процесса)
+        self.metrics = {
+            "enqueued": 0,
+            "completed": 0,
+            "retried": 0,
+            "failed": 0,
+            "busy_workers": 0,
+            "total_run_seconds": 0.0,
+        }
+        self.started_at: Optional[float] = None
+
+    def register(
+        self,
+        job_type: str,
+        handler: JobHandler,
+        on_failure: Optional[JobHandler] = None
+    ) -> None:
+        """Зарегистрировать обработчик для типа задачи (и, опционально, для окончательного провала)"""
+        self.handlers[job_type] = handler
+        if on_failure:
+            self.failure_handlers[job_type] = on_failure
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        track_id: UUID,
+        job_type: str,
+        payload: Optional[dict] = None
+    ) -> ProcessingJob:
+        """
+        Добавить задачу в очередь в рамках текущей транзакции.
+        Коммит делает вызывающая сторона, после него стоит вызвать notify().
+        """
+        job = ProcessingJob(
+            track_id=track_id,
+            job_type=job_type,
+            payload=payload or {},
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+        )
+        db.add(job)
+        self.metrics["enqueued"] += 1
+        return job
+
+    def notify(self) -> None:
+        """Разбудить локальных воркеров после коммита новой задачи"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self, workers: int = settings.JOB_WORKERS) -> None:
+        """Запустить пул воркеров"""
+        if self._workers:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self.started_at = time.monotonic()
+        self._workers = [
+            asyncio.create_task(self._worker_loop(n), name=f"job-worker-{n}")
+            for n in range(workers)
+        ]
+        logger.info(f"Очередь задач запущена, воркеров: {workers}")
+
+    async def stop(self) -> None:
+        """Остановить воркеров (текущие задачи вернутся в очередь по таймауту)"""
+        self._stopping = True
+        self.notify()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Очередь задач остановлена")
+
+    async def _worker_loop(self, worker_number: int) -> None:
+        """Цикл воркера: забрать задачу, выполнить, повторить"""
+        while not self._stopping:
+            try:
+                job_id = await self._claim_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Воркер {worker_number}: ошибка выборки задачи: {e}")
+                job_id = None
+
+            if job_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.metrics["busy_workers"] += 1
+            try:
+                await self._execute(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Сбой БД при записи результата не должен останавливать воркер:
+                # задача останется running и будет забрана повторно как зависшая
+                logger.error(f"Воркер {worker_number}: ошибка выполнения задачи {job_id}: {e}", exc_info=True)
+            finally:
+                self.metrics["busy_workers"] -= 1
+
+    async def _claim_next(self) -> Optional[UUID]:
+        """Атомарно забрать следующую готовую задачу (или зависшую running)"""
+        now = _utcnow()
+        stale_before = now - timedelta(seconds=settings.JOB_STALE_AFTER_SECONDS)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ProcessingJob)
+                .where(
+                    or_(
+                        and_(ProcessingJob.status == JobStatus.PENDING, ProcessingJob.run_after <= now),
+                        and_(ProcessingJob.status == JobStatus.RUNNING, ProcessingJob.started_at < stale_before),
+                    )
+                )
+                .order_by(ProcessingJob.run_after)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = result.scalar_one_or_none()
+            if not job:
+                return None
+
+            # Условный UPDATE страхует от гонки, если блокировки строк недоступны
+            claimed = await db.execute(
+                update(ProcessingJob)
+                .where(
+                    ProcessingJob.id == job.id,
+                    ProcessingJob.status == job.status,
+                    ProcessingJob.attempts == job.attempts,
+                )
+                .values(status=JobStatus.RUNNING, attempts=job.attempts + 1, started_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            return job.id if claimed.rowcount == 1 else None
+
+    async def _execute(self, job_id: UUID) -> None:
+        """Выполнить задачу и записать результат"""
+        started = time.monotonic()
+
+        async with AsyncSessionLocal() as db:
+            job = await db.get(ProcessingJob, job_id)
+            if not job:
+                return
+
+            handler = self.handlers.get(job.job_type)
+            try:
+                if handler is None:
+                    raise RuntimeError(f"Нет обработчика для задачи {job.job_type}")
+
+                await handler(db, job)
+
+                job.status = JobStatus.DONE
+                job.finished_at = _utcnow()
+                job.last_error = None
+                await db.commit()
+                self.metrics["completed"] += 1
+                logger.info(f"Задача {job.job_type} {job_id} выполнена")
+
+            except Exception as e:
+                await db.rollback()
+                await self._on_failure(db, job_id, e)
+
+            finally:
+                self.metrics["total_run_seconds"] += time.monotonic() - started
+
+    async def _on_failure(self, db: AsyncSession, job_id: UUID, error: Exception) -> None:
+        """Вернуть задачу в очередь с экспоненциальной задержкой или пометить failed"""
+        job = await db.get(ProcessingJob, job_id)
+        if not job:
+            return
+
+        job.last_error = str(error)
+        if job.attempts >= job.max_attempts:
+            job.status = JobStatus.FAILED
+            job.finished_at = _utcnow()
+            self.metrics["failed"] += 1
+            logger.error(f"Задача {job.job_type} {job_id} провалена после {job.attempts} попыток: {error}")
+
+            failure_handler = self.failure_handlers.get(job.job_type)
+            if failure_handler:
+                try:
+                    # Savepoint: ошибка обработчика не ломает сессию и статус failed сохраняется
+                    async with db.begin_nested():
+                        await failure_handler(db, job)
+                except Exception as e:
+                    logger.error(f"Ошибка обработчика провала задачи {job_id}: {e}")
+        else:
+            delay = settings.JOB_RETRY_BASE_SECONDS * (2 ** (job.attempts - 1))
+            job.status = JobStatus.PENDING
+            job.run_after = _utcnow() + timedelta(seconds=delay)
+            self.metrics["retried"] += 1
+            logger.warning(f"Задача {job.job_type} {job_id} упала (попытка {job.attempts}), повтор через {delay} с: {error}")
+
+        await db.commit()
+
+    async def get_stats(self, db: AsyncSession) -> dict:
+        """Глубина очереди по статусам и счетчики пропускной способности"""
+        result = await db.execute(
+            select(ProcessingJob.status, func.count(ProcessingJob.id))
+            .group_by(ProcessingJob.status)
+        )
+        depth = {status.value: 0 for status in JobStatus}
+        depth.update(dict(result.all()))
+
+        oldest_result = await db.execute(
+            select(func.min(ProcessingJob.created_at))
+            .where(ProcessingJob.status == JobStatus.PENDING)
+        )
+        oldest_pending = oldest_result.scalar()
+
+        uptime = time.monotonic() - self.started_at if self.started_at else 0.0
+        processed = self.metrics["completed"] + self.metrics["failed"]
+
+        return {
+            "queue_depth": depth,
+            "oldest_pending_age_seconds": (
+                (_utcnow() - oldest_pending).total_seconds() if oldest_pending else 0.0
+            ),
+            "workers": len(self._workers),
+            "busy_workers": self.metrics["busy_workers"],
+            "enqueued": self.metrics["enqueued"],
+            "completed": self.metrics["completed"],
+            "retried": self.metrics["retried"],
+            "failed": self.metrics["failed"],
+            "throughput_per_minute": processed / uptime * 60 if uptime > 0 else 0.0,
+            "average_run_seconds": (
+                self.metrics["total_run_seconds"] / processed if processed else 0.0
+            ),
+        }
+
+
+# Глобальный экземпляр очереди
+job_queue = JobQueue()
@@ -0,0 +1,304 @@
+"""
+Фоновая отправка уведомлений из notification_outbox в Telegram
+
+Диспетчер забирает пачку готовых записей (SELECT ... FOR UPDATE SKIP LOCKED,
+как очередь задач), одним запросом загружает заказы и владельцев всей
+пачки и отправляет сообщения с учетом лимитов Bot API: общий темп
+NOTIFY_RATE_PER_SECOND и не чаще NOTIFY_CHAT_INTERVAL_SECONDS в один чат.
+Сообщение в «занятый» чат откладывается, а не держит пачку. Ошибки сети
+повторяются с экспоненциальной задержкой, 429 — через retry_after из ответа,
+заблокированный бот и неверный запрос не повторяются.
+
+Лимиты считаются в пределах процесса: при нескольких воркерах uvicorn
+NOTIFY_RATE_PER_SECOND стоит делить на их число.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bot.bot import get_bot_instance
+from app.bot.notifications import render_notification
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.notification_outbox import NotificationOutbox, NotificationStatus, NotificationRecipient
+from app.models.order import Order as OrderModel
+from app.models.user import User as UserModel
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class RateLimiter:
+    """Общий темп отправки и минимальный интервал между сообщениями в один чат"""
+
+    def __init__(self, rate_per_second: float, chat_interval: float):
+        self.interval = 1 / rate_per_second
+        self.chat_interval = chat_interval
+        self._next_slot = 0.0
+        self._chat_next: Dict[str, float] = {}
+
+    async def acquire(self) -> None:
+        """Дождаться слота общего лимита"""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def reserve_chat(self, chat_id) -> float:
+        """Занять чат; если он еще занят — вернуть, сколько секунд ждать"""
+        now = time.monotonic()
+        key = str(chat_id)
+        ready_at = self._chat_next.get(key, 0.0)
+        if ready_at > now:
+            return ready_at - now
+        self._chat_next[key] = now + self.chat_interval
+        return 0.0
+
+    def pause(self, chat_id, seconds: float) -> None:
+        """Flood control от Telegram: притормозить чат и общий поток"""
+        until = time.monotonic() + seconds
+        self._chat_next[str(chat_id)] = until
+        self._next_slot = max(self._next_slot, until)
+
+    def prune(self) -> None:
+        now = time.monotonic()
+        self._chat_next = {key: ready_at for key, ready_at in self._chat_next.items() if ready_at > now}
+
+
+class NotificationDispatcher:
+    """Фоновый отправитель уведомлений из outbox"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.limiter = RateLimiter(settings.NOTIFY_RATE_PER_SECOND, settings.NOTIFY_CHAT_INTERVAL_SECONDS)
+
+        # Счетчики для мониторинга (в пределах процесса)
+        self.metrics = {
+            "sent": 0,
+            "skipped": 0,
+            "deferred": 0,
+            "retried": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    def notify(self) -> None:
+        """Разбудить диспетчер после коммита новых уведомлений"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop(), name="notification-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._wakeup = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка отправки уведомлений: {e}")
+                claimed = 0
+
+            # Полная пачка — скорее всего, есть еще; иначе ждем коммита или опроса
+            if claimed >= settings.NOTIFY_BATCH_SIZE:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.NOTIFY_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dispatch_batch(self) -> int:
+        """Отправить одну пачку уведомлений, вернуть число забранных записей"""
+        bot = await get_bot_instance()
+        if not bot or not bot.bot:
+            # Записи остаются в очереди до появления бота, попытки не тратятся
+            return 0
+
+        async with AsyncSessionLocal() as db:
+            notifications, orders = await self._claim_batch(db)
+            if not notifications:
+                return 0
+
+            outgoing = self._prepare(notifications, orders, bot.get_config().admin_chat_id)
+            # Соединение с БД не держим, пока идут запросы к Telegram
+            await db.commit()
+
+            results = await asyncio.gather(*[
+                self._send(bot.bot, chat_id, text, markup)
+                for _, chat_id, text, markup in outgoing
+            ])
+            for (notification, chat_id, _, _), error in zip(outgoing, results):
+                self._apply_result(notification, chat_id, error)
+
+            await db.commit()
+
+        self.metrics["batches"] += 1
+        self.limiter.prune()
+        return len(notifications)
+
+    async def _claim_batch(self, db: AsyncSession) -> Tuple[List[NotificationOutbox], Dict[UUID, object]]:
+        """Забрать пачку готовых записей и загрузить их заказы одним запросом"""
+        now = _utcnow()
+        stale_before = now - timedelta(seconds=settings.NOTIFY_STALE_AFTER_SECONDS)
+
+        result = await db.execute(
+            select(NotificationOutbox)
+            .where(
+                or_(
+                    and_(NotificationOutbox.status == NotificationStatus.PENDING,
+                         NotificationOutbox.run_after <= now),
+                    and_(NotificationOutbox.status == NotificationStatus.SENDING,
+                         NotificationOutbox.started_at < stale_before),
+                )
+            )
+            .order_by(NotificationOutbox.run_after)
+            .limit(settings.NOTIFY_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        notifications = list(result.scalars().all())
+        for notification in notifications:
+            notification.status = NotificationStatus.SENDING
+            notification.started_at = now
+
+        order_ids = {notification.order_id for notification in notifications if notification.order_id}
+        orders = {}
+        if order_ids:
+            rows = await db.execute(
+                select(
+                    OrderModel.id, OrderModel.tariff_plan, OrderModel.price, OrderModel.status,
+                    UserModel.email, UserModel.telegram_id
+                )
+                .join(UserModel, OrderModel.user_id == UserModel.id)
+                .where(OrderModel.id.in_(order_ids))
+            )
+            orders = {row.id: row for row in rows}
+        return notifications, orders
+
+    def _prepare(self, notifications: List[NotificationOutbox], orders: Dict[UUID, object], admin_chat_id) -> list:
+        """Получатель и текст для каждой записи; лишнее пропускается или откладывается"""
+        outgoing = []
+        for notification in notifications:
+            order = orders.get(notification.order_id)
+            if notification.chat_id:
+                chat_id = notification.chat_id
+            elif notification.recipient == NotificationRecipient.ADMIN:
+                chat_id = admin_chat_id
+            else:
+                chat_id = order.telegram_id if order else None
+
+            rendered = render_notification(notification, order) if chat_id else None
+            if not rendered or not rendered[0]:
+                notification.status = NotificationStatus.SKIPPED
+                notification.sent_at = _utcnow()
+                self.metrics["skipped"] += 1
+                continue
+
+            delay = self.limiter.reserve_chat(chat_id)
+            if delay > 0:
+                # Чат получил сообщение меньше секунды назад — отправим позже
+                notification.status = NotificationStatus.PENDING
+                notification.run_after = _utcnow() + timedelta(seconds=delay)
+                self.metrics["deferred"] += 1
+                continue
+
+            outgoing.append((notification, chat_id, *rendered))
+        return outgoing
+
+    async def _send(self, bot, chat_id, text: str, markup) -> Optional[Exception]:
+        await self.limiter.acquire()
+        try:
+            await bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                reply_markup=markup,
+                disable_web_page_preview=True
+            )
+        except Exception as e:
+            return e
+        return None
+
+    def _apply_result(self, notification: NotificationOutbox, chat_id, error: Optional[Exception]) -> None:
+        if error is None:
+            notification.status = NotificationStatus.SENT
+            notification.sent_at = _utcnow()
+            notification.last_error = None
+            self.metrics["sent"] += 1
+            return
+
+        notification.attempts += 1
+        notification.last_error = str(error)
+
+        if isinstance(error, (TelegramForbiddenError, TelegramBadRequest)) or notification.attempts >= notification.max_attempts:
+            # Бот заблокирован, чат не найден или попытки исчерпаны
+            notification.status = NotificationStatus.FAILED
+            notification.sent_at = _utcnow()
+            self.metrics["failed"] += 1
+            logger.error(
+                f"Уведомление {notification.kind} {notification.id} не отправлено "
+                f"(попыток: {notification.attempts}): {error}"
+            )
+            return
+
+        if isinstance(error, TelegramRetryAfter):
+            delay = error.retry_after
+            self.limiter.pause(chat_id, delay)
+        else:
+            delay = settings.NOTIFY_RETRY_BASE_SECONDS * (2 ** (notification.attempts - 1))
+        notification.status = NotificationStatus.PENDING
+        notification.run_after = _utcnow() + timedelta(seconds=delay)
+        self.metrics["retried"] += 1
+        logger.warning(
+            f"Уведомление {notification.kind} {notification.id} не отправлено "
+            f"(попытка {notification.attempts}), повтор через {delay} с: {error}"
+        )
+
+    async def get_stats(self, db: AsyncSession) -> dict:
+        """Глубина outbox по статусам и счетчики отправки"""
+        result = await db.execute(
+            select(NotificationOutbox.status, func.count(NotificationOutbox.id))
+            .group_by(NotificationOutbox.status)
+        )
+        depth = {status.value: 0 for status in NotificationStatus}
+        depth.update(dict(result.all()))
+
+        oldest_result = await db.execute(
+            select(func.min(NotificationOutbox.created_at))
+            .where(NotificationOutbox.status == NotificationStatus.PENDING)
+        )
+        oldest_pending = oldest_result.scalar()
+
+        return {
+            "outbox_depth": depth,
+            "oldest_pending_age_seconds": (
+                (_utcnow() - oldest_pending).total_seconds() if oldest_pending else 0.0
+            ),
+            "running": self._task is not None,
+            **self.metrics,
+        }
+
+
+# Глобальный экземпляр диспетчера
+notification_dispatcher = NotificationDispatcher()
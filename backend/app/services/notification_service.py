@@ -1,265 +1,129 @@
 """
-Сервис для отправки уведомлений через разные каналы
+Сервис уведомлений: запись в outbox
+
+Уведомления пишутся в таблицу notification_outbox в той же транзакции,
+что и изменение заказа, и уходят в Telegram только после ее коммита —
+их отправляет notification_dispatcher в фоне. Обработчики запросов
+не обращаются к Telegram и не открывают дополнительных сессий.
 """
 import logging
 from typing import Optional
 from uuid import UUID
 
-from app.bot.notifications import (
-    send_order_created_notification as bot_notify_order_created,
-    send_order_ready_notification as bot_notify_order_ready,
-    send_admin_notification as bot_notify_admin
-)
-from app.core.database import AsyncSessionLocal
-from app.crud.user import crud_user
-from app.models.order import Order as OrderModel
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bot.config import get_bot_config
+from app.core.config import settings
+from app.models.notification_outbox import NotificationOutbox, NotificationKind, NotificationRecipient
 
 logger = logging.getLogger(__name__)
 
+# Статусы, которые требуют уведомления пользователя
+USER_NOTIFICATION_STATUSES = {
+    "paid",
+    "ready_for_final_review",
+    "completed",
+    "cancelled"
+}
+
+# Статусы, которые требуют уведомления администратора
+ADMIN_NOTIFICATION_STATUSES = {
+    "paid",
+    "payment_pending",
+    "ready_for_review",
+    "cancelled"
+}
+
+# Ключ в session.info: слушатель after_commit уже подписан
+_WAKE_KEY = "notification_outbox_wake"
+
+
+def _wake_dispatcher(session) -> None:
+    from app.services.notification_dispatcher import notification_dispatcher
+    session.info.pop(_WAKE_KEY, None)
+    notification_dispatcher.notify()
+
 
 class NotificationService:
     """Сервис уведомлений"""
-    
-    @staticmethod
-    async def notify_order_created(order_id: UUID) -> bool:
-        """
-        Уведомить о создании заказа
-        
-        Args:
-            order_id: UUID заказа
-            
-        Returns:
-            bool: True если уведомления отправлены успешно
-        """
-        try:
-            async with AsyncSessionLocal() as db:
-                # Получаем полные данные заказа
-                from app.crud.order import crud_order
-                order = await crud_order.get_by_id(db, order_id)
-                
-                if not order:
-                    logger.error(f"Заказ {order_id} не найден для уведомления")
-                    return False
-                
-                # Получаем пользователя
-                user = await crud_user.get_by_id(db, order.user_id)
-                if not user:
-                    logger.error(f"Пользователь {order.user_id} не найден для заказа {order_id}")
-                    return False
-                
-                # 1. Telegram уведомление пользователю (если есть telegram_id)
-                telegram_sent = False
-                if user.telegram_id:
-                    try:
-                        telegram_sent = await bot_notify_order_created(order)
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки Telegram уведомления: {e}")
-                
-                # 2. Уведомление администратору
-                admin_message = (
-                    f"🎵 <b>Новый заказ #{str(order.id)[:8]}</b>\n\n"
-                    f"<b>Тариф:</b> {order.tariff_plan}\n"
-                    f"<b>Сумма:</b> {order.price} руб.\n"
-                    f"<b>Пользователь:</b> {user.email}\n"
-                    f"<b>Статус:</b> {order.status}\n\n"
-                    f"🌐 <a href='https://musicme.ru/admin/orders/{order.id}'>Открыть в админке</a>"
-                )
-                
-                admin_sent = await bot_notify_admin(admin_message)
-                
-                logger.info(
-                    f"Уведомления о создании заказа {order_id} отправлены: "
-                    f"Telegram={telegram_sent}, Admin={admin_sent}"
-                )
-                
-                return telegram_sent or admin_sent
-                
-        except Exception as e:
-            logger.error(f"Критическая ошибка при отправке уведомлений: {e}")
-            return False
-    
-    @staticmethod
-    async def notify_order_ready(order_id: UUID) -> bool:
-        """
-        Уведомить о готовности демо-версии
-        
-        Args:
-            order_id: UUID заказа
-            
-        Returns:
-            bool: True если уведомления отправлены успешно
-        """
-        try:
-            async with AsyncSessionLocal() as db:
-                # Получаем полные данные заказа
-                from app.crud.order import crud_order
-                order = await crud_order.get_by_id(db, order_id)
-                
-                if not order:
-                    logger.error(f"Заказ {order_id} не найден для уведомления")
-                    return False
-                
-                # Проверяем что есть preview_url
-                from app.crud.track import crud_track
-                preview_tracks = await crud_track.get_by_order(db, order_id, is_preview=True)
-                
-                if not preview_tracks:
-                    logger.error(f"У заказа {order_id} нет preview треков")
-                    return False
-                
-                # Берем первый preview трек
-                preview_track = preview_tracks[0]
-                
-                # Получаем пользователя
-                user = await crud_user.get_by_id(db, order.user_id)
-                if not user:
-                    logger.error(f"Пользователь {order.user_id} не найден для заказа {order_id}")
-                    return False
-                
-                # Telegram уведомление пользователю (если есть telegram_id)
-                telegram_sent = False
-                if user.telegram_id:
-                    try:
-                        # Создаем URL для preview
-                        preview_url = f"https://musicme.ru/track/{order_id}"
-                        
-                        # Нужно скопировать order и добавить preview_url
-                        import copy
-                        order_with_preview = copy.copy(order)
-                        order_with_preview.preview_url = preview_url
-                        
-                        telegram_sent = await bot_notify_order_ready(order_with_preview)
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки Telegram уведомления: {e}")
-                
-                logger.info(
-                    f"Уведомления о готовности заказа {order_id} отправлены: "
-                    f"Telegram={telegram_sent}"
-                )
-                
-                return telegram_sent
-                
-        except Exception as e:
-            logger.error(f"Критическая ошибка при отправке уведомлений: {e}")
-            return False
-    
-    @staticmethod
-    async def notify_order_status_changed(
-        order_id: UUID, 
-        old_status: str, 
+
+    def _enqueue(
+        self,
+        db: AsyncSession,
+        kind: NotificationKind,
+        recipient: NotificationRecipient,
+        order_id: Optional[UUID] = None,
+        payload: Optional[dict] = None,
+        chat_id: Optional[int] = None
+    ) -> None:
+        """Добавить уведомление в текущую транзакцию (коммит делает вызывающая сторона)"""
+        if not settings.TELEGRAM_BOT_TOKEN:
+            return
+        if recipient == NotificationRecipient.ADMIN and not (chat_id or get_bot_config().admin_chat_id):
+            return
+
+        db.add(NotificationOutbox(
+            kind=kind.value,
+            recipient=recipient.value,
+            order_id=order_id,
+            chat_id=chat_id,
+            payload=payload,
+            max_attempts=settings.NOTIFY_MAX_ATTEMPTS,
+        ))
+
+        # Разбудить диспетчер сразу после коммита, не дожидаясь опроса
+        if not db.sync_session.info.get(_WAKE_KEY):
+            db.sync_session.info[_WAKE_KEY] = True
+            event.listen(db.sync_session, "after_commit", _wake_dispatcher, once=True)
+
+    def notify_order_created(self, db: AsyncSession, order_id: UUID) -> None:
+        """Уведомить пользователя и администратора о создании заказа"""
+        self._enqueue(db, NotificationKind.ORDER_CREATED, NotificationRecipient.USER, order_id)
+        self._enqueue(db, NotificationKind.ORDER_CREATED, NotificationRecipient.ADMIN, order_id)
+
+    def notify_order_ready(self, db: AsyncSession, order_id: UUID) -> None:
+        """Уведомить пользователя о готовности демо-версии"""
+        self._enqueue(db, NotificationKind.ORDER_READY, NotificationRecipient.USER, order_id)
+
+    def notify_order_status_changed(
+        self,
+        db: AsyncSession,
+        order_id: UUID,
+        old_status: str,
         new_status: str
-    ) -> bool:
+    ) -> None:
         """
         Уведомить об изменении статуса заказа
-        
-        Args:
-            order_id: UUID заказа
-            old_status: предыдущий статус
-            new_status: новый статус
-            
-        Returns:
-            bool: True если уведомления отправлены успешно
+        (администратора и/или пользователя — в зависимости от нового статуса)
         """
-        try:
-            async with AsyncSessionLocal() as db:
-                # Получаем заказ
-                from app.crud.order import crud_order
-                order = await crud_order.get_by_id(db, order_id)
-                
-                if not order:
-                    logger.error(f"Заказ {order_id} не найден")
-                    return False
-                
-                # Статусы, которые требуют уведомления пользователя
-                user_notification_statuses = [
-                    "paid",
-                    "ready_for_final_review",
-                    "completed",
-                    "cancelled"
-                ]
-                
-                # Статусы, которые требуют уведомления администратора
-                admin_notification_statuses = [
-                    "paid",
-                    "payment_pending",
-                    "ready_for_review",
-                    "cancelled"
-                ]
-                
-                # Формируем сообщение
-                status_names = {
-                    "draft": "📝 Черновик",
-                    "in_progress": "⚙️ В работе",
-                    "ready_for_review": "🎵 Готово для прослушивания",
-                    "payment_pending": "💳 Ожидает оплаты",
-                    "paid": "✅ Оплачено",
-                    "ready_for_final_review": "🎶 Готов финальный вариант",
-                    "completed": "🎉 Завершено",
-                    "cancelled": "❌ Отменено"
-                }
-                
-                old_status_name = status_names.get(old_status, old_status)
-                new_status_name = status_names.get(new_status, new_status)
-                
-                message = (
-                    f"📊 <b>Статус заказа #{str(order.id)[:8]} изменен</b>\n\n"
-                    f"Было: {old_status_name}\n"
-                    f"Стало: {new_status_name}\n\n"
-                    f"🌐 <a href='https://musicme.ru/order/{order.id}'>Открыть заказ</a>"
-                )
-                
-                # Отправляем администратору если нужно
-                if new_status in admin_notification_statuses:
-                    await bot_notify_admin(message)
-                
-                # Отправляем пользователю если нужно и есть telegram_id
-                if new_status in user_notification_statuses:
-                    user = await crud_user.get_by_id(db, order.user_id)
-                    if user and user.telegram_id:
-                        # Формируем сообщение для пользователя
-                        user_message = (
-                            f"📊 <b>Статус вашего заказа #{str(order.id)[:8]}</b>\n\n"
-                            f"Обновлен: {new_status_name}\n"
-                        )
-                        
-                        if new_status == "paid":
-                            user_message += "\n✅ Оплата подтверждена! Готовим полную версию."
-                        elif new_status == "ready_for_final_review":
-                            user_message += "\n🎶 Финальная версия готова! Можете скачать."
-                        elif new_status == "completed":
-                            user_message += "\n🎉 Заказ успешно завершен!"
-                        elif new_status == "cancelled":
-                            user_message += "\n❌ Заказ отменен."
-                        
-                        user_message += f"\n\n🌐 <a href='https://musicme.ru/order/{order.id}'>Открыть заказ</a>"
-                        
-                        await bot_notify_admin(user_message)  # Временно через admin функцию
-                
-                logger.info(f"Уведомление об изменении статуса {order_id}: {old_status} → {new_status}")
-                return True
-                
-        except Exception as e:
-            logger.error(f"Ошибка при отправке уведомления об изменении статуса: {e}")
-            return False
-    
-    @staticmethod
-    async def notify_admin(message: str, chat_id: Optional[int] = None) -> bool:
+        old_status = getattr(old_status, "value", old_status)
+        new_status = getattr(new_status, "value", new_status)
+        payload = {"old_status": old_status, "new_status": new_status}
+
+        if new_status in ADMIN_NOTIFICATION_STATUSES:
+            self._enqueue(db, NotificationKind.ORDER_STATUS_CHANGED, NotificationRecipient.ADMIN, order_id, payload)
+        if new_status in USER_NOTIFICATION_STATUSES:
+            self._enqueue(db, NotificationKind.ORDER_STATUS_CHANGED, NotificationRecipient.USER, order_id, payload)
+
+    def notify_payment_confirmed(self, db: AsyncSession, order_id: UUID) -> None:
+        """Сообщить пользователю, что продюсер подтвердил оплату"""
+        self._enqueue(db, NotificationKind.PAYMENT_CONFIRMED, NotificationRecipient.USER, order_id)
+
+    def notify_admin(self, db: AsyncSession, message: str, chat_id: Optional[int] = None) -> None:
         """
-        Уведомить администратора
-        
+        Уведомить администратора готовым текстом
+
         Args:
-            message: Текст сообщения
+            db: Сессия базы данных
+            message: Текст сообщения (HTML)
             chat_id: Optional Telegram chat ID (если не указан - из настроек)
-            
-        Returns:
-            bool: True если уведомление отправлено успешно
         """
-        try:
-            return await bot_notify_admin(message, chat_id)
-        except Exception as e:
-            logger.error(f"Ошибка отправки уведомления администратору: {e}")
-            return False
+        self._enqueue(
+            db, NotificationKind.ADMIN_MESSAGE, NotificationRecipient.ADMIN,
+            payload={"text": message}, chat_id=chat_id
+        )
 
 
 # Глобальный экземпляр сервиса
-notification_service = NotificationService()
\ No newline at end of file
+notification_service = NotificationService()
@@ -8,7 +8,6 @@ import logging
 
 from app.schemas.order import OrderCreate
 from app.crud.tariff import crud_tariff
-from app.services.notification_service import notification_service
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +28,7 @@ class OrderService:
         tariff_plan = tariff_plan or 'basic'
         
         # Получаем тариф из БД
-        tariff = await crud_tariff.get_by_code(db, tariff_plan)
+        tariff = await crud_tariff.get_by_code_cached(db, tariff_plan)
         if not tariff:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -71,7 +70,7 @@ class OrderService:
         tariff_plan = tariff_plan or 'basic'
         
         # Получаем тариф из БД
-        tariff = await crud_tariff.get_by_code(db, tariff_plan)
+        tariff = await crud_tariff.get_by_code_cached(db, tariff_plan)
         if not tariff:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -95,32 +94,20 @@ class OrderService:
         return order_dict
 
     @staticmethod
-    async def after_order_created(order_id: UUID, db) -> bool:
+    async def after_order_created(db, order_id: UUID) -> None:
         """
-        Действия после создания заказа
+        Действия после создания заказа (фоновая задача, после коммита)
+        
+        Уведомления сюда не входят: они пишутся в outbox в транзакции
+        создания заказа. Здесь — то, что не должно задерживать ответ:
+        - Аналитика
+        - Интеграция с внешними сервисами
         
         Args:
+            db: Собственная сессия фоновой задачи
             order_id: UUID созданного заказа
-            db: Сессия базы данных
-            
-        Returns:
-            bool: True если действия выполнены успешно
         """
-        try:
-            # 1. Отправляем уведомления
-            await notification_service.notify_order_created(order_id)
-            
-            # 2. Можно добавить другие действия:
-            # - Логирование
-            # - Аналитика
-            # - Интеграция с внешними сервисами
-            
-            logger.info(f"Post-creation actions completed for order {order_id}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error in after_order_created for order {order_id}: {e}")
-            return False
+        logger.info(f"Post-creation actions completed for order {order_id}")
 
 
 order_service = OrderService()
\ No newline at end of file
@@ -16,13 +16,15 @@ logger = logging.getLogger(__name__)
 class OrderStatusService:
     """Сервис для управления статусами заказов"""
     
-    async def on_tracks_changed(self, db: AsyncSession, order_id: UUID) -> bool:
+    async def on_tracks_changed(self, db: AsyncSession, order_id: UUID, commit: bool = True) -> bool:
         """
         Обновить статус заказа при изменении треков
         
         Args:
             db: Сессия базы данных
             order_id: ID заказа
+            commit: False — изменения остаются в транзакции вызывающего,
+                ошибки пробрасываются (фоновая задача повторится)
             
         Returns:
             bool: True если статус изменен
@@ -38,8 +40,9 @@ class OrderStatusService:
             
             old_status = order.status
             
-            # Получаем треки заказа
+            # Получаем треки заказа (обрабатываемые в фоне еще не учитываем)
             tracks = await crud_track.get_by_order(db, order_id)
+            tracks = [track for track in tracks if track.processing_status == "ready"]
             
             # Если нет треков - ничего не меняем
             if not tracks:
@@ -68,16 +71,19 @@ class OrderStatusService:
                 status_changed = True
             
             if status_changed:
-                await db.commit()
-                
-                # Отправляем уведомление об изменении статуса
-                await notification_service.notify_order_status_changed(
-                    order_id, old_status, order.status
+                # Уведомления пишутся в outbox в той же транзакции
+                notification_service.notify_order_status_changed(
+                    db, order_id, old_status, order.status
                 )
                 
                 # Дополнительное уведомление для READY_FOR_REVIEW
                 if order.status == OrderStatus.READY_FOR_REVIEW:
-                    await notification_service.notify_order_ready(order_id)
+                    notification_service.notify_order_ready(db, order_id)
+                
+                if commit:
+                    await db.commit()
+                else:
+                    await db.flush()
                 
                 logger.info(
                     f"Статус заказа {order_id} изменен: {old_status} → {order.status} "
@@ -88,6 +94,8 @@ class OrderStatusService:
             return False
             
         except Exception as e:
+            if not commit:
+                raise
             logger.error(f"Ошибка в on_tracks_changed для заказа {order_id}: {e}")
             await db.rollback()
             return False
@@ -123,11 +131,9 @@ class OrderStatusService:
                 order.rounds_remaining -= 1
                 order.status = OrderStatus.IN_PROGRESS
                 
-                await db.commit()
-                
                 # Уведомляем об изменении статуса
-                await notification_service.notify_order_status_changed(
-                    order_id, old_status, order.status
+                notification_service.notify_order_status_changed(
+                    db, order_id, old_status, order.status
                 )
                 
                 # Уведомление продюсеру о запросе правки
@@ -142,7 +148,9 @@ class OrderStatusService:
                     
                     admin_message += f"🌐 <a href='https://musicme.ru/producer/orders/{order.id}'>Открыть заказ</a>"
                     
-                    await notification_service.notify_admin(admin_message)
+                    notification_service.notify_admin(db, admin_message)
+                
+                await db.commit()
                 
                 logger.info(
                     f"Правка запрошена для заказа {order_id}, "
@@ -153,13 +161,14 @@ class OrderStatusService:
             else:
                 # Лимит правок исчерпан
                 order.status = OrderStatus.COMPLETED
-                await db.commit()
                 
                 # Уведомляем об изменении статуса
-                await notification_service.notify_order_status_changed(
-                    order_id, old_status, order.status
+                notification_service.notify_order_status_changed(
+                    db, order_id, old_status, order.status
                 )
                 
+                await db.commit()
+                
                 logger.info(
                     f"Лимит правок исчерпан для заказа {order_id}, "
                     f"статус изменен на COMPLETED"
@@ -200,11 +209,9 @@ class OrderStatusService:
             if order.status == OrderStatus.READY_FOR_REVIEW:
                 order.status = OrderStatus.PAID
                 
-                await db.commit()
-                
                 # Уведомляем об изменении статуса
-                await notification_service.notify_order_status_changed(
-                    order_id, old_status, order.status
+                notification_service.notify_order_status_changed(
+                    db, order_id, old_status, order.status
                 )
                 
                 # Уведомление администратору для проверки оплаты
@@ -215,7 +222,9 @@ class OrderStatusService:
                     f"🌐 <a href='https://musicme.ru/admin/orders/{order.id}'>Проверить оплату</a>"
                 )
                 
-                await notification_service.notify_admin(admin_message)
+                notification_service.notify_admin(db, admin_message)
+                
+                await db.commit()
                 
                 logger.info(f"Оплата подтверждена для заказа {order_id}")
                 return True
@@ -258,11 +267,9 @@ class OrderStatusService:
             if order.status == OrderStatus.READY_FOR_FINAL_REVIEW:
                 order.status = OrderStatus.IN_PROGRESS_FINAL_REVISION
                 
-                await db.commit()
-                
                 # Уведомляем об изменении статуса
-                await notification_service.notify_order_status_changed(
-                    order_id, old_status, order.status
+                notification_service.notify_order_status_changed(
+                    db, order_id, old_status, order.status
                 )
                 
                 # Уведомление продюсеру о финальной правке
@@ -277,7 +284,9 @@ class OrderStatusService:
                     
                     admin_message += f"🌐 <a href='https://musicme.ru/producer/orders/{order.id}'>Открыть заказ</a>"
                     
-                    await notification_service.notify_admin(admin_message)
+                    notification_service.notify_admin(db, admin_message)
+                
+                await db.commit()
                 
                 logger.info(f"Финальная правка запрошена для заказа {order_id}")
                 return True
@@ -317,13 +326,13 @@ class OrderStatusService:
             # Меняем статус на завершенный
             order.status = OrderStatus.COMPLETED
             
-            await db.commit()
-            
             # Уведомляем об изменении статуса
-            await notification_service.notify_order_status_changed(
-                order_id, old_status, order.status
+            notification_service.notify_order_status_changed(
+                db, order_id, old_status, order.status
             )
             
+            await db.commit()
+            
             logger.info(f"Заказ {order_id} завершен")
             return True
             
@@ -362,11 +371,9 @@ class OrderStatusService:
             # Меняем статус на отмененный
             order.status = OrderStatus.CANCELLED
             
-            await db.commit()
-            
             # Уведомляем об изменении статуса
-            await notification_service.notify_order_status_changed(
-                order_id, old_status, order.status
+            notification_service.notify_order_status_changed(
+                db, order_id, old_status, order.status
             )
             
             # Уведомление администратору об отмене
@@ -381,7 +388,9 @@ class OrderStatusService:
             
             admin_message += f"🌐 <a href='https://musicme.ru/admin/orders/{order.id}'>Открыть заказ</a>"
             
-            await notification_service.notify_admin(admin_message)
+            notification_service.notify_admin(db, admin_message)
+            
+            await db.commit()
             
             logger.info(f"Заказ {order_id} отменен, причина: {reason}")
             return True
@@ -0,0 +1,133 @@
+"""
+Поддержка дневной сводки daily_order_stats
+
+Периодически пересчитывает дни, в которые попали измененные заказы
+(по updated_at), и раз в сутки перестраивает сводку целиком, чтобы
+учесть удаления. День пересчитывается целиком (DELETE + INSERT ... SELECT),
+поэтому повторный пересчет безопасен.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timezone, timedelta
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import select, delete, insert, func, cast, Date, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud.stats import crud_stats, ROLLUP_COLUMNS
+from app.models.daily_order_stats import DailyOrderStats
+from app.models.order import Order as OrderModel
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock, чтобы воркеры uvicorn не пересчитывали сводку одновременно
+ROLLUP_LOCK_KEY = 720_301
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class StatsRollupService:
+    """Фоновое обновление дневной сводки заказов"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._last_refresh: Optional[datetime] = None
+        self._last_full_rebuild: Optional[float] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="stats-rollup")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка обновления сводки статистики: {e}")
+            await asyncio.sleep(settings.STATS_ROLLUP_INTERVAL_SECONDS)
+
+    async def refresh(self) -> None:
+        """Инкрементальное обновление или полная перестройка по расписанию"""
+        full_rebuild_due = (
+            self._last_full_rebuild is None
+            or time.monotonic() - self._last_full_rebuild > settings.STATS_ROLLUP_FULL_REBUILD_HOURS * 3600
+        )
+        started_at = _utcnow()
+
+        async with AsyncSessionLocal() as db:
+            if not await self._try_lock(db):
+                return
+
+            if full_rebuild_due:
+                await self._rebuild_all(db)
+                self._last_full_rebuild = time.monotonic()
+                logger.info("Сводка статистики перестроена полностью")
+            else:
+                days = await self._changed_days(db, self._last_refresh)
+                await self._recompute_days(db, days)
+                if days:
+                    logger.info(f"Сводка статистики обновлена за {len(days)} дн.")
+
+            await db.commit()
+
+        self._last_refresh = started_at
+
+    async def refresh_days(self, days: Iterable[date]) -> None:
+        """Пересчитать конкретные дни (например, после удаления заказа)"""
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+            await self._recompute_days(db, set(days))
+            await db.commit()
+
+    async def _try_lock(self, db: AsyncSession) -> bool:
+        result = await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+        return bool(result.scalar())
+
+    async def _changed_days(self, db: AsyncSession, since: Optional[datetime]) -> Set[date]:
+        """Дни создания заказов, измененных с момента прошлого обновления"""
+        # Запас на расхождение часов и долгие транзакции
+        since = (since or _utcnow()) - timedelta(seconds=settings.STATS_ROLLUP_INTERVAL_SECONDS)
+        result = await db.execute(
+            select(cast(OrderModel.created_at, Date))
+            .where(OrderModel.updated_at >= since)
+            .distinct()
+        )
+        return set(result.scalars().all())
+
+    async def _recompute_days(self, db: AsyncSession, days: Set[date]) -> None:
+        for day in sorted(days):
+            await db.execute(delete(DailyOrderStats).where(DailyOrderStats.day == day))
+            await db.execute(
+                insert(DailyOrderStats).from_select(
+                    ROLLUP_COLUMNS, crud_stats.live_rollup_query(day, day)
+                )
+            )
+
+    async def _rebuild_all(self, db: AsyncSession) -> None:
+        first_day_result = await db.execute(select(func.min(cast(OrderModel.created_at, Date))))
+        first_day = first_day_result.scalar()
+
+        await db.execute(delete(DailyOrderStats))
+        if first_day:
+            await db.execute(
+                insert(DailyOrderStats).from_select(
+                    ROLLUP_COLUMNS, crud_stats.live_rollup_query(first_day, _utcnow().date())
+                )
+            )
+
+
+# Глобальный экземпляр сервиса
+stats_rollup_service = StatsRollupService()
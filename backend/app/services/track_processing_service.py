@@ -0,0 +1,93 @@
+"""
+Обработчики фоновых задач для треков (превью, финальные версии)
+"""
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.file_storage import file_storage
+from app.models.processing_job import ProcessingJob, JobType
+from app.models.track import Track
+from app.services.audio_service import audio_service
+from app.services.job_queue import JobQueue
+from app.services.order_status_service import order_status_service
+
+logger = logging.getLogger(__name__)
+
+
+class TrackProcessingService:
+    """Фоновая обработка загруженных продюсером треков"""
+
+    def register(self, queue: JobQueue) -> None:
+        """Зарегистрировать обработчики в очереди задач"""
+        queue.register(JobType.TRIM_PREVIEW, self.trim_preview, on_failure=self.mark_failed)
+        queue.register(JobType.FINALIZE_MASTER, self.finalize_master, on_failure=self.mark_failed)
+
+    async def trim_preview(self, db: AsyncSession, job: ProcessingJob) -> None:
+        """Обрезать исходный файл до превью и опубликовать трек"""
+        track = await db.get(Track, job.track_id)
+        if not track:
+            logger.warning(f"Трек {job.track_id} удален, задача {job.id} пропущена")
+            return
+        if track.processing_status == "ready":
+            return
+
+        source_filename = job.payload["source_filename"]
+        source_path = file_storage.get_file_path(source_filename, "audio")
+        if not source_path:
+            raise FileNotFoundError(f"Исходный файл {source_filename} не найден")
+
+        file_info = await audio_service.create_preview_from_file(source_path, job.payload.get("original_name"))
+        if not file_info:
+            raise RuntimeError("SOX не смог создать превью")
+
+        track.audio_filename = file_info["filename"]
+        track.audio_size = file_info["size"]
+        track.audio_mimetype = file_info["mimetype"]
+        track.audio_hash = file_info["sha256"]
+        await self._publish(db, track)
+
+        # Исходник нужен только до успешной обрезки
+        file_storage.delete_file(source_filename, "audio")
+
+    async def finalize_master(self, db: AsyncSession, job: ProcessingJob) -> None:
+        """Подготовить полную версию: извлечь обложку и опубликовать трек"""
+        track = await db.get(Track, job.track_id)
+        if not track:
+            logger.warning(f"Трек {job.track_id} удален, задача {job.id} пропущена")
+            return
+        if track.processing_status == "ready":
+            return
+
+        if not file_storage.get_file_path(track.audio_filename, "audio"):
+            raise FileNotFoundError(f"Файл {track.audio_filename} не найден")
+
+        await run_in_threadpool(file_storage.get_or_create_cover, track.audio_filename, "audio")
+        await self._publish(db, track)
+
+    async def mark_failed(self, db: AsyncSession, job: ProcessingJob) -> None:
+        """Окончательный провал обработки: помечаем трек и убираем исходник"""
+        track = await db.get(Track, job.track_id)
+        if track:
+            track.processing_status = "failed"
+
+        source_filename = (job.payload or {}).get("source_filename")
+        if source_filename:
+            file_storage.delete_file(source_filename, "audio")
+
+    async def _publish(self, db: AsyncSession, track: Track) -> None:
+        """
+        Пометить трек готовым и пересчитать статус заказа одной транзакцией:
+        при сбое не останется готового трека при старом статусе заказа,
+        задача повторится целиком
+        """
+        track.processing_status = "ready"
+        await order_status_service.on_tracks_changed(db, track.order_id, commit=False)
+        await db.commit()
+
+        logger.info(f"Трек {track.id} обработан (заказ {track.order_id})")
+
+
+# Глобальный экземпляр сервиса
+track_processing_service = TrackProcessingService()
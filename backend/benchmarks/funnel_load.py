@@ -0,0 +1,275 @@
+"""
+Нагрузочный тест клиентской воронки (asyncio + httpx)
+
+Каждый виртуальный пользователь в цикле проходит воронку:
+справочники лендинга -> прослушивание примера -> вход через Яндекс
+(заглушка OAuth) -> создание заказа -> опрос статуса -> прослушивание демо.
+По каждому шагу выводятся пропускная способность и задержки p50/p95/p99.
+
+1. Запустить заглушки Яндекс OAuth и Telegram Bot API:
+    python -m benchmarks.funnel_load fake-services --port 8765
+
+2. Запустить бэкенд, направив внешние сервисы на заглушки:
+    YANDEX_OAUTH_URL=http://127.0.0.1:8765/yandex-oauth \\
+    YANDEX_LOGIN_URL=http://127.0.0.1:8765/yandex-login \\
+    TELEGRAM_API_URL=http://127.0.0.1:8765/telegram \\
+    TELEGRAM_BOT_TOKEN=123456:loadtest \\
+        uvicorn main:app --workers 2 --port 8000
+
+3. Запустить нагрузку:
+    python -m benchmarks.funnel_load run --base-url http://127.0.0.1:8000 \\
+        --users 50 --duration 60 [--demo-track <uuid> ...]
+
+Заказы и пользователи создаются по-настоящему, поэтому запускать
+только против отдельной базы.
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+# Шаги воронки в порядке вывода
+STEPS = [
+    "reference_data",
+    "example_audio",
+    "oauth_login",
+    "create_order",
+    "order_poll",
+    "demo_playback",
+]
+
+# Сколько байт аудио запрашивается за одно прослушивание (начало трека)
+PLAYBACK_RANGE = "bytes=0-524287"
+
+
+class StepStats:
+    """Задержки и ошибки по шагам воронки"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, step: str, seconds: float, ok: bool) -> None:
+        self.latencies[step].append(seconds * 1000)
+        if not ok:
+            self.errors[step] += 1
+
+    @staticmethod
+    def _percentile(values: List[float], percent: float) -> float:
+        ordered = sorted(values)
+        return ordered[max(math.ceil(len(ordered) * percent) - 1, 0)]
+
+    def report(self, elapsed: float) -> None:
+        print(f"{'Шаг':<16} {'запросов':>9} {'ошибок':>7} {'rps':>8} "
+              f"{'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'max, мс':>9}")
+        for step in STEPS:
+            values = self.latencies.get(step)
+            if not values:
+                print(f"{step:<16} {'—':>9}")
+                continue
+            print(f"{step:<16} {len(values):>9} {self.errors[step]:>7} {len(values) / elapsed:>8.1f} "
+                  f"{self._percentile(values, 0.50):>9.1f} {self._percentile(values, 0.95):>9.1f} "
+                  f"{self._percentile(values, 0.99):>9.1f} {max(values):>9.1f}")
+
+
+class VirtualUser:
+    def __init__(self, number: int, client: httpx.AsyncClient, stats: StepStats, args: argparse.Namespace):
+        self.number = number
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.token: Optional[str] = None
+
+    async def _request(self, step: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            # Тело читается целиком, чтобы учесть передачу аудио
+            await response.aread()
+        except httpx.HTTPError:
+            self.stats.record(step, time.perf_counter() - started, ok=False)
+            return None
+        self.stats.record(step, time.perf_counter() - started, ok=response.status_code < 400)
+        return response
+
+    @property
+    def _auth(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    async def _think(self) -> None:
+        await asyncio.sleep(random.uniform(0, self.args.think_ms) / 1000)
+
+    async def run_funnel(self, iteration: int) -> None:
+        # Лендинг: справочники и список примеров
+        responses = await asyncio.gather(*[
+            self._request("reference_data", "GET", path)
+            for path in ("/api/v1/tariffs", "/api/v1/themes", "/api/v1/genres", "/api/v1/example-tracks")
+        ])
+        themes, genres, examples = [
+            response.json() if response is not None and response.status_code == 200 else []
+            for response in responses[1:]
+        ]
+        await self._think()
+
+        playable = [track for track in examples if track.get("audio_filename")]
+        if playable:
+            track = random.choice(playable)
+            await self._request(
+                "example_audio", "GET", f"/api/v1/example-tracks/{track['id']}/audio",
+                headers={"Range": PLAYBACK_RANGE}
+            )
+            await self._think()
+
+        # Код авторизации заглушка превращает в email loadtest-<код>
+        response = await self._request(
+            "oauth_login", "POST", "/api/v1/auth/login/yandex",
+            json={"code": f"vu{self.number}", "redirect_uri": "http://127.0.0.1/auth/callback"}
+        )
+        if response is None or response.status_code != 200:
+            return
+        self.token = response.json()["access_token"]
+        await self._think()
+
+        if not themes or not genres:
+            return
+        response = await self._request(
+            "create_order", "POST", "/api/v1/orders", headers=self._auth,
+            json={
+                "recipient_name": f"Получатель {self.number}-{iteration}",
+                "occasion": "День рождения",
+                "details": "Нагрузочный тест воронки",
+                "theme_id": random.choice(themes)["id"],
+                "genre_id": random.choice(genres)["id"],
+                "tariff_plan": "basic",
+                "preferences": {"tariff": "basic"},
+            }
+        )
+        if response is None or response.status_code != 201:
+            return
+        order_id = response.json()["id"]
+
+        # Страница заказа опрашивает статус
+        order = None
+        for _ in range(self.args.polls):
+            await asyncio.sleep(self.args.poll_interval)
+            response = await self._request("order_poll", "GET", f"/api/v1/orders/{order_id}", headers=self._auth)
+            if response is not None and response.status_code == 200:
+                order = response.json()
+        await self._request("order_poll", "GET", "/api/v1/orders", headers=self._auth)
+
+        # Демо: готовые превью заказа или заранее известные треки
+        demo_tracks = [
+            track["id"] for track in (order or {}).get("tracks", [])
+            if track.get("is_preview") and track.get("audio_filename")
+        ] or self.args.demo_track
+        if demo_tracks:
+            await self._request(
+                "demo_playback", "GET", f"/api/v1/tracks/{random.choice(demo_tracks)}/audio",
+                headers={"Range": PLAYBACK_RANGE}
+            )
+
+
+async def run_load(args: argparse.Namespace) -> int:
+    stats = StepStats()
+    deadline = time.monotonic() + args.duration
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        async def user_loop(number: int) -> None:
+            user = VirtualUser(number, client, stats, args)
+            iteration = 0
+            # Плавный старт, чтобы не получить всплеск в первую секунду
+            await asyncio.sleep(args.ramp_up * number / args.users)
+            while time.monotonic() < deadline:
+                await user.run_funnel(iteration)
+                iteration += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*[user_loop(number) for number in range(args.users)])
+        elapsed = time.monotonic() - started
+
+    print(f"Виртуальных пользователей: {args.users}, длительность: {elapsed:.1f} с")
+    stats.report(elapsed)
+    return 1 if any(stats.errors.values()) else 0
+
+
+def build_fake_services():
+    """Заглушки Яндекс OAuth и Telegram Bot API"""
+    from fastapi import FastAPI, Form, Header, Request
+
+    fake = FastAPI(title="musicme fake services")
+
+    @fake.post("/yandex-oauth/token")
+    async def yandex_token(code: str = Form(...)):
+        return {"access_token": f"fake-{code}", "token_type": "bearer", "expires_in": 3600}
+
+    @fake.get("/yandex-login/info")
+    async def yandex_info(authorization: str = Header("")):
+        code = authorization.removeprefix("OAuth fake-")
+        return {
+            "id": code,
+            "default_email": f"loadtest-{code}@loadtest.musicme.ru",
+            "display_name": f"Нагрузка {code}",
+        }
+
+    @fake.api_route("/telegram/bot{token}/{method}", methods=["GET", "POST"])
+    async def telegram_method(token: str, method: str, request: Request):
+        if method == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "MusicMe Load", "username": "musicme_load_bot"}
+        elif method == "getUpdates":
+            # Long polling: держим запрос, как настоящий Bot API
+            form = await request.form() if request.method == "POST" else request.query_params
+            await asyncio.sleep(min(float(form.get("timeout", 0) or 0), 10))
+            result = []
+        elif method == "getWebhookInfo":
+            result = {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        elif method == "sendMessage":
+            form = await request.form()
+            result = {
+                "message_id": random.randint(1, 1_000_000),
+                "date": int(time.time()),
+                "chat": {"id": int(form.get("chat_id", 0)), "type": "private"},
+                "text": form.get("text", ""),
+            }
+        else:
+            result = True
+        return {"ok": True, "result": result}
+
+    return fake
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест клиентской воронки")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="запустить нагрузку")
+    run.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run.add_argument("--users", type=int, default=20, help="виртуальных пользователей")
+    run.add_argument("--duration", type=float, default=60, help="длительность, секунд")
+    run.add_argument("--ramp-up", type=float, default=5, help="плавный старт, секунд")
+    run.add_argument("--think-ms", type=float, default=500, help="максимальная пауза между шагами")
+    run.add_argument("--polls", type=int, default=3, help="опросов статуса на заказ")
+    run.add_argument("--poll-interval", type=float, default=1.0, help="интервал опроса, секунд")
+    run.add_argument("--timeout", type=float, default=30)
+    run.add_argument("--demo-track", action="append", default=[], help="id трека для прослушивания демо")
+
+    fake = commands.add_parser("fake-services", help="заглушки Яндекс OAuth и Telegram")
+    fake.add_argument("--host", default="127.0.0.1")
+    fake.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args()
+    if args.command == "fake-services":
+        import uvicorn
+        uvicorn.run(build_fake_services(), host=args.host, port=args.port, log_level="warning")
+        return 0
+    return asyncio.run(run_load(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,30 @@
 """
 import asyncio
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings, CORS_ORIGINS
-from app.core.database import init_db
+from app.core.logging_config import setup_logging, RequestIdMiddleware, REQUEST_ID_HEADER
+from app.core.database import init_db, get_pool_stats
+from app.core.query_debug import QueryDebugMiddleware
+from app.core.http_client import http_client
+from app.core.metrics import MetricsMiddleware, metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.api.v1.router import api_router
-from app.bot.runner import run_background, shutdown_bot
+from app.bot.bot import peek_bot_instance
+from app.bot.runner import run_background, run_webhook, shutdown_bot
+from app.bot.webhook import release_leadership
+from app.services.job_queue import job_queue
+from app.services.track_processing_service import track_processing_service
+from app.services.stats_rollup_service import stats_rollup_service
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.background_tasks import background_tasks
+from app.services.health_service import health_service
 
+setup_logging()
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
@@ -27,32 +42,64 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Ошибка инициализации БД: {e}")
         # Не прерываем запуск
     
-    # Запуск Telegram бота
+    # Запуск фоновой очереди обработки треков
+    try:
+        track_processing_service.register(job_queue)
+        await job_queue.start(settings.JOB_WORKERS)
+    except Exception as e:
+        logger.error(f"❌ Ошибка запуска очереди задач: {e}")
+    
+    # Обновление дневной сводки статистики
+    await stats_rollup_service.start()
+    
+    # Фоновые задачи после ответа (ограниченная очередь)
+    await background_tasks.start()
+    
+    # Общий пул соединений к OAuth-провайдерам и Telegram
+    await http_client.start()
+    
+    # Запуск Telegram бота: webhook (прод), polling в процессе (разработка)
+    # или standalone — бот запущен отдельно, здесь только уведомления
     bot_task = None
     try:
-        from app.bot.runner import run_background
-        bot_task = await run_background()
-        if bot_task:
-            logger.info("🤖 Telegram бот запущен")
-        else:
-            logger.warning("⚠️ Telegram бот не запущен (проверьте токен)")
+        if settings.TELEGRAM_BOT_MODE == "webhook":
+            await run_webhook()
+        elif settings.TELEGRAM_BOT_MODE == "background":
+            bot_task = await run_background()
+            if bot_task:
+                logger.info("🤖 Telegram бот запущен")
+            else:
+                logger.warning("⚠️ Telegram бот не запущен (проверьте токен)")
     except Exception as e:
         logger.error(f"❌ Ошибка запуска Telegram бота: {e}")
         # Бот не критичен, продолжаем
+    health_service.track_bot(bot_task)
+    
+    # Отправка уведомлений из outbox
+    if settings.TELEGRAM_BOT_TOKEN:
+        await notification_dispatcher.start()
     
     yield
     
     # Остановка
     logger.info("🛑 Остановка приложения...")
     
-    if bot_task:
-        try:
-            from app.bot.runner import shutdown_bot
+    # Сначала доработать фоновые задачи, пока пул БД и бот еще живы
+    await background_tasks.stop()
+    await job_queue.stop()
+    await stats_rollup_service.stop()
+    await notification_dispatcher.stop()
+    await http_client.stop()
+    
+    try:
+        if bot_task:
             bot_task.cancel()
-            await shutdown_bot()
-            logger.info("✅ Telegram бот остановлен")
-        except Exception as e:
-            logger.error(f"❌ Ошибка остановки бота: {e}")
+            await asyncio.gather(bot_task, return_exceptions=True)
+        await release_leadership()
+        await shutdown_bot()
+        logger.info("✅ Telegram бот остановлен")
+    except Exception as e:
+        logger.error(f"❌ Ошибка остановки бота: {e}")
 
 
 
@@ -69,9 +116,20 @@ app.add_middleware(
     allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER],
     allow_headers=["*"],
 )
 
+# Счетчик SQL-запросов и поиск N+1 (только для отладки)
+if settings.SQL_QUERY_DEBUG:
+    app.add_middleware(QueryDebugMiddleware)
+
+# Метрики запросов для /metrics
+app.add_middleware(MetricsMiddleware)
+
+# request_id для логов (внешний слой, чтобы покрыть все остальные)
+app.add_middleware(RequestIdMiddleware)
+
 # Подключение роутеров
 app.include_router(api_router, prefix="/api/v1")
 
@@ -97,56 +155,40 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Проверка здоровья приложения"""
-    health_status = {
-        "status": "ok",
-        "database": "connected",
-        "telegram_bot": "running" if settings.TELEGRAM_BOT_TOKEN else "not_configured",
-        "timestamp": __import__("datetime").datetime.now().isoformat()
-    }
-    
-    # Можно добавить проверку подключения к базе данных
-    # и статуса бота при необходимости
-    
+    """
+    Проверка здоровья приложения: БД, каталог загрузок, SOX, бот.
+    503, если недоступна БД или каталог загрузок — балансировщик снимает узел.
+    """
+    health_status = await health_service.check()
+    if health_status["status"] == "error":
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=health_status)
     return health_status
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return Response(content=metrics.render(get_pool_stats(), background_tasks.get_stats()), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/bot/status")
 async def bot_status():
-    """Проверка статуса Telegram бота"""
+    """
+    Статус Telegram бота из памяти процесса (без запросов к Telegram).
+    Принудительное обновление — POST /api/v1/admin/bot/status/refresh
+    """
     if not settings.TELEGRAM_BOT_TOKEN:
         return {
             "status": "not_configured",
             "message": "TELEGRAM_BOT_TOKEN не настроен"
         }
     
-    try:
-        # Проверяем что бот доступен через API
-        import httpx
-        
-        async with httpx.AsyncClient(timeout=5) as client:
-            response = await client.get(
-                f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/getMe"
-            )
-            
-            if response.status_code == 200:
-                bot_info = response.json()
-                return {
-                    "status": "running",
-                    "bot": {
-                        "id": bot_info["result"]["id"],
-                        "username": bot_info["result"]["username"],
-                        "first_name": bot_info["result"]["first_name"]
-                    }
-                }
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Telegram API error: {response.text}"
-                }
-                
-    except Exception as e:
+    bot = peek_bot_instance()
+    if not bot:
         return {
             "status": "error",
-            "message": str(e)
-        }
\ No newline at end of file
+            "mode": settings.TELEGRAM_BOT_MODE,
+            "message": "Бот не инициализирован"
+        }
+    
+    return {"mode": settings.TELEGRAM_BOT_MODE, **bot.status.snapshot()}
\ No newline at end of file
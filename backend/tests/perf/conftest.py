@@ -0,0 +1,134 @@
+"""
+Фикстуры тестов производительности
+
+Тесты идут против отдельной базы Postgres из BENCH_DATABASE_URL
+(модели используют UUID и JSONB, SQLite не подходит). База очищается,
+поэтому ее имя должно содержать bench или test. Без BENCH_DATABASE_URL
+тесты пропускаются.
+
+Параметры окружения:
+    BENCH_SCALE       множитель объема данных (1.0 — 100k заказов)
+    BENCH_ITERATIONS  запросов на эндпоинт для p95
+    BENCH_SKIP_SEED   1 — использовать уже заполненную базу
+"""
+import asyncio
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import pytest
+
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL", "")
+BENCH_SCALE = float(os.environ.get("BENCH_SCALE", "1.0"))
+BENCH_ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", "50"))
+BENCH_SKIP_SEED = os.environ.get("BENCH_SKIP_SEED", "") == "1"
+
+requires_bench_db = pytest.mark.skipif(not BENCH_DATABASE_URL, reason="BENCH_DATABASE_URL не задан")
+
+if BENCH_DATABASE_URL:
+    database_name = BENCH_DATABASE_URL.rsplit("/", 1)[-1]
+    if not BENCH_DATABASE_URL.startswith("postgresql") or not any(
+        marker in database_name for marker in ("bench", "test")
+    ):
+        raise pytest.UsageError("BENCH_DATABASE_URL должен указывать на отдельную базу Postgres с bench/test в имени")
+
+    # Настройки читаются при импорте app.core.config, поэтому задаются до импорта приложения
+    os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+    os.environ["SQL_QUERY_DEBUG"] = "true"
+    os.environ["TELEGRAM_BOT_TOKEN"] = ""
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+
+@dataclass
+class Fixtures:
+    """Идентификаторы и токены засеянной базы"""
+    user_id: uuid.UUID
+    producer_id: uuid.UUID
+    admin_id: uuid.UUID
+    track_id: uuid.UUID
+    example_track_id: uuid.UUID
+    tokens: Dict[str, str] = field(default_factory=dict)
+    admin_orders_cursor: str = ""
+
+
+# Строки отчета, печатаются в конце прогона
+budget_report: List[str] = []
+
+
+@pytest.fixture(scope="session")
+def loop():
+    """Один цикл событий на сессию: пул asyncpg привязан к циклу, в котором создан"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    from app.core.database import engine
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def seeded_db(loop):
+    """Заполненная база (или уже заполненная при BENCH_SKIP_SEED=1)"""
+    if not BENCH_SKIP_SEED:
+        from tests.perf.seed import seed
+        summary = loop.run_until_complete(seed(BENCH_SCALE))
+        budget_report.append(f"Заполнено: {summary}")
+
+
+@pytest.fixture(scope="session")
+def client(loop, seeded_db):
+    """Приложение в процессе через ASGITransport"""
+    import httpx
+    from main import app
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    yield client
+    loop.run_until_complete(client.aclose())
+
+
+@pytest.fixture(scope="session")
+def fixtures(loop, client) -> Fixtures:
+    from sqlalchemy import select
+
+    from app.core.database import AsyncSessionLocal
+    from app.core.pagination import NEXT_CURSOR_HEADER
+    from app.core.security import create_user_access_token
+    from app.models.example_track import ExampleTrack
+    from app.models.order import Order
+    from app.models.track import Track
+    from app.models.user import User
+
+    async def load() -> Fixtures:
+        async with AsyncSessionLocal() as db:
+            user_id = (await db.execute(
+                select(Order.user_id).where(Order.producer_id.is_not(None)).limit(1)
+            )).scalar_one()
+            producer_id = (await db.execute(
+                select(User.id).where(User.is_producer.is_(True)).limit(1)
+            )).scalar_one()
+            admin_id = (await db.execute(select(User.id).where(User.is_admin.is_(True)).limit(1))).scalar_one()
+            track_id = (await db.execute(select(Track.id).limit(1))).scalar_one()
+            example_track_id = (await db.execute(select(ExampleTrack.id).limit(1))).scalar_one()
+
+        result = Fixtures(user_id, producer_id, admin_id, track_id, example_track_id)
+        for role, user in (("user", user_id), ("producer", producer_id), ("admin", admin_id)):
+            result.tokens[role] = create_user_access_token(
+                str(user), is_admin=role == "admin", is_producer=role == "producer"
+            )
+
+        response = await client.get(
+            "/api/v1/admin/orders?limit=100",
+            headers={"Authorization": f"Bearer {result.tokens['admin']}"}
+        )
+        result.admin_orders_cursor = response.headers.get(NEXT_CURSOR_HEADER, "")
+        return result
+
+    return loop.run_until_complete(load())
+
+
+def pytest_terminal_summary(terminalreporter):
+    if budget_report:
+        terminalreporter.section("Бюджеты SQL и p95")
+        for line in budget_report:
+            terminalreporter.write_line(line)
@@ -0,0 +1,139 @@
+"""
+Заполнение базы для тестов производительности
+
+Объем близок к проду при BENCH_SCALE=1.0: 10k пользователей,
+100k заказов, 300k треков. Импортируется только после того, как
+conftest направил приложение на BENCH_DATABASE_URL.
+"""
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import insert
+
+from app.core.database import Base, engine, init_db
+from app.core.file_storage import file_storage
+from app.models.example_track import ExampleTrack
+from app.models.genre import Genre
+from app.models.order import Order, OrderStatus
+from app.models.tariff import Tariff
+from app.models.theme import Theme
+from app.models.track import Track
+from app.models.user import User
+from app.services.stats_rollup_service import stats_rollup_service
+
+# Объемы при BENCH_SCALE=1.0
+USERS = 10_000
+ORDERS = 100_000
+TRACKS_PER_ORDER = 3
+PRODUCERS = 20
+
+INSERT_CHUNK = 5_000
+BENCH_AUDIO = b"ID3" + os.urandom(256 * 1024)
+
+
+def _chunks(rows: List[dict]):
+    for start in range(0, len(rows), INSERT_CHUNK):
+        yield rows[start:start + INSERT_CHUNK]
+
+
+async def _insert(model, rows: List[dict]) -> None:
+    async with engine.begin() as conn:
+        for chunk in _chunks(rows):
+            await conn.execute(insert(model.__table__), chunk)
+
+
+def _write_audio(directory: str, filename: str) -> None:
+    with open(os.path.join(directory, filename), "wb") as audio_file:
+        audio_file.write(BENCH_AUDIO)
+
+
+async def seed(scale: float) -> str:
+    """Пересоздать схему и заполнить базу тестовыми данными, вернуть сводку"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await init_db()
+
+    _write_audio(file_storage.audio_dir, "bench-track.mp3")
+    _write_audio(file_storage.examples_dir, "bench-example.mp3")
+
+    themes = [{"id": uuid.uuid4(), "name": f"Тема {n}", "is_active": True, "created_at": now} for n in range(10)]
+    genres = [{"id": uuid.uuid4(), "name": f"Жанр {n}", "is_active": True, "created_at": now} for n in range(10)]
+    await _insert(Theme, themes)
+    await _insert(Genre, genres)
+    await _insert(Tariff, [
+        {
+            "id": uuid.uuid4(), "code": code, "name": code.title(), "description": f"Тариф {code}", "price": price,
+            "deadline_days": days, "rounds": rounds, "has_questionnaire": code != "basic",
+            "has_interview": code == "premium", "features": [f"Опция {n}" for n in range(6)],
+            "is_active": True, "sort_order": n, "created_at": now, "updated_at": now,
+        }
+        for n, (code, price, days, rounds) in enumerate(
+            [("basic", 2990, 7, 1), ("advanced", 5990, 5, 2), ("premium", 9990, 3, 3)]
+        )
+    ])
+    await _insert(ExampleTrack, [
+        {
+            "id": uuid.uuid4(), "title": f"Пример {n}", "theme_id": rng.choice(themes)["id"],
+            "genre_id": rng.choice(genres)["id"], "audio_filename": "bench-example.mp3",
+            "audio_size": len(BENCH_AUDIO), "audio_mimetype": "audio/mpeg", "is_active": True,
+            "sort_order": n, "created_at": now,
+        }
+        for n in range(20)
+    ])
+
+    user_count = max(int(USERS * scale), PRODUCERS + 2)
+    users = [
+        {
+            "id": uuid.uuid4(), "email": f"user{n}@bench.musicme.ru", "name": f"Пользователь {n}",
+            "created_at": now - timedelta(days=rng.randint(0, 365)),
+            "is_admin": n == 0, "is_producer": 0 < n <= PRODUCERS, "registration_source": "oauth",
+        }
+        for n in range(user_count)
+    ]
+    await _insert(User, users)
+    producers = [user["id"] for user in users[1:PRODUCERS + 1]]
+    customers = [user["id"] for user in users[PRODUCERS + 1:]]
+
+    statuses = [status.value for status in OrderStatus]
+    orders = []
+    for n in range(int(ORDERS * scale)):
+        created_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        orders.append({
+            "id": uuid.uuid4(), "user_id": rng.choice(customers),
+            "theme_id": rng.choice(themes)["id"], "genre_id": rng.choice(genres)["id"],
+            "producer_id": rng.choice(producers) if rng.random() < 0.7 else None,
+            "tariff_plan": rng.choice(["basic", "advanced", "premium"]),
+            "recipient_name": f"Получатель {n}", "occasion": "День рождения",
+            "details": "Песня про море и друзей", "preferences": {"tariff": "basic"},
+            "deadline_at": created_at + timedelta(days=7), "price": rng.choice([2990, 5990, 9990]),
+            "status": rng.choice(statuses), "rounds_remaining": rng.randint(0, 3),
+            "created_at": created_at, "updated_at": created_at + timedelta(hours=rng.randint(1, 96)),
+        })
+    await _insert(Order, orders)
+
+    tracks = [
+        {
+            "id": uuid.uuid4(), "order_id": order["id"], "version": version,
+            "is_preview": version < TRACKS_PER_ORDER, "title": f"Трек {version}",
+            "audio_filename": "bench-track.mp3", "audio_size": len(BENCH_AUDIO),
+            "audio_mimetype": "audio/mpeg", "processing_status": "ready",
+            "created_at": order["created_at"] + timedelta(hours=version),
+        }
+        for order in orders
+        for version in range(1, TRACKS_PER_ORDER + 1)
+    ]
+    await _insert(Track, tracks)
+
+    # Дневная сводка для /admin/stats и статистика планировщика Postgres, как на проде
+    await stats_rollup_service.refresh()
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("ANALYZE")
+
+    return f"{len(users)} пользователей, {len(orders)} заказов, {len(tracks)} треков"
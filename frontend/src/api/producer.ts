@@ -10,11 +10,24 @@ const getAuthHeaders = () => {
   }
 }
 
+// Список отдается страницами: идем по курсору из X-Next-Cursor, пока он не закончится
 export const getProducerOrders = async (orderStatus?: string): Promise<Order[]> => {
-  const response = await apiClient.get('/producer/orders', { 
-    params: orderStatus ? { order_status: orderStatus } : {} 
-  })
-  return response.data
+  const orders: Order[] = []
+  let cursor: string | undefined
+
+  do {
+    const response = await apiClient.get('/producer/orders', {
+      params: {
+        limit: 500,
+        ...(orderStatus && { order_status: orderStatus }),
+        ...(cursor && { cursor })
+      }
+    })
+    orders.push(...response.data)
+    cursor = response.headers['x-next-cursor'] || undefined
+  } while (cursor)
+
+  return orders
 }
 
 export const updateOrderStatus = async (orderId: string, status: string) => {